@@ -2,33 +2,51 @@ import os
 import traceback
 import logging
 from datetime import datetime
-from flask import Flask, request, jsonify, send_from_directory, render_template
+from flask import Flask, Request, Response, request, jsonify, send_from_directory, render_template, stream_with_context
 from flask_cors import CORS, cross_origin
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import RequestEntityTooLarge
+import hmac
 import json
+import uuid
+import zipfile
 
 # Import your existing functions - Apne existing functions ko import karte hain
-from parser.resume_parser import extract_text_from_pdf, extract_text_from_docx, extract_basic_info
-from utils.skill_classifier import classify_skills, classify_skills_enhanced
-from utils.scoring import score_resume, WEIGHTS
-from utils.feedback import generate_feedback, generate_enhanced_feedback
-from utils.section_extractor import extract_sections
+from utils.logging_setup import configure_logging
+from utils.pipeline import run_analysis, analyze_file, ExtractionError, DocumentRejected
+from utils.batch import stream_batch, iter_uploaded_files, iter_zip_members
 from utils.report_generator import generate_pdf_report
+from utils.analysis_cache import analysis_cache, content_hash, restamp
+from utils.score_distribution import attach_percentiles
+from utils.skill_classifier import recommend_skills, attach_skill_recommendations
+from utils.fleet_stats import fleet_stats
+from utils.analysis_store import analysis_store, InvalidQuery
+from utils.skill_index import skill_index, InvalidSkillQuery
+from utils.jd_matcher import job_matcher
+from utils.similar_index import similarity_index
+from utils.memory_stats import worker_memory_report
+from utils.metrics import registry, stage, render_prometheus
+from utils.profiling import profile_call
+from utils.sampler import sampler
+from utils.deadline import ANALYSIS_DEADLINE_SECONDS
 
 # Configure logging - Logging setup karte hain taki sab kuch track kar sakein
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('app.log'),
-        logging.StreamHandler()
-    ]
-)
+# Records are queued and written by a background thread (see utils/logging_setup.py)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+class AppRequest(Request):
+    """Request class that lets the batch endpoint accept larger bodies than single uploads."""
+
+    @property
+    def max_content_length(self):
+        if self.path == '/analyze/batch':
+            return app.config['BATCH_MAX_CONTENT_LENGTH']
+        return app.config['MAX_CONTENT_LENGTH']
+
 # Initialize the Flask App - Flask app ko initialize karte hain
 app = Flask(__name__, template_folder='templates', static_folder='static')
+app.request_class = AppRequest
 
 # Configure CORS from environment variables for production security
 CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*') # Default to '*' for local dev
@@ -37,9 +55,11 @@ logger.info(f"CORS configured for origins: {CORS_ORIGINS}")
 
 # Configuration - App ki configuration set karte hain
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size - Maximum file size 16MB
+app.config['BATCH_MAX_CONTENT_LENGTH'] = int(os.environ.get('BATCH_MAX_CONTENT_MB', '512')) * 1024 * 1024  # Whole batch upload limit
 app.config['UPLOAD_FOLDER'] = 'temp_uploads'  # Temporary upload folder - Temporary files ke liye folder
 app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'docx'}  # Allowed file types - Allowed file types (DOC support is less robust)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN', '')  # Unlocks profiling and admin endpoints; empty disables them
 
 # Ensure upload directory exists - Upload folder exist karta hai ya nahi check karte hain
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
@@ -50,6 +70,24 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
+def is_admin_request():
+    """Whether the request carries the configured admin token - Admin token check karte hain."""
+    token = app.config['ADMIN_TOKEN']
+    supplied = request.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+def profiling_requested():
+    """Whether the caller asked for a profiling trace via the X-Profile header or ?profile=1."""
+    return request.headers.get('X-Profile') == '1' or request.args.get('profile') == '1'
+
+def requested_deadline():
+    """Deadline in seconds from the X-Analysis-Deadline header, capped at ANALYSIS_DEADLINE_SECONDS."""
+    try:
+        seconds = float(request.headers.get('X-Analysis-Deadline', ANALYSIS_DEADLINE_SECONDS))
+    except ValueError:
+        return ANALYSIS_DEADLINE_SECONDS
+    return min(max(seconds, 0.0), ANALYSIS_DEADLINE_SECONDS)
+
 def cleanup_old_files():
     """Clean up files older than 1 hour in temp_uploads - 1 ghante purane files ko delete karte hain."""
     try:
@@ -67,7 +105,7 @@ def cleanup_old_files():
 @app.before_request
 def before_request():
     """Log all requests - Har request ko log karte hain."""
-    logger.info(f"{request.method} {request.path} - {request.remote_addr}")
+    logger.info("%s %s - %s", request.method, request.path, request.remote_addr)
 
 @app.errorhandler(413)
 def too_large(e):
@@ -122,7 +160,8 @@ def generate_report():
             return jsonify({"error": "No analysis data provided"}), 400
 
         logger.info("Generating PDF report...")
-        pdf_buffer = generate_pdf_report(analysis_data)
+        with stage('report'):
+            pdf_buffer = generate_pdf_report(analysis_data)
         
         filename = analysis_data.get("analysis_metadata", {}).get("file_name", "resume")
         report_filename = f"Smart_Resume_Analysis_{filename}.pdf"
@@ -138,9 +177,6 @@ def analyze_resume():
     start_time = datetime.now()
     
     try:
-        # Clean up old files - Purane files ko clean up karte hain
-        cleanup_old_files()
-        
         # Validate request - Request ko validate karte hain
         if 'resume_file' not in request.files:
             return jsonify({"error": "No resume file provided"}), 400
@@ -152,72 +188,74 @@ def analyze_resume():
         if not file or not allowed_file(file.filename):
             return jsonify({"error": "Unsupported file type. Please upload a PDF, DOCX, or DOC file."}), 400
 
-        # Secure filename and save - Secure filename banate hain aur save karte hain
         filename = secure_filename(file.filename)
+        file_bytes = file.read()
+        digest = content_hash(file_bytes)
+
+        profile = profiling_requested()
+        if profile and not is_admin_request():
+            return jsonify({"error": "Profiling requires a valid X-Admin-Token."}), 403
+
+        # Serve repeat uploads from the cache without running any stage - Repeat uploads cache se serve karte hain
+        if analysis_cache is not None and not profile:
+            # The client's copy is only current while the co-occurrence model recommends the same skills
+            if request.if_none_match:
+                cached = analysis_cache.peek(digest)
+                if cached is not None:
+                    etag = analysis_cache.etag(digest, recommend_skills(cached["skills"]))
+                    if request.if_none_match.contains(etag):
+                        analysis_cache.record_not_modified()
+                        response = Response(status=304)
+                        response.set_etag(etag)
+                        return response
+
+            cached = analysis_cache.get(digest)
+            if cached is not None:
+                # The population and the co-occurrence model moved on since the cached analysis,
+                # so its percentiles and skill recommendations are looked up again
+                response_data = attach_skill_recommendations(restamp(cached, filename, start_time))
+                response = jsonify(attach_percentiles(response_data))
+                response.set_etag(analysis_cache.etag(digest, response_data["skill_recommendations"]))
+                response.headers['X-Cache'] = 'HIT'
+                registry.maybe_flush()
+                return response
+
+        # Clean up old files - Purane files ko clean up karte hain
+        cleanup_old_files()
+
+        # Secure filename and save - Secure filename banate hain aur save karte hain
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_filename = f"{timestamp}_{filename}"
+        # Same-second uploads of the same name must not share (and delete) one temp file
+        safe_filename = f"{timestamp}_{uuid.uuid4().hex[:8]}_{filename}"
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], safe_filename)
         
-        logger.info(f"Processing file: {filename} -> {safe_filename}")
-        file.save(filepath)
+        logger.debug("Processing file: %s -> %s", filename, safe_filename)
+        with open(filepath, 'wb') as f:
+            f.write(file_bytes)
         
-        # Extract text based on file type - File type ke hisab se text extract karte hain
-        text = ""
-        file_extension = filename.rsplit('.', 1)[1].lower()
-        
-        if file_extension == 'pdf':
-            logger.info("Extracting text from PDF...")
-            text = extract_text_from_pdf(filepath)
-        elif file_extension in ['docx', 'doc']:
-            logger.info("Extracting text from DOCX/DOC...")
-            text = extract_text_from_docx(filepath)
-        
-        if not text:
-            return jsonify({"error": "Could not extract text from the file. It might be corrupted, password-protected, or contain only images."}), 500
+        # Run the analysis pipeline - Analysis pipeline chalate hain
+        try:
+            if profile:
+                # Profiled requests run in this process, extraction included, so the profilers can see every stage
+                response_data, profile_report = profile_call(analyze_file, filepath, filename, start_time, requested_deadline())
+            else:
+                response_data = run_analysis(filepath, filename, start_time, requested_deadline())
+        except DocumentRejected as e:
+            # Nothing went wrong on our side: the document itself can't yield text
+            return jsonify({"error": str(e), "reason": e.reason}), 422
+        except ExtractionError as e:
+            return jsonify({"error": str(e)}), 500
 
-        logger.info(f"Text extraction successful. Length: {len(text)} characters")
-        
-        # Perform analysis - Analysis perform karte hain
-        logger.info("Starting resume analysis...")
-        
-        
-        
-        # Classify skills with enhanced analysis - Enhanced analysis ke saath skills classify karte hain
-        skills_data = classify_skills_enhanced(text)
-        skills = skills_data["skills_by_category"]
-        skill_count = skills_data["statistics"]["total_skills"]
-        avg_confidence = skills_data["statistics"]["average_confidence"]
-        logger.info(f"Enhanced skills classified: {skill_count} skills found (avg confidence: {avg_confidence})")
-        
-        # Extract sections - Sections extract karte hain
-        sections = extract_sections(text)
-        logger.info(f"Sections found: {sections}")
-        
-        # Calculate enhanced score with detailed analysis - Enhanced score detailed analysis ke saath calculate karte hain
-        score_data = score_resume(sections, WEIGHTS, text)
-        score = score_data["overall_score"]
-        logger.info(f"Enhanced score calculated: {score} (Grade: {score_data['grade']})")
-        
-        # Generate enhanced feedback - Enhanced feedback generate karte hain
-        feedback = generate_enhanced_feedback(sections, score_data, text)
-        logger.info(f"Enhanced feedback generated: {len(feedback)} items")
-
-        # Prepare response - Response prepare karte hain
-        response_data = {
-            "skills": skills,
-            "score": score,
-            "feedback": feedback,
-            "sections_found": sections,
-            "analysis_metadata": {
-                "file_name": filename,
-                "file_size": os.path.getsize(filepath),
-                "text_length": len(text),
-                "processing_time": (datetime.now() - start_time).total_seconds(),
-                "timestamp": datetime.now().isoformat()
-            }
-        }
-        logger.info("Analysis completed successfully!")
-        return jsonify(response_data)
+        if profile:
+            response = jsonify({**response_data, "profile": profile_report})
+        else:
+            response = jsonify(response_data)
+        registry.maybe_flush()
+        if analysis_cache is not None:
+            analysis_cache.put(digest, response_data)
+            response.set_etag(analysis_cache.etag(digest, response_data["skill_recommendations"]))
+            response.headers['X-Cache'] = 'MISS'
+        return response
     except RequestEntityTooLarge:
         return jsonify({"error": "File too large. Maximum size is 16MB."}), 413
     except Exception as e:
@@ -229,10 +267,32 @@ def analyze_resume():
         if 'filepath' in locals() and os.path.exists(filepath):
             try:
                 os.remove(filepath)
-                logger.info(f"Cleaned up file: {safe_filename}")
+                logger.debug("Cleaned up file: %s", safe_filename)
             except Exception as e:
                 logger.error(f"Error cleaning up file: {e}")
 
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Analyze a ZIP or multi-file upload, streaming one NDJSON line per resume - Har resume ke liye ek NDJSON line stream karte hain."""
+    cleanup_old_files()
+
+    uploads = request.files.getlist('resume_files')
+    archive = request.files.get('archive')
+    if not archive and not any(f.filename for f in uploads):
+        return jsonify({"error": "No resume files provided. Send 'resume_files' or a ZIP 'archive'."}), 400
+
+    if archive:
+        if not zipfile.is_zipfile(archive.stream):
+            return jsonify({"error": "The 'archive' upload is not a valid ZIP file."}), 400
+        archive.stream.seek(0)
+        documents = iter_zip_members(archive.stream)
+    else:
+        documents = iter_uploaded_files(uploads)
+
+    logger.info("Streaming batch analysis results...")
+    lines = stream_batch(documents, app.config['UPLOAD_FOLDER'], allowed_file, app.config['MAX_CONTENT_LENGTH'])
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
 @app.route('/test', methods=['GET'])
 def test_endpoint():
     """Test endpoint to verify server communication."""
@@ -255,7 +315,7 @@ def health_check():
 
 @app.route('/stats', methods=['GET'])
 def get_stats():
-    """Get API statistics."""
+    """Get API statistics and fleet-wide analysis aggregates."""
     try:
         file_count = len([f for f in os.listdir(app.config['UPLOAD_FOLDER']) 
                          if os.path.isfile(os.path.join(app.config['UPLOAD_FOLDER'], f))])
@@ -266,13 +326,160 @@ def get_stats():
                 "temp_files": file_count,
                 "max_file_size": "16MB",
                 "supported_formats": list(app.config['ALLOWED_EXTENSIONS']),
-                "server_time": datetime.now().isoformat()
+                "server_time": datetime.now().isoformat(),
+                "analysis_cache": analysis_cache.get_stats() if analysis_cache is not None else None,
+                # Maintained as analyses happen, so this is a read of a few counters, not a scan
+                "fleet": fleet_stats.summary() if fleet_stats is not None else None
             }
         })
     except Exception as e:
         logger.error(f"Error getting stats: {e}")
         return jsonify({"error": "Could not retrieve statistics"}), 500
 
+@app.route('/api/analyses/search', methods=['GET'])
+def search_analyses():
+    """
+    Search stored analyses - Stored analyses mein search karte hain.
+
+    ?q=python AND kubernetes, score > 75 plus optional skill= (all of), any_skill=, not_skill=,
+    min_score=, max_score=, limit= and offset=. Needs the analysis store and X-Admin-Token.
+    """
+    if analysis_store is None:
+        return jsonify({"error": "The analysis store is disabled (ANALYSIS_STORE_ENABLED)."}), 404
+    if not is_admin_request():
+        return jsonify({"error": "A valid X-Admin-Token is required."}), 403
+    try:
+        found = analysis_store.search(
+            query=request.args.get('q'),
+            skills_all=request.args.getlist('skill'),
+            skills_any=request.args.getlist('any_skill'),
+            skills_none=request.args.getlist('not_skill'),
+            min_score=request.args.get('min_score', type=float),
+            max_score=request.args.get('max_score', type=float),
+            limit=request.args.get('limit', 50, type=int),
+            offset=request.args.get('offset', 0, type=int),
+        )
+        return jsonify({"status": "success", **found})
+    except InvalidQuery as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error searching analyses: {e}")
+        return jsonify({"error": "Could not search analyses"}), 500
+
+@app.route('/api/analyses/skills', methods=['GET'])
+def query_skills():
+    """
+    Boolean skill query over stored analyses: ?q=aws AND docker AND NOT php&limit=20&min_score=70.
+
+    Answered from the in-memory skill bitmap index; needs the analysis store and X-Admin-Token.
+    """
+    if skill_index is None:
+        return jsonify({"error": "The analysis store is disabled (ANALYSIS_STORE_ENABLED)."}), 404
+    if not is_admin_request():
+        return jsonify({"error": "A valid X-Admin-Token is required."}), 403
+    try:
+        found = skill_index.query(request.args.get('q', ''),
+                                  limit=max(1, min(request.args.get('limit', 50, type=int), 500)),
+                                  min_score=request.args.get('min_score', type=float))
+        summaries = analysis_store.summaries(result["id"] for result in found["results"])
+        found["results"] = [summaries.get(result["id"], result) for result in found["results"]]
+        return jsonify({"status": "success", **found})
+    except InvalidSkillQuery as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error querying skills: {e}")
+        return jsonify({"error": "Could not query skills"}), 500
+
+@app.route('/api/match', methods=['POST'])
+def match_job_description():
+    """
+    Rank stored resumes against a job description - JD ke against resumes rank karte hain.
+
+    JSON body: {"job_description": "...", "limit": 20, "require_all": false}. Needs the analysis
+    store and X-Admin-Token.
+    """
+    if job_matcher is None:
+        return jsonify({"error": "The analysis store is disabled (ANALYSIS_STORE_ENABLED)."}), 404
+    if not is_admin_request():
+        return jsonify({"error": "A valid X-Admin-Token is required."}), 403
+    payload = request.get_json(silent=True) or {}
+    job_description = payload.get("job_description", "")
+    if not isinstance(job_description, str) or not job_description.strip():
+        return jsonify({"error": "No job description provided"}), 400
+    try:
+        limit = max(1, min(int(payload.get("limit", 20)), 500))
+        with stage('match'):
+            found = job_matcher.match(job_description, limit=limit, require_all=bool(payload.get("require_all")))
+        summaries = analysis_store.summaries(result["id"] for result in found["results"])
+        required = set(found["skills"]["required"])
+        for result in found["results"]:
+            summary = summaries.get(result["id"])
+            if summary is None:
+                continue
+            listed = {skill.lower() for skill_list in summary["skills"].values() for skill in skill_list}
+            result.update(file_name=summary["file_name"], score=summary["score"],
+                          matched_required=sorted(required & listed), missing_required=sorted(required - listed))
+        return jsonify({"status": "success", **found})
+    except Exception as e:
+        logger.error(f"Error matching job description: {e}")
+        return jsonify({"error": "Could not match the job description"}), 500
+
+@app.route('/api/analyses/<int:analysis_id>', methods=['GET'])
+def get_analysis(analysis_id):
+    """One stored analysis, as /analyze returned it, plus the near-duplicate uploads that reused it."""
+    if analysis_store is None:
+        return jsonify({"error": "The analysis store is disabled (ANALYSIS_STORE_ENABLED)."}), 404
+    if not is_admin_request():
+        return jsonify({"error": "A valid X-Admin-Token is required."}), 403
+    analysis = analysis_store.get(analysis_id)
+    if analysis is None:
+        return jsonify({"error": "Analysis not found"}), 404
+    return jsonify({**analysis, "duplicates": analysis_store.duplicates(analysis_id)})
+
+@app.route('/api/analyses/<int:analysis_id>/similar', methods=['GET'])
+def similar_analyses(analysis_id):
+    """Stored resumes most similar to one analysis - Similar candidates dhoondte hain."""
+    if similarity_index is None:
+        return jsonify({"error": "The analysis store is disabled (ANALYSIS_STORE_ENABLED)."}), 404
+    if not is_admin_request():
+        return jsonify({"error": "A valid X-Admin-Token is required."}), 403
+    try:
+        limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+        with stage('similar'):
+            found = similarity_index.similar(analysis_id, limit=limit)
+        if found is None:
+            return jsonify({"error": "Analysis not found"}), 404
+        summaries = analysis_store.summaries(result["id"] for result in found["results"])
+        for result in found["results"]:
+            summary = summaries.get(result["id"])
+            if summary is not None:
+                result.update(file_name=summary["file_name"], score=summary["score"])
+        return jsonify({"status": "success", **found})
+    except Exception as e:
+        logger.error(f"Error finding similar analyses: {e}")
+        return jsonify({"error": "Could not find similar analyses"}), 500
+
+@app.route('/stats/memory', methods=['GET'])
+def get_memory_stats():
+    """Per-worker RSS/PSS/USS, showing how much memory the workers share."""
+    try:
+        return jsonify({"status": "success", "memory": worker_memory_report()})
+    except Exception as e:
+        logger.error(f"Error getting memory stats: {e}")
+        return jsonify({"error": "Could not retrieve memory statistics"}), 500
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Per-stage latency histograms, input sizes, cache and error counters for every worker, in Prometheus text format."""
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/profile/flamegraph', methods=['GET'])
+def profile_flamegraph():
+    """Collapsed stacks from the always-on sampler in every worker, ready for flamegraph.pl or speedscope."""
+    if not is_admin_request():
+        return jsonify({"error": "A valid X-Admin-Token is required."}), 403
+    return Response(sampler.collapsed_stacks(), mimetype='text/plain')
+
 @app.route('/favicon.ico')
 def favicon():
     """Serve favicon."""
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Benchmark every analysis stage against a reproducible synthetic resume corpus.
+
+The corpus (PDFs and DOCXs of different lengths, two-column and table-heavy layouts,
+image-only pages and keyword-dense text) is generated from a fixed seed, each stage is
+timed separately plus the end-to-end pipeline, and the medians are compared with a
+saved JSON baseline. Optimized code paths are also checked against the legacy functions
+they replace, so a speed-up that changes the output fails the run.
+
+Usage:
+    python benchmark.py --save-baseline          # record benchmarks/baseline.json
+    python benchmark.py                          # compare with it, exit 1 on regression
+    python benchmark.py --threshold 0.15 --stage-threshold extract_pdf=0.5
+    python benchmark.py --equivalence-only
+    python benchmark.py --import-time-only       # fail if `import app` exceeds IMPORT_TIME_BUDGET
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+
+# The benchmark must not fill var/slow_requests with its own runs
+os.environ.setdefault('SLOW_CAPTURE_ENABLED', 'false')
+# nor write its corpus into the analysis store, whose co-occurrence model would also change
+# skill_recommendations away from the fixed list the legacy reference returns. Pipeline runs
+# also pass store=False, so they leave the score sketches and fleet counters alone
+os.environ['ANALYSIS_STORE_ENABLED'] = 'false'
+
+from docx import Document
+from fpdf import FPDF
+from PIL import Image, ImageDraw
+
+from parser.resume_parser import extract_text_from_pdf, extract_text_from_docx, extract_basic_info
+from utils.skill_classifier import classify_skills_enhanced
+from utils.section_extractor import extract_sections
+from utils.scoring import score_resume, WEIGHTS
+from utils.feedback import generate_enhanced_feedback
+from utils.report_generator import generate_pdf_report
+from utils.pipeline import analyze_file, analyze_text, extract_text, ExtractionError, DocumentRejected
+from utils.preflight import preflight, PreflightRejected
+import skill_classifier as legacy_skill_classifier
+
+# Bump when the generated documents change, so old baselines are not compared with new ones
+CORPUS_VERSION = 1
+DEFAULT_SEED = 1337
+DEFAULT_CORPUS_DIR = os.path.join('var', 'benchmark_corpus')
+DEFAULT_BASELINE = os.path.join('benchmarks', 'baseline.json')
+# Slowdowns smaller than this are treated as noise whatever the relative threshold says
+MIN_REGRESSION_SECONDS = 0.005
+# Cold `import app` must stay cheap: heavy dependencies are loaded lazily (utils/lazy_imports.py)
+IMPORT_TIME_BUDGET = float(os.environ.get('IMPORT_TIME_BUDGET', '0.5'))
+
+FIRST_NAMES = ["Aarav", "Priya", "Rohan", "Ananya", "Vikram", "Sneha", "Arjun", "Kavya", "Rahul", "Isha"]
+LAST_NAMES = ["Sharma", "Verma", "Iyer", "Patel", "Reddy", "Gupta", "Nair", "Mehta", "Joshi", "Rao"]
+COMPANIES = ["Infosys", "TCS", "Wipro", "Flipkart", "Zomato", "Razorpay", "Freshworks", "Swiggy"]
+ROLES = ["Software Engineer", "Data Analyst", "Backend Developer", "ML Engineer", "DevOps Engineer"]
+VERBS = ["Developed", "Led", "Designed", "Implemented", "Optimized", "Built", "Automated", "Migrated"]
+OBJECTS = ["a REST API", "the data pipeline", "a recommendation service", "CI/CD workflows",
+           "the reporting dashboard", "a microservice", "the search backend", "ETL jobs"]
+OUTCOMES = ["reducing latency by {n}%", "serving {n}k users", "cutting costs by {n}%",
+            "improving accuracy by {n}%", "saving {n} hours per week", "for {n} enterprise clients"]
+SKILLS = ["Python", "Java", "JavaScript", "TypeScript", "Go", "SQL", "PostgreSQL", "MongoDB", "Redis",
+          "React", "Angular", "Node.js", "Django", "Flask", "FastAPI", "Docker", "Kubernetes", "AWS",
+          "Azure", "GCP", "Terraform", "Jenkins", "Git", "Pandas", "NumPy", "TensorFlow", "PyTorch",
+          "Scikit-learn", "Tableau", "Power BI", "Linux", "Bash", "Jira", "Figma"]
+FILLER = ["collaborated with cross-functional teams", "participated in code reviews",
+          "wrote technical documentation", "mentored interns", "presented results to stakeholders"]
+
+
+# --- Corpus generation --- Synthetic resumes banate hain
+
+def _bullet(rng):
+    outcome = rng.choice(OUTCOMES).format(n=rng.randint(5, 95))
+    return f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)}, {outcome}."
+
+
+def _resume_lines(rng, jobs, bullets_per_job, keyword_dense=False):
+    """Plain-text resume as a list of (kind, text) lines; kind is 'heading' or 'body'."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [
+        ("heading", name),
+        ("body", f"{name.split()[0].lower()}.{rng.randint(10, 99)}@example.com | +91 98{rng.randint(10000000, 99999999)}"),
+        ("heading", "Summary"),
+        ("body", f"{rng.choice(ROLES)} with {rng.randint(1, 12)} years of experience; {rng.choice(FILLER)}."),
+        ("heading", "Experience"),
+    ]
+    for _ in range(jobs):
+        lines.append(("body", f"{rng.choice(ROLES)} - {rng.choice(COMPANIES)} ({rng.randint(2012, 2020)} - {rng.randint(2021, 2025)})"))
+        for _ in range(bullets_per_job):
+            lines.append(("body", "- " + _bullet(rng)))
+    lines += [
+        ("heading", "Education"),
+        ("body", f"B.Tech in Computer Science, {rng.choice(['IIT Delhi', 'NIT Trichy', 'BITS Pilani', 'VIT Vellore'])}, {rng.randint(2010, 2020)}"),
+        ("heading", "Skills"),
+    ]
+    skill_lines = 12 if keyword_dense else 1
+    for _ in range(skill_lines):
+        lines.append(("body", ", ".join(rng.sample(SKILLS, 20 if keyword_dense else 10))))
+    lines += [("heading", "Projects"), ("body", "- " + _bullet(rng))]
+    return lines
+
+
+def _new_pdf():
+    pdf = FPDF()
+    pdf.set_creation_date(datetime(2024, 1, 1))
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.add_page()
+    pdf.set_font('Helvetica', '', 10)
+    return pdf
+
+
+def _write_pdf_lines(pdf, lines, width=0):
+    for kind, text in lines:
+        pdf.set_font('Helvetica', 'B' if kind == "heading" else '', 12 if kind == "heading" else 10)
+        pdf.multi_cell(width, 5, text, new_x="LEFT", new_y="NEXT")
+
+
+def build_pdf(path, rng, layout, pages=1, keyword_dense=False):
+    """Write one synthetic PDF; layout is 'single', 'two_column', 'tables' or 'image_only'."""
+    pdf = _new_pdf()
+    if layout == "image_only":
+        # A scanned resume: every page is one raster image with no text layer
+        for page in range(pages):
+            if page:
+                pdf.add_page()
+            image = Image.new("L", (850, 1100), 255)
+            draw = ImageDraw.Draw(image)
+            for row, (_, text) in enumerate(_resume_lines(rng, 2, 3)[:40]):
+                draw.text((40, 40 + row * 24), text, fill=0)
+            pdf.image(image, x=10, y=10, w=190)
+    elif layout == "two_column":
+        for page in range(pages):
+            if page:
+                pdf.add_page()
+            lines = _resume_lines(rng, 2, 3, keyword_dense)
+            half = len(lines) // 2
+            for column, chunk in ((10, lines[:half]), (110, lines[half:])):
+                pdf.set_xy(column, 15)
+                pdf.set_left_margin(column)
+                _write_pdf_lines(pdf, chunk, width=90)
+            pdf.set_left_margin(10)
+    elif layout == "tables":
+        _write_pdf_lines(pdf, _resume_lines(rng, 1, 2, keyword_dense)[:5])
+        for page in range(pages):
+            if page:
+                pdf.add_page()
+            pdf.set_font('Helvetica', '', 8)
+            for _ in range(20):
+                row = [rng.choice(COMPANIES), rng.choice(ROLES), rng.choice(SKILLS), f"{rng.randint(1, 9)} yrs"]
+                for cell in row:
+                    pdf.cell(45, 6, cell, border=1)
+                pdf.ln()
+    else:
+        jobs = max(1, pages * 3)
+        _write_pdf_lines(pdf, _resume_lines(rng, jobs, 6, keyword_dense))
+    pdf.output(path)
+
+
+def build_docx(path, rng, jobs=2, tables=False, keyword_dense=False):
+    """Write one synthetic DOCX, optionally with the experience laid out as a table."""
+    doc = Document()
+    doc.core_properties.created = datetime(2024, 1, 1)
+    for kind, text in _resume_lines(rng, jobs, 5, keyword_dense):
+        if kind == "heading":
+            doc.add_heading(text, level=1)
+        else:
+            doc.add_paragraph(text)
+    if tables:
+        table = doc.add_table(rows=1, cols=4)
+        for cell, title in zip(table.rows[0].cells, ["Company", "Role", "Stack", "Years"]):
+            cell.text = title
+        for _ in range(jobs * 8):
+            cells = table.add_row().cells
+            for cell, value in zip(cells, [rng.choice(COMPANIES), rng.choice(ROLES), rng.choice(SKILLS), str(rng.randint(1, 9))]):
+                cell.text = value
+    doc.save(path)
+
+
+CORPUS = [
+    # (file name, builder, kwargs)
+    ("short.pdf", build_pdf, {"layout": "single", "pages": 1}),
+    ("long.pdf", build_pdf, {"layout": "single", "pages": 6}),
+    ("two_column.pdf", build_pdf, {"layout": "two_column", "pages": 2}),
+    ("tables.pdf", build_pdf, {"layout": "tables", "pages": 3}),
+    ("image_only.pdf", build_pdf, {"layout": "image_only", "pages": 2}),
+    ("keyword_dense.pdf", build_pdf, {"layout": "single", "pages": 2, "keyword_dense": True}),
+    ("short.docx", build_docx, {"jobs": 1}),
+    ("long.docx", build_docx, {"jobs": 10}),
+    ("tables.docx", build_docx, {"jobs": 3, "tables": True}),
+    ("keyword_dense.docx", build_docx, {"jobs": 2, "keyword_dense": True}),
+]
+
+
+def generate_corpus(directory=DEFAULT_CORPUS_DIR, seed=DEFAULT_SEED):
+    """(Re)build the corpus; every document gets its own RNG so the set can grow without reshuffling."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index, (name, builder, kwargs) in enumerate(CORPUS):
+        path = os.path.join(directory, name)
+        builder(path, random.Random(seed * 1000 + index), **kwargs)
+        paths.append(path)
+    return paths
+
+
+# --- Equivalence checks --- Optimized aur legacy output same hona chahiye
+
+def legacy_analyze_text(text):
+    """
+    The analysis as app.py computed it before the stages moved into utils/pipeline.py, plus the
+    keys the response gained since (score breakdown, skill recommendations), taken from the same
+    legacy stage outputs.
+    """
+    skills_data = legacy_skill_classifier.classify_skills_enhanced(text)
+    sections = extract_sections(text)
+    score_data = score_resume(sections, WEIGHTS, text)
+    return {
+        "skills": skills_data["skills_by_category"],
+        "score": score_data["overall_score"],
+        "score_breakdown": score_data["breakdown"],
+        "feedback": generate_enhanced_feedback(sections, score_data, text),
+        "skill_recommendations": skills_data["recommendations"],
+        "sections_found": sections,
+    }
+
+
+def legacy_extract_text(path, file_extension):
+    if file_extension == 'pdf':
+        return extract_text_from_pdf(path)
+    return extract_text_from_docx(path)
+
+
+def routed_extract_text(path, file_extension):
+    """The pipeline's extraction, with a preflight rejection standing for legacy's empty result."""
+    try:
+        return extract_text(path, file_extension, {})
+    except DocumentRejected:
+        return ""
+
+
+# (name, optimized, legacy); each is called with (path, file_extension) and must return equal values
+EQUIVALENCE_CHECKS = [
+    ("extract_text", routed_extract_text, lambda path, ext: legacy_extract_text(path, ext) or ""),
+    ("analyze_text",
+     lambda path, ext: analyze_text(legacy_extract_text(path, ext) or ""),
+     lambda path, ext: legacy_analyze_text(legacy_extract_text(path, ext) or "")),
+]
+
+
+def _first_difference(a, b, where="$"):
+    """Path of the first place two JSON-like values differ, or None."""
+    if isinstance(a, dict) and isinstance(b, dict):
+        for key in sorted(set(a) | set(b), key=str):
+            if key not in a or key not in b:
+                return f"{where}.{key} (missing on one side)"
+            found = _first_difference(a[key], b[key], f"{where}.{key}")
+            if found:
+                return found
+        return None
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        if len(a) != len(b):
+            return f"{where} (length {len(a)} != {len(b)})"
+        for index, (x, y) in enumerate(zip(a, b)):
+            found = _first_difference(x, y, f"{where}[{index}]")
+            if found:
+                return found
+        return None
+    return None if a == b else f"{where} ({a!r} != {b!r})"
+
+
+def check_equivalence(paths):
+    """Run every equivalence check on every document; returns a list of failure messages."""
+    failures = []
+    for name, optimized, legacy in EQUIVALENCE_CHECKS:
+        for path in paths:
+            ext = path.rsplit('.', 1)[1].lower()
+            difference = _first_difference(optimized(path, ext), legacy(path, ext))
+            if difference:
+                failures.append(f"{name} on {os.path.basename(path)}: {difference}")
+    return failures
+
+
+# --- Import time --- Cold start ka budget
+
+def measure_import_time(module='app', runs=3):
+    """Best wall time of importing `module` in a fresh interpreter, in seconds."""
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    times = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+# --- Timing --- Har stage ka time measure karte hain
+
+def _prepare(paths):
+    """Inputs for the text-level stages, computed once outside the timed loops."""
+    pdfs = [p for p in paths if p.endswith('.pdf')]
+    docxs = [p for p in paths if p.endswith('.docx')]
+    texts = [t for t in (legacy_extract_text(p, p.rsplit('.', 1)[1]) for p in paths) if t]
+    sections = [extract_sections(t) for t in texts]
+    scores = [score_resume(s, WEIGHTS, t) for s, t in zip(sections, texts)]
+    reports = []
+    for path in paths:
+        try:
+            reports.append(analyze_file(path, os.path.basename(path), store=False))
+        except ExtractionError:
+            pass
+    return pdfs, docxs, texts, sections, scores, reports
+
+
+def _run_pipeline(paths):
+    for path in paths:
+        try:
+            analyze_file(path, os.path.basename(path), store=False)
+        except ExtractionError:
+            pass  # The image-only PDFs, rejected by preflight
+
+
+def _run_preflight(paths):
+    for path in paths:
+        try:
+            preflight(path, path.rsplit('.', 1)[1].lower())
+        except PreflightRejected:
+            pass
+
+
+def stage_benchmarks(paths):
+    """Name -> zero-argument callable that runs that stage over the whole corpus."""
+    pdfs, docxs, texts, sections, scores, reports = _prepare(paths)
+    return {
+        "preflight": lambda: _run_preflight(paths),
+        "extract_pdf": lambda: [extract_text_from_pdf(p) for p in pdfs],
+        "extract_docx": lambda: [extract_text_from_docx(p) for p in docxs],
+        "extract_basic_info": lambda: [extract_basic_info(t) for t in texts],
+        "classify_skills": lambda: [classify_skills_enhanced(t) for t in texts],
+        "extract_sections": lambda: [extract_sections(t) for t in texts],
+        "score": lambda: [score_resume(s, WEIGHTS, t) for s, t in zip(sections, texts)],
+        "feedback": lambda: [generate_enhanced_feedback(s, d, t) for s, d, t in zip(sections, scores, texts)],
+        "report": lambda: [generate_pdf_report(r) for r in reports],
+        "pipeline": lambda: _run_pipeline(paths),
+    }
+
+
+def run_benchmarks(paths, rounds):
+    """Time each stage `rounds` times after one untimed warm-up pass."""
+    results = {}
+    for name, func in stage_benchmarks(paths).items():
+        func()
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+        results[name] = {
+            "median_seconds": round(statistics.median(samples), 6),
+            "min_seconds": round(min(samples), 6),
+            "max_seconds": round(max(samples), 6),
+        }
+    return results
+
+
+def compare(results, baseline, threshold, stage_thresholds):
+    """Return a list of regression messages for stages slower than the baseline allows."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline["stages"].get(name)
+        if previous is None:
+            continue
+        allowed = previous["median_seconds"] * (1 + stage_thresholds.get(name, threshold))
+        slower_by = current["median_seconds"] - previous["median_seconds"]
+        if current["median_seconds"] > allowed and slower_by > MIN_REGRESSION_SECONDS:
+            regressions.append(f"{name}: {current['median_seconds']:.4f}s vs baseline "
+                               f"{previous['median_seconds']:.4f}s (+{slower_by / previous['median_seconds']:.0%})")
+    return regressions
+
+
+def print_section(title, icon=""):
+    """Prints a formatted section header - Section header ko format karke print karte hain."""
+    header = f" {icon} {title} " if icon else f" {title} "
+    print("\n" + "="*20 + header + "="*20)
+
+
+def _parse_stage_thresholds(values):
+    thresholds = {}
+    for value in values:
+        name, _, limit = value.partition('=')
+        thresholds[name] = float(limit)
+    return thresholds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis stages on a synthetic resume corpus.")
+    parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--rounds", type=int, default=5, help="timed passes per stage")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare with or save to")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", help="also write this run's results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown per stage")
+    parser.add_argument("--stage-threshold", action="append", default=[], metavar="STAGE=FRACTION",
+                        help="override the threshold for one stage")
+    parser.add_argument("--equivalence-only", action="store_true", help="skip timing")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_TIME_BUDGET, help="seconds allowed for `import app`")
+    parser.add_argument("--import-time-only", action="store_true", help="only check the import-time budget")
+    args = parser.parse_args()
+    # image_only.pdf logs the same extraction warnings on every pass
+    logging.disable(logging.WARNING)
+
+    print_section("Import time", "🧊")
+    import_seconds = measure_import_time()
+    over_budget = import_seconds > args.import_budget
+    print(f"  {'❌' if over_budget else '✅'} import app: {import_seconds:.3f}s (budget {args.import_budget:.3f}s)")
+    if args.import_time_only:
+        return 1 if over_budget else 0
+
+    paths = generate_corpus(args.corpus_dir, args.seed)
+    print(f"📄 Generated {len(paths)} documents in {args.corpus_dir} (seed {args.seed})")
+
+    print_section("Equivalence", "🟰")
+    failures = check_equivalence(paths)
+    for failure in failures:
+        print(f"  ❌ {failure}")
+    if not failures:
+        print(f"  ✅ {len(EQUIVALENCE_CHECKS)} checks match the legacy functions on every document")
+    if args.equivalence_only:
+        return 1 if failures else 0
+
+    print_section("Stage timings", "⏱️")
+    results = run_benchmarks(paths, args.rounds)
+    for name, timing in results.items():
+        print(f"  {name:<20} median {timing['median_seconds']:.4f}s  min {timing['min_seconds']:.4f}s")
+
+    run = {
+        "created": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "corpus": {"version": CORPUS_VERSION, "seed": args.seed, "documents": len(paths)},
+        "rounds": args.rounds,
+        "stages": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=2)
+
+    regressions = []
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print_section("Regression gate", "🚦")
+        if baseline.get("corpus") != run["corpus"]:
+            print(f"  ⚠️  Baseline was recorded on a different corpus {baseline.get('corpus')}; re-record it")
+        else:
+            regressions = compare(results, baseline, args.threshold, _parse_stage_thresholds(args.stage_threshold))
+            for regression in regressions:
+                print(f"  ❌ {regression}")
+            if not regressions:
+                print(f"  ✅ No stage is more than {args.threshold:.0%} slower than the baseline")
+    else:
+        print(f"\n⚠️  No baseline at {args.baseline}; run with --save-baseline to record one")
+
+    return 1 if failures or regressions or over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -236,6 +236,10 @@ def run_tests():
     except OSError:
         print("❌ spaCy model not found")
         return False
+
+    # Cold start budget: heavy dependencies must stay lazily imported
+    if run_command(f"{sys.executable} benchmark.py --import-time-only", "Checking import-time budget") is None:
+        return False
     
     print("✅ All tests passed")
     return True
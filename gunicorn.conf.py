@@ -8,6 +8,18 @@ bind = f"0.0.0.0:{port}"
 workers = 4
 worker_class = "sync"
 worker_connections = 1000
+
+# Hybrid serving: threaded workers accept and stream uploads concurrently while the CPU-heavy
+# analysis stages run on a fixed-size, pre-forked process pool inside each worker.
+serving_mode = os.environ.get("SERVING_MODE", "sync").lower()
+if serving_mode == "hybrid":
+    workers = int(os.environ.get("WEB_WORKERS", "2"))
+    worker_class = "gthread"
+    threads = int(os.environ.get("GUNICORN_THREADS", "16"))
+# Every worker owns its own analysis pool (hybrid /analyze, and /analyze/batch in either mode), so
+# split the cores between the workers' pools unless told otherwise: N workers x cpu_count processes
+# would oversubscribe the host exactly when batches arrive
+os.environ.setdefault("ANALYSIS_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) // workers)))
 timeout = 120
 keepalive = 2
 max_requests = 1000
@@ -18,3 +30,47 @@ accesslog = "-"
 errorlog = "-"
 loglevel = "info"
 capture_output = True
+
+# Warm every stage in the master before forking so workers share the loaded models copy-on-write
+preload_warmup = os.environ.get("PRELOAD_WARMUP", "true").lower() == "true"
+
+
+def on_starting(server):
+    """Runs once in the master before the app is loaded."""
+    # Start /metrics and the flamegraph from zero instead of summing files left by the previous run
+    from utils.metrics import registry
+    from utils.sampler import sampler
+    registry.clear_directory()
+    sampler.clear_directory()
+
+
+def when_ready(server):
+    """Runs in the master after the app is preloaded and before any worker is forked."""
+    if preload_app and preload_warmup:
+        from utils.warmup import warm_up
+        warm_up()
+
+
+def post_fork(server, worker):
+    """Runs in each worker right after fork, while it is still single-threaded."""
+    from utils.process_pool import ANALYSIS_OFFLOAD
+    from utils.extractor_pool import extractor_pool, EXTRACTOR_POOL_ENABLED
+    # Extractors belong to whichever process runs the analyses: this worker, or its pool processes
+    if EXTRACTOR_POOL_ENABLED and not ANALYSIS_OFFLOAD:
+        extractor_pool.start()
+    if serving_mode == "hybrid":
+        from utils.process_pool import start_pool
+        start_pool()
+
+
+def worker_exit(server, worker):
+    from utils.process_pool import shutdown_pool
+    from utils.extractor_pool import extractor_pool
+    from utils.score_distribution import score_distribution
+    from utils.fleet_stats import fleet_stats
+    shutdown_pool(wait=False)
+    extractor_pool.shutdown()
+    if score_distribution is not None:
+        score_distribution.flush(force=True)
+    if fleet_stats is not None:
+        fleet_stats.flush(force=True)
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Drive the app over HTTP to size gunicorn from measurements instead of guesswork.
+
+Each worker configuration is started as a local gunicorn server (or --url targets one that
+is already running), loaded either by N concurrent clients uploading resumes from a local
+corpus, or by replaying the request pattern recorded in app.log's before_request lines.
+Throughput, p50/p95/p99 latency and error rate are reported per configuration.
+
+Usage:
+    python loadtest.py --configs sync:2,sync:4,hybrid:2x16 --concurrency 16 --duration 30
+    python loadtest.py --replay logs/app.log --speed 5 --configs sync:4
+    python loadtest.py --url http://127.0.0.1:5001 --requests 200 --mix 50,30,20
+"""
+
+import io
+import os
+import math
+import sys
+import json
+import time
+import uuid
+import random
+import socket
+import zipfile
+import argparse
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CORPUS_DIR = os.path.join('var', 'benchmark_corpus')
+DEFAULT_LOG = os.path.join('logs', 'app.log')
+# app.py logs as "app" under gunicorn and as "__main__" when run directly (as in the sample app.log)
+APP_LOGGERS = ('app', '__main__')
+TEXT_LOG_TIME_FORMAT = '%Y-%m-%d %H:%M:%S,%f'
+HTTP_METHODS = ('GET', 'POST', 'PUT', 'DELETE', 'HEAD', 'OPTIONS', 'PATCH')
+REQUEST_TIMEOUT = 180  # Longer than gunicorn's timeout, so worker kills show up as 5xx, not client timeouts
+
+
+# --- Corpus --- Upload ke liye local files
+
+def load_corpus(directory):
+    """Read every PDF/DOCX in the corpus, generating the benchmark corpus if the directory is empty."""
+    if not os.path.isdir(directory) or not os.listdir(directory):
+        from benchmark import generate_corpus
+        generate_corpus(directory)
+    documents = []
+    for name in sorted(os.listdir(directory)):
+        if name.rsplit('.', 1)[-1].lower() in ('pdf', 'docx'):
+            with open(os.path.join(directory, name), 'rb') as f:
+                documents.append((name, f.read()))
+    if not documents:
+        raise SystemExit(f"❌ No PDF or DOCX files in {directory}")
+    return documents
+
+
+class UploadMix:
+    """
+    Pick uploads from the corpus split into small/medium/large thirds by size.
+
+    The weights give the share of requests drawn from each third, so a mix of 60,30,10 mostly
+    sends short resumes with the occasional long one.
+    """
+
+    def __init__(self, documents, weights, unique=True, seed=0):
+        ordered = sorted(documents, key=lambda doc: len(doc[1]))
+        third = max(1, len(ordered) // 3)
+        bands = [ordered[:third], ordered[third:2 * third], ordered[2 * third:]]
+        self.bands = [(band, weight) for band, weight in zip(bands, weights) if band and weight > 0]
+        self.unique = unique
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def pick(self):
+        with self._lock:
+            band = self._rng.choices([b for b, _ in self.bands], [w for _, w in self.bands])[0]
+            name, data = self._rng.choice(band)
+        # The analysis cache would answer repeated bytes without running any stage
+        return name, make_unique(name, data) if self.unique else data
+
+
+def make_unique(name, data):
+    """Change the bytes (and so the cache key) of a document without changing its text."""
+    nonce = uuid.uuid4().hex
+    if name.lower().endswith('.pdf'):
+        return data + f"\n%loadtest {nonce}\n".encode()
+    buffer = io.BytesIO(data)
+    with zipfile.ZipFile(buffer, 'a') as archive:
+        archive.writestr(f"customXml/loadtest-{nonce}.txt", nonce)
+    return buffer.getvalue()
+
+
+# --- HTTP --- Stdlib HTTP client
+
+def _multipart(fields):
+    """Encode [(field, filename, bytes)] as multipart/form-data; returns (body, content type)."""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for field, filename, data in fields:
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                     f'Content-Type: application/octet-stream\r\n\r\n'.encode() + data + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def send(base_url, method, path, body=None, content_type=None):
+    """Make one request; returns (status or None, seconds, bytes read)."""
+    req = urllib.request.Request(base_url + path, data=body, method=method)
+    if content_type:
+        req.add_header('Content-Type', content_type)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT) as response:
+            size = len(response.read())
+            status = response.status
+    except urllib.error.HTTPError as e:
+        size = len(e.read())
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status, size = None, 0
+    return status, time.perf_counter() - start, size
+
+
+class RequestFactory:
+    """Turn a (method, path) into a request body, using the corpus for uploads."""
+
+    def __init__(self, mix):
+        self.mix = mix
+        self._report_payload = None
+
+    def build(self, method, path):
+        if method == 'POST' and path == '/analyze':
+            name, data = self.mix.pick()
+            return _multipart([('resume_file', name, data)])
+        if method == 'POST' and path == '/analyze/batch':
+            return _multipart([('resume_files', *self.mix.pick()) for _ in range(3)])
+        if method == 'POST' and path == '/api/generate-report':
+            return json.dumps(self.report_payload()).encode(), 'application/json'
+        if method in ('GET', 'HEAD'):
+            return None, None
+        return None
+
+    def report_payload(self):
+        """A realistic analysis result for /api/generate-report, taken from the pipeline once."""
+        if self._report_payload is None:
+            from utils.pipeline import analyze_file, ExtractionError
+            os.makedirs('var', exist_ok=True)
+            for name, data in sorted((doc for band, _ in self.mix.bands for doc in band), key=lambda doc: len(doc[1])):
+                path = os.path.join('var', f"loadtest-{name}")
+                with open(path, 'wb') as f:
+                    f.write(data)
+                try:
+                    self._report_payload = analyze_file(path, name)
+                    break
+                except ExtractionError:
+                    continue
+                finally:
+                    os.remove(path)
+        return self._report_payload
+
+
+# --- Workloads --- Closed-loop aur replay
+
+def closed_loop(base_url, factory, concurrency, duration, total_requests):
+    """`concurrency` clients each send the next /analyze upload as soon as the last one returns."""
+    results = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration if duration else None
+    sent = [0]
+
+    def client():
+        while True:
+            with lock:
+                if total_requests and sent[0] >= total_requests:
+                    return
+                sent[0] += 1
+            if deadline and time.monotonic() >= deadline:
+                return
+            body, content_type = factory.build('POST', '/analyze')
+            result = send(base_url, 'POST', '/analyze', body, content_type)
+            with lock:
+                results.append(('POST /analyze',) + result)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def parse_log(path):
+    """Yield (datetime, method, path) for every before_request line in a text or JSON app.log."""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('{'):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("logger") not in APP_LOGGERS:
+                    continue
+                stamp, message = entry.get("time", ""), entry.get("message", "")
+            else:
+                parts = line.split(' - ', 3)
+                if len(parts) < 4 or parts[1] not in APP_LOGGERS or parts[2] != 'INFO':
+                    continue
+                stamp, message = parts[0], parts[3]
+            fields = message.split(' ')
+            # "POST /analyze - 127.0.0.1"
+            if len(fields) != 4 or fields[0] not in HTTP_METHODS or fields[2] != '-':
+                continue
+            try:
+                when = datetime.strptime(stamp, TEXT_LOG_TIME_FORMAT)
+            except ValueError:
+                continue
+            yield when, fields[0], fields[1]
+
+
+def replay(base_url, factory, recorded, concurrency, speed):
+    """Send the recorded requests at their original spacing divided by `speed` (open loop)."""
+    results = []
+    lock = threading.Lock()
+    skipped = 0
+    start_recorded = recorded[0][0]
+
+    def run(label, method, path, body, content_type):
+        result = send(base_url, method, path, body, content_type)
+        with lock:
+            results.append((label,) + result)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.monotonic()
+        for when, method, path in recorded:
+            built = factory.build(method, path)
+            if built is None:
+                skipped += 1
+                continue
+            delay = (when - start_recorded).total_seconds() / speed - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(run, f"{method} {path}", method, path, *built)
+    if skipped:
+        print(f"  ⚠️  Skipped {skipped} requests that cannot be replayed (no body to send)")
+    return results
+
+
+# --- Reporting --- Throughput aur latency percentiles
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(results, wall_seconds):
+    """Totals for one run; errors are transport failures and 5xx, 4xx are counted separately."""
+    latencies = sorted(seconds for _, status, seconds, _ in results if status is not None)
+    errors = sum(1 for _, status, _, _ in results if status is None or status >= 500)
+    client_errors = sum(1 for _, status, _, _ in results if status is not None and 400 <= status < 500)
+    endpoints, statuses = {}, {}
+    for label, status, _, _ in results:
+        endpoints[label] = endpoints.get(label, 0) + 1
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "client_errors": client_errors,
+        "error_rate": round(errors / len(results), 4) if results else 0.0,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(len(results) / wall_seconds, 2) if wall_seconds else 0.0,
+        "p50_ms": _ms(percentile(latencies, 0.50)),
+        "p95_ms": _ms(percentile(latencies, 0.95)),
+        "p99_ms": _ms(percentile(latencies, 0.99)),
+        "max_ms": _ms(latencies[-1] if latencies else None),
+        "endpoints": endpoints,
+        "statuses": statuses,
+    }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+# --- Server configurations --- Har config ke liye gunicorn start karte hain
+
+def parse_config(spec):
+    """'sync:4' or 'hybrid:2x16' -> (mode, workers, threads)."""
+    mode, _, size = spec.partition(':')
+    workers, _, threads = size.partition('x')
+    if mode not in ('sync', 'hybrid') or not workers.isdigit() or (threads and not threads.isdigit()):
+        raise SystemExit(f"❌ Invalid config '{spec}'; use sync:WORKERS or hybrid:WORKERSxTHREADS")
+    return mode, int(workers), int(threads) if threads else None
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, workers, threads, timeout):
+    """Start gunicorn with gunicorn.conf.py and the given sizing; returns (process, base URL)."""
+    port = _free_port()
+    env = dict(os.environ, PORT=str(port), SERVING_MODE=mode)
+    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app', '--timeout', str(timeout)]
+    if mode == 'hybrid':
+        env['WEB_WORKERS'] = str(workers)
+        if threads:
+            env['GUNICORN_THREADS'] = str(threads)
+    else:
+        command += ['--workers', str(workers)]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"❌ gunicorn exited with code {process.returncode} while starting")
+        if send(base_url, 'GET', '/health')[0] == 200:
+            return process, base_url
+        time.sleep(0.25)
+    process.terminate()
+    raise SystemExit("❌ gunicorn did not become healthy within 60s")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def print_section(title, icon=""):
+    """Prints a formatted section header - Section header ko format karke print karte hain."""
+    header = f" {icon} {title} " if icon else f" {title} "
+    print("\n" + "="*20 + header + "="*20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the analyzer over HTTP for several worker configurations.")
+    parser.add_argument("--configs", default="sync:4", help="comma-separated sync:WORKERS or hybrid:WORKERSxTHREADS")
+    parser.add_argument("--url", help="load an already running server instead of starting gunicorn")
+    parser.add_argument("--timeout", type=int, default=120, help="gunicorn worker timeout for started servers")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients (max in flight when replaying)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per closed-loop run (0 = use --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="stop a closed-loop run after this many requests")
+    parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--mix", default="60,30,10", help="share of small,medium,large uploads")
+    parser.add_argument("--cache-hits", action="store_true", help="send identical bytes so repeats hit the analysis cache")
+    parser.add_argument("--replay", nargs='?', const=DEFAULT_LOG, help="replay before_request lines from this log")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed-up factor")
+    parser.add_argument("--output", help="write the per-configuration results to this JSON file")
+    args = parser.parse_args()
+
+    weights = [float(w) for w in args.mix.split(',')]
+    mix = UploadMix(load_corpus(args.corpus_dir), weights, unique=not args.cache_hits)
+    factory = RequestFactory(mix)
+    recorded = list(parse_log(args.replay)) if args.replay else None
+    if recorded is not None:
+        if not recorded:
+            raise SystemExit(f"❌ No before_request lines found in {args.replay}")
+        span = (recorded[-1][0] - recorded[0][0]).total_seconds()
+        print(f"📜 Replaying {len(recorded)} requests spanning {span:.0f}s at {args.speed}x")
+
+    configs = [("external", None, None)] if args.url else [parse_config(c) for c in args.configs.split(',')]
+    report = []
+    for mode, workers, threads in configs:
+        label = args.url or (f"{mode}:{workers}" + (f"x{threads}" if threads else ""))
+        print_section(label, "🚀")
+        process, base_url = (None, args.url) if args.url else start_server(mode, workers, threads, args.timeout)
+        try:
+            started = time.monotonic()
+            if recorded is not None:
+                results = replay(base_url, factory, recorded, args.concurrency, args.speed)
+            else:
+                results = closed_loop(base_url, factory, args.concurrency, args.duration, args.requests)
+            summary = summarize(results, time.monotonic() - started)
+        finally:
+            if process is not None:
+                stop_server(process)
+        summary["config"] = label
+        report.append(summary)
+        print(f"  {summary['requests']} requests in {summary['wall_seconds']}s -> {summary['throughput_rps']} req/s")
+        print(f"  latency p50 {summary['p50_ms']} ms  p95 {summary['p95_ms']} ms  p99 {summary['p99_ms']} ms  max {summary['max_ms']} ms")
+        print(f"  errors {summary['errors']} ({summary['error_rate']:.1%})  4xx {summary['client_errors']}  statuses {summary['statuses']}")
+
+    print_section("Summary", "📊")
+    print(f"  {'config':<16}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for row in report:
+        print(f"  {row['config']:<16}{row['throughput_rps']:>9}{str(row['p50_ms']):>10}"
+              f"{str(row['p95_ms']):>10}{str(row['p99_ms']):>10}{row['error_rate']:>9.1%}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
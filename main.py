@@ -1,10 +1,16 @@
 import os
+import sys
+import time
+import signal
+import threading
+import argparse
 
 from parser.resume_parser import extract_text_from_pdf, extract_text_from_docx, extract_basic_info
 from utils.scoring import score_resume, WEIGHTS
 from utils.feedback import generate_feedback
 from utils.skill_classifier import classify_skills
 from utils.section_extractor import extract_sections
+from utils.process_pool import ANALYSIS_POOL_WORKERS
 
 def print_section(title, icon=""):
     """Prints a formatted section header - Section header ko format karke print karte hain."""
@@ -69,5 +75,122 @@ def main():
         for item in feedback:
             print(f"     {item}")
 
+def bulk_main(args):
+    """Analyze every resume under a directory or glob on a process pool, resumably - Bulk analysis with checkpoints."""
+    from utils.bulk import Checkpoint, find_documents, fingerprint, open_sink, process
+
+    print("📄 Smart Resume Analyzer (Bulk Mode)")
+    paths = find_documents(args.target)
+    checkpoint = Checkpoint(args.checkpoint or args.output + ".checkpoint")
+    # Files analyzed successfully with their current size and mtime were finished by an earlier run
+    todo = []
+    for path in paths:
+        stamp = fingerprint(path)
+        if stamp is not None and not checkpoint.is_done(path, stamp):
+            todo.append((path, stamp))
+    print(f"🔍 {len(paths)} documents found, {len(paths) - len(todo)} already done, {len(todo)} to analyze")
+    if not todo:
+        checkpoint.close()
+        return 0
+
+    sink = open_sink(args.output, args.format)
+    started = time.perf_counter()
+
+    def progress(record, counts):
+        done = counts["success"] + counts["error"]
+        if done % args.progress_every == 0 or done == len(todo):
+            rate = done / (time.perf_counter() - started)
+            print(f"  {done}/{len(todo)} analyzed ({counts['error']} errors), {rate:.1f} docs/s", flush=True)
+
+    try:
+        counts = process(todo, args.workers, sink, checkpoint, args.window or args.workers * 2, progress)
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrupted. Run the same command again to continue from the checkpoint.")
+        return 130
+    finally:
+        sink.close()
+        checkpoint.close()
+
+    elapsed = time.perf_counter() - started
+    print_section("Bulk Summary", "📊")
+    print(f"  Analyzed    : {counts['success']}")
+    print(f"  Errors      : {counts['error']}")
+    print(f"  Time        : {elapsed:.1f}s ({len(todo) / elapsed:.1f} docs/s)")
+    print(f"  Results     : {args.output}")
+    return 0
+
+
+def watch_main(args):
+    """Analyze new and changed resumes in a folder as they arrive, until stopped - Folder watch mode."""
+    from utils.bulk import Checkpoint, open_sink, process
+    from utils.watch import make_watcher, watch_items
+
+    folder = os.path.abspath(args.folder)
+    if not os.path.isdir(folder):
+        print("❌ Error: Folder does not exist.")
+        return 1
+
+    print("📄 Smart Resume Analyzer (Watch Mode)")
+    checkpoint = Checkpoint(args.checkpoint or args.output + ".checkpoint")
+    sink = open_sink(args.output, args.format)
+    watcher = make_watcher(folder, force_polling=args.poll)
+    print(f"👀 Watching {folder} ({type(watcher).__name__}), {len(checkpoint.entries)} files already analyzed")
+
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        print("\n⏹️  Stopping after the documents in progress...", flush=True)
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    def report(record, counts):
+        if record["status"] == "success":
+            print(f"  ✅ {record['file']}: score {record['result']['score']}", flush=True)
+        else:
+            print(f"  ❌ {record['file']}: {record['error']}", flush=True)
+
+    try:
+        counts = process(watch_items(folder, watcher, checkpoint, stop), args.workers, sink, checkpoint,
+                         args.window or args.workers * 2, report)
+    finally:
+        watcher.close()
+        sink.close()
+        checkpoint.close()
+    print(f"  Analyzed {counts['success']} documents ({counts['error']} errors) this session")
+    return 0
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Smart Resume Analyzer. Without a command, analyzes one file interactively.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bulk = commands.add_parser("bulk", help="analyze every resume under a directory or glob")
+    bulk.add_argument("target", help="directory (searched recursively) or glob such as 'resumes/**/*.pdf'")
+    bulk.add_argument("-o", "--output", required=True, help="results file (.jsonl or .csv), appended to")
+    bulk.add_argument("--format", choices=("jsonl", "csv"), help="output format (default: from the extension)")
+    bulk.add_argument("--checkpoint", help="checkpoint file (default: <output>.checkpoint)")
+    bulk.add_argument("--workers", type=int, default=ANALYSIS_POOL_WORKERS, help="analysis processes")
+    bulk.add_argument("--window", type=int, help="documents in flight (default: 2 x workers)")
+    bulk.add_argument("--progress-every", type=int, default=100, help="print progress every N documents")
+    bulk.set_defaults(handler=bulk_main)
+
+    watch = commands.add_parser("watch", help="analyze new and changed resumes in a folder as they arrive")
+    watch.add_argument("folder", help="folder to watch (including subfolders)")
+    watch.add_argument("-o", "--output", required=True, help="results file (.jsonl or .csv), appended to")
+    watch.add_argument("--format", choices=("jsonl", "csv"), help="output format (default: from the extension)")
+    watch.add_argument("--checkpoint", help="checkpoint file (default: <output>.checkpoint)")
+    watch.add_argument("--workers", type=int, default=ANALYSIS_POOL_WORKERS, help="analysis processes")
+    watch.add_argument("--window", type=int, help="documents in flight (default: 2 x workers)")
+    watch.add_argument("--poll", action="store_true", help="poll instead of using inotify")
+    watch.set_defaults(handler=watch_main)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
 if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(cli())
     main()
\ No newline at end of file
@@ -1,39 +1,89 @@
-import fitz  # PyMuPDF
 import re
-from docx import Document
-import spacy
 import os
 import logging
+from itertools import chain
+
+from utils import lazy_imports
+from utils.lazy_imports import lazy_module
+from utils.logging_setup import SAMPLED
+from utils.deadline import current_deadline, EXTRACT_MIN_CHARACTERS
 
 logger = logging.getLogger(__name__)
 
-# Load the spaCy model - spaCy model ko load karte hain
-try:
-    nlp = spacy.load('en_core_web_sm')
-except OSError:
-    logger.error("Spacy model not found. Please run: python -m spacy download en_core_web_sm")
-    nlp = None
+# PyMuPDF, python-docx and spaCy are imported on first use, not when the app starts
+fitz = lazy_module('fitz')  # PyMuPDF
+docx = lazy_module('docx')
+
+
+def _load_spacy_model():
+    """Load the spaCy model - spaCy model ko load karte hain."""
+    import spacy
+    try:
+        return spacy.load('en_core_web_sm')
+    except OSError:
+        logger.error("Spacy model not found. Please run: python -m spacy download en_core_web_sm")
+        return None
+
 
+lazy_imports.register('spacy_model', _load_spacy_model)
 
-def extract_text_from_pdf(path):
-    """Extract text from a PDF file using PyMuPDF (fitz) with multiple fallback methods - PDF se text extract karte hain multiple methods se."""
+
+def _extraction_cutoff(deadline, characters, pages_done=None):
+    """Why extraction has to stop before the next page or paragraph, or None to keep going."""
+    if pages_done is not None and pages_done >= deadline.max_pages:
+        return "extract_pages"
+    if characters >= deadline.max_characters:
+        return "extract_characters"
+    if characters >= EXTRACT_MIN_CHARACTERS and deadline.expired("extract"):
+        return "extract_time"
+    return None
+
+
+def extract_text_from_pdf(path, stats=None, fast=False):
+    """
+    Extract text from a PDF file using PyMuPDF (fitz) with multiple fallback methods - PDF se text extract karte hain multiple methods se.
+
+    If a stats dict is passed it is filled with the page count and how many pages each method handled.
+    With fast=True (preflight found a text layer) pages are read with the plain text method only.
+    Under an analysis deadline, pages past its page/character limits or time budget are left out.
+    """
     text = ""
+    methods = {}
+    if stats is not None:
+        stats["methods"] = methods
+    # Checked once so the per-page lines cost nothing when DEBUG is off - Per-page logs sirf DEBUG mein
+    debug = logger.isEnabledFor(logging.DEBUG)
+    deadline = current_deadline()
     try:
         with fitz.open(path) as doc:  # Use context manager for safe file handling - Safe file handling ke liye context manager use karte hain
-            logger.info(f"PDF opened successfully. Pages: {len(doc)}")
+            logger.debug("PDF opened successfully. Pages: %d", len(doc))
+            if stats is not None:
+                stats["pages"] = len(doc)
             
             for page_num, page in enumerate(doc):
-                logger.info(f"Processing page {page_num + 1}")
+                if deadline is not None:
+                    cutoff = _extraction_cutoff(deadline, len(text), page_num)
+                    if cutoff:
+                        deadline.skip(cutoff)
+                        logger.warning("Stopping PDF extraction after %d of %d pages (%s)", page_num, len(doc), cutoff)
+                        if stats is not None:
+                            stats["pages_extracted"] = page_num
+                        break
                 
                 # Method 1: Try standard text extraction - Method 1: Standard text extraction try karte hain
                 try:
                     page_text = page.get_text("text")
                     if page_text and page_text.strip():
                         text += page_text + "\n"
-                        logger.info(f"Page {page_num + 1}: Extracted {len(page_text)} characters")
+                        if debug:
+                            logger.debug("Page %d: Extracted %d characters", page_num + 1, len(page_text), extra=SAMPLED)
+                        methods["text"] = methods.get("text", 0) + 1
                         continue
                 except Exception as e:
-                    logger.warning(f"Standard text extraction failed for page {page_num + 1}: {e}")
+                    logger.warning("Standard text extraction failed for page %d: %s", page_num + 1, e)
+                if fast:
+                    # The text layer covers the document, so the fallbacks would find nothing here either
+                    continue
                 
                 # Method 2: Try HTML extraction and clean it - Method 2: HTML extraction try karte hain aur clean karte hain
                 try:
@@ -45,20 +95,24 @@ def extract_text_from_pdf(path):
                         clean_text = re.sub(r'\s+', ' ', clean_text).strip()
                         if clean_text:
                             text += clean_text + "\n"
-                            logger.info(f"Page {page_num + 1}: Extracted {len(clean_text)} characters via HTML")
+                            if debug:
+                                logger.debug("Page %d: Extracted %d characters via HTML", page_num + 1, len(clean_text), extra=SAMPLED)
+                            methods["html"] = methods.get("html", 0) + 1
                             continue
                 except Exception as e:
-                    logger.warning(f"HTML extraction failed for page {page_num + 1}: {e}")
+                    logger.warning("HTML extraction failed for page %d: %s", page_num + 1, e)
                 
                 # Method 3: Try raw text extraction - Method 3: Raw text extraction try karte hain
                 try:
                     raw_text = page.get_text("raw")
                     if raw_text and raw_text.strip():
                         text += raw_text + "\n"
-                        logger.info(f"Page {page_num + 1}: Extracted {len(raw_text)} characters via raw")
+                        if debug:
+                            logger.debug("Page %d: Extracted %d characters via raw", page_num + 1, len(raw_text), extra=SAMPLED)
+                        methods["raw"] = methods.get("raw", 0) + 1
                         continue
                 except Exception as e:
-                    logger.warning(f"Raw text extraction failed for page {page_num + 1}: {e}")
+                    logger.warning("Raw text extraction failed for page %d: %s", page_num + 1, e)
                 
                 # Method 4: Try to extract text from blocks - Method 4: Blocks se text extract karne ki koshish karte hain
                 try:
@@ -71,9 +125,11 @@ def extract_text_from_pdf(path):
                                     page_text += span.get("text", "") + " "
                     if page_text.strip():
                         text += page_text + "\n"
-                        logger.info(f"Page {page_num + 1}: Extracted {len(page_text)} characters via blocks")
+                        if debug:
+                            logger.debug("Page %d: Extracted %d characters via blocks", page_num + 1, len(page_text), extra=SAMPLED)
+                        methods["blocks"] = methods.get("blocks", 0) + 1
                 except Exception as e:
-                    logger.warning(f"Block extraction failed for page {page_num + 1}: {e}")
+                    logger.warning("Block extraction failed for page %d: %s", page_num + 1, e)
                 
                 # Extract tables if present - Agar tables hain to extract karte hain
                 try:
@@ -84,14 +140,17 @@ def extract_text_from_pdf(path):
                             if row_text:
                                 text += row_text + "\n"
                 except Exception as e:
-                    logger.warning(f"Table extraction failed for page {page_num + 1}: {e}")
+                    logger.warning("Table extraction failed for page %d: %s", page_num + 1, e)
                             
     except Exception as e:
         logger.error(f"Error reading PDF {path}: {e}")
         return None
     
     final_text = text.strip()
-    logger.info(f"Total extracted text length: {len(final_text)} characters")
+    if deadline is not None and len(final_text) > deadline.max_characters:
+        final_text = final_text[:deadline.max_characters]
+        deadline.skip("extract_characters")
+    logger.debug("Total extracted text length: %d characters", len(final_text))
     
     if not final_text:
         logger.warning("Warning: No text extracted from PDF")
@@ -101,24 +160,33 @@ def extract_text_from_pdf(path):
 
 
 def extract_text_from_docx(path):
-    """Extract text from a DOCX file using python-docx."""
+    """Extract text from a DOCX file using python-docx, stopping early under an analysis deadline."""
+    deadline = current_deadline()
     try:
-        doc = Document(path)
+        doc = docx.Document(path)
         text_parts = []
+        characters = 0
         
-        # Extract text from paragraphs
-        for para in doc.paragraphs:
-            if para.text.strip():
-                text_parts.append(para.text)
-        
-        # Extract text from tables
-        for table in doc.tables:
-            for row in table.rows:
-                row_text = " | ".join([cell.text.strip() for cell in row.cells if cell.text.strip()])
-                if row_text:
-                    text_parts.append(row_text)
+        # Extract text from paragraphs, then from tables
+        paragraphs = (para.text for para in doc.paragraphs)
+        rows = (" | ".join([cell.text.strip() for cell in row.cells if cell.text.strip()])
+                for table in doc.tables for row in table.rows)
+        for block in chain(paragraphs, rows):
+            if deadline is not None:
+                cutoff = _extraction_cutoff(deadline, characters)
+                if cutoff:
+                    deadline.skip(cutoff)
+                    logger.warning("Stopping DOCX extraction after %d characters (%s)", characters, cutoff)
+                    break
+            if block.strip():
+                text_parts.append(block)
+                characters += len(block) + 1
         
-        return "\n".join(text_parts)
+        text = "\n".join(text_parts)
+        if deadline is not None and len(text) > deadline.max_characters:
+            text = text[:deadline.max_characters]
+            deadline.skip("extract_characters")
+        return text
     except Exception as e:
         logger.error(f"Error reading DOCX {path}: {e}")
         return None
@@ -166,7 +234,13 @@ def extract_name_advanced(text):
     """Advanced name extraction using multiple strategies."""
     lines = text.split('\n')
     
-    # Strategy 1: NLP-based extraction
+    # Strategy 1: NLP-based extraction (skipped when the analysis deadline has run out)
+    deadline = current_deadline()
+    if deadline is not None and deadline.expired():
+        deadline.skip("ner_name")
+        nlp = None
+    else:
+        nlp = lazy_imports.get('spacy_model')
     if nlp:
         try:
             doc = nlp(text)
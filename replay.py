@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Replay captured slow analyses through the pipeline with profiling on.
+
+Reads var/slow_requests/captures.jsonl (written when an analysis exceeds
+SLOW_REQUEST_THRESHOLD_MS) and re-runs every capture whose upload was
+quarantined, printing the original and replayed stage timings next to the
+hottest functions and skill-classifier patterns.
+
+Usage:
+    python replay.py                      # replay every quarantined capture
+    python replay.py --hash 3fa2 --top 15 # one capture, more detail
+    python replay.py --list               # show captures without replaying
+    python replay.py --json > report.json # machine-readable reports
+"""
+
+import os
+import sys
+import json
+import argparse
+
+# Replays are slow under the profiler; they must not be captured again
+os.environ['SLOW_CAPTURE_ENABLED'] = 'false'
+
+from utils.pipeline import analyze_file, ExtractionError
+from utils.profiling import profile_call
+from utils.slow_capture import load_captures, CAPTURE_LOG
+
+
+def print_section(title, icon=""):
+    """Prints a formatted section header - Section header ko format karke print karte hain."""
+    header = f" {icon} {title} " if icon else f" {title} "
+    print("\n" + "="*20 + header + "="*20)
+
+
+def replay_capture(capture, top):
+    """Re-run one captured upload under the profiler and return its report."""
+    path = capture.get("quarantined_file")
+    name = capture["file_name"]
+    try:
+        # A replay is a second look at an upload already counted, not a new analysis
+        _, report = profile_call(analyze_file, path, name, limit=top, store=False)
+        report["status"] = "success"
+    except ExtractionError as e:
+        report = {"status": "no_text", "error": str(e)}
+    return report
+
+
+def print_report(capture, report):
+    print_section(f"{capture['file_name']} ({capture['content_hash'][:12]})", "🐢")
+    print(f"  Captured : {capture['timestamp']}  {capture['elapsed_seconds']}s  status={capture['status']}")
+    print(f"  Document : {capture.get('pages')} pages, {capture.get('characters')} characters, "
+          f"methods={capture.get('extraction_methods')}")
+    if report.get("status") != "success":
+        print(f"  Replay   : {report.get('error')}")
+        return
+
+    print(f"  Replayed : {report['total_seconds']}s (profiled)  peak memory {report['peak_memory_kb']} KB")
+    print(f"\n  {'Stage':<20}{'captured s':>12}{'replayed s':>12}")
+    for stage in sorted(set(capture["stages"]) | set(report["stages"])):
+        print(f"  {stage:<20}{capture['stages'].get(stage, '-'):>12}{report['stages'].get(stage, '-'):>12}")
+
+    print("\n  Hottest functions (cumulative):")
+    for row in report["functions"]:
+        print(f"    {row['cumulative_seconds']:>9.4f}s  {row['calls']:>7}  {row['function']}")
+
+    print("\n  Slowest skill patterns:")
+    for row in report["patterns"]:
+        print(f"    {row['seconds']:>9.4f}s  {row['pattern'][:100]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured slow analyses with profiling on.")
+    parser.add_argument("--log", default=CAPTURE_LOG, help="captures.jsonl to read")
+    parser.add_argument("--hash", help="only replay captures whose content hash starts with this")
+    parser.add_argument("--top", type=int, default=10, help="functions and patterns to show")
+    parser.add_argument("--list", action="store_true", help="list captures without replaying them")
+    parser.add_argument("--json", action="store_true", help="print reports as JSON lines")
+    args = parser.parse_args()
+
+    captures = load_captures(args.log)
+    if args.hash:
+        captures = [c for c in captures if c["content_hash"].startswith(args.hash)]
+    if not captures:
+        print(f"❌ No captures found in {args.log}")
+        return 1
+
+    if args.list:
+        for c in captures:
+            kept = "kept" if c.get("quarantined_file") else "hash only"
+            print(f"{c['content_hash'][:12]}  {c['elapsed_seconds']:>8}s  {c['status']:<8} {kept:<9} {c['file_name']}")
+        return 0
+
+    replayed = 0
+    for capture in captures:
+        path = capture.get("quarantined_file")
+        if not path or not os.path.exists(path):
+            if not args.json:
+                print(f"⚠️  Skipping {capture['file_name']}: upload was not quarantined (set SLOW_CAPTURE_KEEP_FILES=true)")
+            continue
+        report = replay_capture(capture, args.top)
+        replayed += 1
+        if args.json:
+            print(json.dumps({"capture": capture, "replay": report}))
+        else:
+            print_report(capture, report)
+
+    return 0 if replayed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from utils.skill_classifier import default_skill_dict, ENHANCED_SKILL_PATTERNS, CONTEXT_INDICATORS
+from utils.scoring import WEIGHTS, SCORING_VERSION
+from utils.sqlite_util import get_connection
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration - Cache ki configuration
+ANALYSIS_CACHE_ENABLED = os.environ.get('ANALYSIS_CACHE_ENABLED', 'true').lower() == 'true'
+ANALYSIS_CACHE_PATH = os.environ.get('ANALYSIS_CACHE_PATH', os.path.join('var', 'analysis_cache.sqlite3'))
+ANALYSIS_CACHE_MEMORY_ENTRIES = int(os.environ.get('ANALYSIS_CACHE_MEMORY_ENTRIES', '256'))
+ANALYSIS_CACHE_SHARED_ENTRIES = int(os.environ.get('ANALYSIS_CACHE_SHARED_ENTRIES', '20000'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis_cache (
+    key TEXT PRIMARY KEY,
+    body TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analysis_cache_created ON analysis_cache(created_at);
+"""
+
+
+def content_hash(data):
+    """SHA-256 hex digest of an uploaded document's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_content_hash(filepath):
+    """SHA-256 hex digest of a document on disk, read in chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compute_analysis_version():
+    """Fingerprint of the skill taxonomy and scoring rules; any change invalidates cached analyses."""
+    fingerprint = json.dumps({
+        "skills": default_skill_dict,
+        "patterns": ENHANCED_SKILL_PATTERNS,
+        "context": CONTEXT_INDICATORS,
+        "weights": WEIGHTS,
+        "scoring": SCORING_VERSION,
+    }, sort_keys=True)
+    return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:12]
+
+
+ANALYSIS_VERSION = compute_analysis_version()
+
+
+def restamp(response_data, filename, start_time):
+    """Return a cached response with metadata describing the current request."""
+    response = dict(response_data)
+    metadata = dict(response.get("analysis_metadata", {}))
+    metadata.update({
+        "file_name": filename,
+        "processing_time": (datetime.now() - start_time).total_seconds(),
+        "timestamp": datetime.now().isoformat(),
+        "cached": True,
+    })
+    response["analysis_metadata"] = metadata
+    return response
+
+
+class AnalysisCache:
+    """
+    Two-tier cache of complete /analyze responses keyed by content hash and analysis version.
+
+    The first tier is an in-process LRU; the second is a SQLite database in WAL mode that every
+    gunicorn worker on the host reads and writes, so a resume analyzed by one worker is a hit
+    for all of them.
+    """
+
+    def __init__(self, path=ANALYSIS_CACHE_PATH, memory_entries=ANALYSIS_CACHE_MEMORY_ENTRIES,
+                 shared_entries=ANALYSIS_CACHE_SHARED_ENTRIES, version=ANALYSIS_VERSION):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.shared_entries = shared_entries
+        self.version = version
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.stats = {"memory_hits": 0, "shared_hits": 0, "misses": 0, "not_modified": 0, "errors": 0}
+
+    def key(self, digest):
+        return f"{digest}.{self.version}"
+
+    def etag(self, digest, recommendations):
+        """
+        ETag for a document's analysis; it changes when the taxonomy or scoring version does, and
+        when the co-occurrence model's recommendations for it do.
+        """
+        fingerprint = hashlib.sha1(json.dumps(recommendations).encode('utf-8')).hexdigest()[:8]
+        return f"{self.key(digest)}.{fingerprint}"
+
+    def _remember(self, key, response_data):
+        with self._lock:
+            self._memory[key] = response_data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, digest):
+        """Return the cached response for a content hash, or None - Cache se response nikalte hain."""
+        key = self.key(digest)
+        with self._lock:
+            response_data = self._memory.get(key)
+            if response_data is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                registry.inc("resume_cache_lookups_total", {"result": "memory_hit"})
+                return response_data
+
+        try:
+            row = get_connection(self.path, _SCHEMA).execute(
+                "SELECT body FROM analysis_cache WHERE key = ?", (key,)).fetchone()
+        except Exception as e:
+            logger.error(f"Analysis cache lookup failed: {e}")
+            self.stats["errors"] += 1
+            row = None
+
+        if row is None:
+            self.stats["misses"] += 1
+            registry.inc("resume_cache_lookups_total", {"result": "miss"})
+            return None
+
+        response_data = json.loads(row[0])
+        self._remember(key, response_data)
+        self.stats["shared_hits"] += 1
+        registry.inc("resume_cache_lookups_total", {"result": "shared_hit"})
+        return response_data
+
+    def peek(self, digest):
+        """The current-version analysis for a content hash, or None, without counting a hit."""
+        key = self.key(digest)
+        response_data = self._memory.get(key)
+        if response_data is not None:
+            return response_data
+        try:
+            row = get_connection(self.path, _SCHEMA).execute(
+                "SELECT body FROM analysis_cache WHERE key = ?", (key,)).fetchone()
+        except Exception as e:
+            logger.error(f"Analysis cache lookup failed: {e}")
+            return None
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, digest, response_data):
+        """Store a freshly computed response in both tiers (deadline-degraded responses are not kept)."""
+        if response_data.get("degraded"):
+            return
+        key = self.key(digest)
+        self._remember(key, response_data)
+        try:
+            conn = get_connection(self.path, _SCHEMA)
+            conn.execute("INSERT OR REPLACE INTO analysis_cache (key, body, created_at) VALUES (?, ?, ?)",
+                         (key, json.dumps(response_data), time.time()))
+            self._puts += 1
+            # Trim the shared tier now and then rather than on every write
+            if self._puts % 100 == 0:
+                conn.execute("DELETE FROM analysis_cache WHERE key IN "
+                             "(SELECT key FROM analysis_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                             (self.shared_entries,))
+        except Exception as e:
+            logger.error(f"Analysis cache write failed: {e}")
+            self.stats["errors"] += 1
+
+    def record_not_modified(self):
+        self.stats["not_modified"] += 1
+        registry.inc("resume_cache_lookups_total", {"result": "not_modified"})
+
+    def get_stats(self):
+        """Hit counters and hit rate for this process."""
+        hits = self.stats["memory_hits"] + self.stats["shared_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "memory_entries": len(self._memory),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "version": self.version,
+        }
+
+
+analysis_cache = AnalysisCache() if ANALYSIS_CACHE_ENABLED else None
@@ -0,0 +1,330 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+
+from utils.sqlite_util import get_connection
+from utils.analysis_cache import ANALYSIS_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Store configuration - Analysis store ki configuration
+ANALYSIS_STORE_ENABLED = os.environ.get('ANALYSIS_STORE_ENABLED', 'false').lower() == 'true'
+ANALYSIS_STORE_PATH = os.environ.get('ANALYSIS_STORE_PATH', os.path.join('var', 'analysis_store.sqlite3'))
+SEARCH_MAX_LIMIT = 500
+
+# Bulky columns live in analysis_documents so score and skill lookups stay on narrow rows.
+# The FTS index uses that table as external content, so the text is stored only once.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    file_name TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    analysis_version TEXT NOT NULL,
+    score REAL NOT NULL,
+    pages INTEGER,
+    text_length INTEGER NOT NULL,
+    skills TEXT NOT NULL,
+    skill_counts TEXT NOT NULL,
+    sections TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_score ON analyses(score);
+CREATE INDEX IF NOT EXISTS idx_analyses_changes ON analyses(created_at, id);
+
+CREATE TABLE IF NOT EXISTS analysis_documents (
+    id INTEGER PRIMARY KEY REFERENCES analyses(id),
+    body TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS analysis_skills (
+    skill TEXT NOT NULL,
+    analysis_id INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    PRIMARY KEY (skill, analysis_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_analysis_skills_analysis ON analysis_skills(analysis_id);
+
+-- Near-duplicate detection: MinHash signatures and their LSH bucket keys (see utils.dedup)
+CREATE TABLE IF NOT EXISTS analysis_signatures (
+    analysis_id INTEGER PRIMARY KEY REFERENCES analyses(id),
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS analysis_lsh (
+    bucket INTEGER NOT NULL,
+    analysis_id INTEGER NOT NULL,
+    PRIMARY KEY (bucket, analysis_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_analysis_lsh_analysis ON analysis_lsh(analysis_id);
+-- Uploads that were near-duplicates of a stored analysis and reused it instead of being analyzed
+CREATE TABLE IF NOT EXISTS analysis_duplicates (
+    content_hash TEXT PRIMARY KEY,
+    analysis_id INTEGER NOT NULL REFERENCES analyses(id),
+    file_name TEXT NOT NULL,
+    similarity REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analysis_duplicates_analysis ON analysis_duplicates(analysis_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5(text, content='analysis_documents', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS analyses_fts_insert AFTER INSERT ON analysis_documents BEGIN
+    INSERT INTO analyses_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS analyses_fts_delete AFTER DELETE ON analysis_documents BEGIN
+    INSERT INTO analyses_fts(analyses_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS analyses_fts_update AFTER UPDATE OF text ON analysis_documents BEGIN
+    INSERT INTO analyses_fts(analyses_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO analyses_fts(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+_SCORE_FILTER = re.compile(r'^score\s*(>=|<=|>|<|=)\s*(\d+(?:\.\d+)?)$', re.IGNORECASE)
+
+
+def skill_occurrences(text, skills):
+    """How often each found skill occurs in the text (at least once, since the classifier found it)."""
+    if not skills:
+        return {}
+    # Longest first, so "ruby on rails" wins over "ruby"
+    alternatives = "|".join(re.escape(skill) for skill in sorted(skills, key=len, reverse=True))
+    counts = {}
+    for match in re.finditer(r'\b(' + alternatives + r')\b', text.lower()):
+        counts[match.group(1)] = counts.get(match.group(1), 0) + 1
+    return {skill: max(1, counts.get(skill, 0)) for skill in skills}
+
+
+class InvalidQuery(ValueError):
+    """Raised for a search query SQLite's FTS5 parser rejects."""
+
+
+def parse_query(query):
+    """
+    Split a recruiter query like "python AND kubernetes, score > 75" into its parts.
+
+    Comma-separated clauses of the form `score <op> <number>` become score filters; the rest
+    is joined into one FTS5 expression (AND/OR/NOT, "phrases", prefix*) over the resume text.
+
+    Returns:
+        tuple: (FTS5 expression or None, list of (operator, value) score filters)
+    """
+    text_clauses, score_filters = [], []
+    for clause in (part.strip() for part in (query or "").split(',')):
+        if not clause:
+            continue
+        match = _SCORE_FILTER.match(clause)
+        if match:
+            score_filters.append((match.group(1), float(match.group(2))))
+        else:
+            text_clauses.append(f"({clause})")
+    return (" AND ".join(text_clauses) or None), score_filters
+
+
+class AnalysisStore:
+    """
+    Every completed analysis in a SQLite database (WAL), searchable by text, skills and score.
+
+    Rows are keyed by content hash, so re-analyzing a document replaces its row. The extracted
+    text gets an FTS5 index, each skill a row in analysis_skills, and score a regular index, so
+    "python AND kubernetes, score > 75" is answered from indexes without re-parsing anything.
+    All gunicorn workers and pool processes write to the same file.
+    """
+
+    def __init__(self, path=ANALYSIS_STORE_PATH):
+        self.path = path
+
+    def _conn(self):
+        return get_connection(self.path, _SCHEMA)
+
+    def add(self, content_hash, file_name, response_data, text, pages=None, signature=None, buckets=()):
+        """
+        Store one analysis; returns its id, or None if the write failed (the request still succeeds).
+
+        `signature` (MinHash bytes) and its LSH `buckets` make the analysis findable as a near-duplicate.
+        """
+        skills = response_data["skills"]
+        skill_counts = skill_occurrences(text, {skill.lower() for skill_list in skills.values() for skill in skill_list})
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            analysis_id = conn.execute(
+                """INSERT INTO analyses (content_hash, file_name, created_at, analysis_version, score, pages,
+                                         text_length, skills, skill_counts, sections)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(content_hash) DO UPDATE SET
+                       file_name = excluded.file_name, created_at = excluded.created_at,
+                       analysis_version = excluded.analysis_version, score = excluded.score,
+                       pages = excluded.pages, text_length = excluded.text_length, skills = excluded.skills,
+                       skill_counts = excluded.skill_counts, sections = excluded.sections
+                   RETURNING id""",
+                (content_hash, file_name, time.time(), ANALYSIS_VERSION, response_data["score"], pages,
+                 len(text), json.dumps(skills), json.dumps(skill_counts),
+                 json.dumps(response_data["sections_found"]))).fetchone()[0]
+            # An upsert rather than REPLACE: REPLACE's implicit delete would bypass the FTS delete trigger
+            conn.execute("""INSERT INTO analysis_documents (id, body, text) VALUES (?, ?, ?)
+                            ON CONFLICT(id) DO UPDATE SET body = excluded.body, text = excluded.text""",
+                         (analysis_id, json.dumps(response_data), text))
+            conn.execute("DELETE FROM analysis_skills WHERE analysis_id = ?", (analysis_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO analysis_skills (skill, analysis_id, category) VALUES (?, ?, ?)",
+                [(skill.lower(), analysis_id, category) for category, skill_list in skills.items() for skill in skill_list])
+            conn.execute("DELETE FROM analysis_lsh WHERE analysis_id = ?", (analysis_id,))
+            if signature is not None:
+                conn.execute("""INSERT INTO analysis_signatures (analysis_id, signature) VALUES (?, ?)
+                                ON CONFLICT(analysis_id) DO UPDATE SET signature = excluded.signature""",
+                             (analysis_id, signature))
+                conn.executemany("INSERT OR IGNORE INTO analysis_lsh (bucket, analysis_id) VALUES (?, ?)",
+                                 [(bucket, analysis_id) for bucket in buckets])
+            else:
+                conn.execute("DELETE FROM analysis_signatures WHERE analysis_id = ?", (analysis_id,))
+            conn.execute("COMMIT")
+            return analysis_id
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.error(f"Analysis store write failed: {e}")
+            return None
+
+    def add_duplicate(self, content_hash, analysis_id, file_name, similarity):
+        """Record an upload that reused analysis `analysis_id` as its near-duplicate."""
+        try:
+            self._conn().execute(
+                """INSERT INTO analysis_duplicates (content_hash, analysis_id, file_name, similarity, created_at)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(content_hash) DO UPDATE SET analysis_id = excluded.analysis_id,
+                       file_name = excluded.file_name, similarity = excluded.similarity, created_at = excluded.created_at""",
+                (content_hash, analysis_id, file_name, similarity, time.time()))
+        except sqlite3.Error as e:
+            logger.error(f"Analysis store write failed: {e}")
+
+    def lsh_candidates(self, buckets, limit):
+        """
+        Current-version analyses sharing any of the LSH `buckets`, as dicts with
+        "id", "content_hash", "file_name" and the raw "signature".
+        """
+        rows = self._conn().execute(
+            f"""SELECT a.id, a.content_hash, a.file_name, s.signature FROM analyses a
+                JOIN analysis_signatures s ON s.analysis_id = a.id
+                WHERE a.id IN (SELECT analysis_id FROM analysis_lsh WHERE bucket IN ({_marks(buckets)}))
+                  AND a.analysis_version = ?
+                LIMIT ?""", list(buckets) + [ANALYSIS_VERSION, limit]).fetchall()
+        return [{"id": row[0], "content_hash": row[1], "file_name": row[2], "signature": row[3]} for row in rows]
+
+    def duplicates(self, analysis_id):
+        """Uploads recorded as near-duplicates of one analysis, newest first."""
+        rows = self._conn().execute(
+            "SELECT file_name, similarity, created_at FROM analysis_duplicates WHERE analysis_id = ? "
+            "ORDER BY created_at DESC", (analysis_id,)).fetchall()
+        return [{"file_name": row[0], "similarity": row[1], "created_at": row[2]} for row in rows]
+
+    def get(self, analysis_id):
+        """The stored /analyze body of one analysis, or None."""
+        row = self._conn().execute("SELECT body FROM analysis_documents WHERE id = ?", (analysis_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def search(self, query=None, skills_all=(), skills_any=(), skills_none=(), min_score=None, max_score=None,
+               limit=50, offset=0):
+        """
+        Find stored analyses, best score first - Stored analyses mein search karte hain.
+
+        Args:
+            query: Recruiter query, see parse_query (full-text terms and `score > N` clauses)
+            skills_all / skills_any / skills_none: Skills that must all / at least one / none be listed
+            min_score / max_score: Inclusive score bounds
+            limit / offset: Page of results (limit capped at SEARCH_MAX_LIMIT)
+
+        Returns:
+            dict: "total" matches and "results" with id, file_name, score, created_at, skills and,
+            for text queries, a highlighted "snippet"
+
+        Raises:
+            InvalidQuery: If the full-text part is not valid FTS5 syntax
+        """
+        expression, score_filters = parse_query(query)
+        if min_score is not None:
+            score_filters.append((">=", float(min_score)))
+        if max_score is not None:
+            score_filters.append(("<=", float(max_score)))
+
+        joins, where, params = [], [], []
+        if expression:
+            joins.append("JOIN analyses_fts ON analyses_fts.rowid = a.id")
+            where.append("analyses_fts MATCH ?")
+            params.append(expression)
+        for operator, value in score_filters:
+            where.append(f"a.score {operator} ?")  # operator comes from _SCORE_FILTER or the literals above
+            params.append(value)
+        skills_all = [s.lower() for s in skills_all]
+        if skills_all:
+            where.append(f"a.id IN (SELECT analysis_id FROM analysis_skills WHERE skill IN ({_marks(skills_all)}) "
+                         "GROUP BY analysis_id HAVING COUNT(*) = ?)")
+            params.extend(skills_all + [len(set(skills_all))])
+        if skills_any:
+            where.append(f"a.id IN (SELECT analysis_id FROM analysis_skills WHERE skill IN ({_marks(skills_any)}))")
+            params.extend(s.lower() for s in skills_any)
+        if skills_none:
+            where.append(f"a.id NOT IN (SELECT analysis_id FROM analysis_skills WHERE skill IN ({_marks(skills_none)}))")
+            params.extend(s.lower() for s in skills_none)
+
+        source = "analyses a " + " ".join(joins) + (" WHERE " + " AND ".join(where) if where else "")
+        snippet = ", snippet(analyses_fts, 0, '[', ']', '…', 12)" if expression else ""
+        limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+        conn = self._conn()
+        try:
+            total = conn.execute(f"SELECT COUNT(*) FROM {source}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT a.id, a.file_name, a.score, a.created_at, a.skills{snippet} FROM {source} "
+                "ORDER BY a.score DESC, a.id DESC LIMIT ? OFFSET ?", params + [limit, int(offset)]).fetchall()
+        except sqlite3.OperationalError as e:
+            if expression and ("fts5" in str(e) or "syntax" in str(e)):
+                raise InvalidQuery(f"Invalid search query: {e}")
+            raise
+
+        results = []
+        for row in rows:
+            result = {"id": row[0], "file_name": row[1], "score": row[2], "created_at": row[3],
+                      "skills": json.loads(row[4])}
+            if expression:
+                result["snippet"] = row[5]
+            results.append(result)
+        return {"total": total, "results": results}
+
+    def iter_changes(self, cursor=(0.0, 0), columns="id, created_at, score, skills", batch=5000):
+        """
+        Yield rows added or re-analyzed after `cursor`, oldest first.
+
+        In-memory indexes use it to catch up with the store. `columns` must start with
+        "id, created_at"; the last row's (created_at, id) is the cursor for the next call.
+        """
+        conn = self._conn()
+        while True:
+            rows = conn.execute(f"SELECT {columns} FROM analyses WHERE (created_at, id) > (?, ?) "
+                                "ORDER BY created_at, id LIMIT ?", (cursor[0], cursor[1], batch)).fetchall()
+            if not rows:
+                return
+            yield from rows
+            cursor = (rows[-1][1], rows[-1][0])
+
+    def summaries(self, ids):
+        """id -> {"id", "file_name", "score", "skills"} for the given analyses."""
+        found = {}
+        ids = list(ids)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for row in self._conn().execute(
+                    f"SELECT id, file_name, score, skills FROM analyses WHERE id IN ({_marks(chunk)})", chunk):
+                found[row[0]] = {"id": row[0], "file_name": row[1], "score": row[2], "skills": json.loads(row[3])}
+        return found
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+
+def _marks(values):
+    return ", ".join("?" for _ in values)
+
+
+analysis_store = AnalysisStore() if ANALYSIS_STORE_ENABLED else None
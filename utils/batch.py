@@ -0,0 +1,154 @@
+import os
+import json
+import uuid
+import logging
+import zipfile
+from datetime import datetime
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from werkzeug.utils import secure_filename
+
+from utils.pipeline import analyze_file, ExtractionError, DocumentRejected
+from utils.analysis_cache import analysis_cache, file_content_hash, restamp
+from utils.score_distribution import attach_percentiles
+from utils.skill_classifier import attach_skill_recommendations
+from utils.process_pool import get_pool, ANALYSIS_POOL_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Documents in flight per batch; keeps memory flat however large the batch is
+BATCH_WINDOW = int(os.environ.get('BATCH_WINDOW', ANALYSIS_POOL_WORKERS * 2))
+
+
+class DocumentTooLarge(Exception):
+    """Raised when a batch member is bigger than the per-document limit."""
+
+
+def iter_uploaded_files(files):
+    """Yield (filename, stream) pairs for a multi-file upload."""
+    for file in files:
+        if file and file.filename:
+            yield file.filename, file.stream
+
+
+def iter_zip_members(fileobj):
+    """Yield (filename, stream) pairs for every file inside a ZIP archive, opening members lazily."""
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            # Ignore macOS resource forks and other hidden entries - Hidden entries ko skip karte hain
+            name = os.path.basename(info.filename)
+            if not name or name.startswith('.') or info.filename.startswith('__MACOSX/'):
+                continue
+            with archive.open(info) as member:
+                yield name, member
+
+
+def save_stream(stream, filepath, max_bytes):
+    """Copy a stream to disk, refusing to write more than max_bytes (guards against ZIP bombs)."""
+    written = 0
+    with open(filepath, 'wb') as out:
+        while True:
+            chunk = stream.read(64 * 1024)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > max_bytes:
+                raise DocumentTooLarge(f"Document exceeds the {max_bytes // (1024 * 1024)}MB limit.")
+            out.write(chunk)
+
+
+def analyze_batch_item(filepath, filename):
+    """Analyze one batch document inside a pool process and return its NDJSON record."""
+    start_time = datetime.now()
+    try:
+        if analysis_cache is None:
+            return {"file_name": filename, "status": "success", "result": analyze_file(filepath, filename, start_time)}
+
+        digest = file_content_hash(filepath)
+        cached = analysis_cache.get(digest)
+        if cached is not None:
+            # Same as /analyze: percentiles and skill recommendations are looked up again
+            result = attach_skill_recommendations(restamp(cached, filename, start_time))
+            return {"file_name": filename, "status": "success", "result": attach_percentiles(result)}
+        result = analyze_file(filepath, filename, start_time)
+        analysis_cache.put(digest, result)
+        return {"file_name": filename, "status": "success", "result": result}
+    except DocumentRejected as e:
+        return {"file_name": filename, "status": "error", "error": str(e), "reason": e.reason}
+    except ExtractionError as e:
+        return {"file_name": filename, "status": "error", "error": str(e)}
+    except Exception as e:
+        logger.error(f"Error analyzing batch document {filename}: {e}")
+        return {"file_name": filename, "status": "error", "error": "An unexpected error occurred during analysis."}
+
+
+def _remove_quietly(filepath):
+    try:
+        os.remove(filepath)
+    except OSError as e:
+        logger.error(f"Error cleaning up file: {e}")
+
+
+def stream_batch(documents, upload_folder, allowed_file, max_document_size):
+    """
+    Fan batch documents out over the analysis pool and yield one NDJSON line per document as it finishes.
+
+    Args:
+        documents: Iterable of (filename, stream) pairs, consumed lazily
+        upload_folder: Directory for the temporary copies handed to the pool
+        allowed_file: Callable deciding whether a filename has a supported extension
+        max_document_size: Per-document size limit in bytes
+
+    Yields:
+        str: JSON line with "index", "file_name", "status" and either "result" or "error"
+    """
+    pool = get_pool()
+    pending = {}
+    batch_id = uuid.uuid4().hex[:8]
+
+    def record_line(index, record):
+        record["index"] = index
+        return json.dumps(record) + "\n"
+
+    def drain(return_when):
+        done, _ = wait(list(pending), return_when=return_when)
+        for future in done:
+            index, filename, filepath = pending.pop(future)
+            _remove_quietly(filepath)
+            try:
+                record = future.result()
+            except Exception as e:
+                # The pool process died (e.g. killed by the OOM killer) - Pool process crash ho gaya
+                logger.error(f"Batch worker failed on {filename}: {e}")
+                record = {"file_name": filename, "status": "error", "error": "An unexpected error occurred during analysis."}
+            yield record_line(index, record)
+
+    try:
+        for index, (name, stream) in enumerate(documents):
+            filename = secure_filename(name)
+            if not filename or not allowed_file(filename):
+                yield record_line(index, {"file_name": name, "status": "error",
+                                          "error": "Unsupported file type. Please upload a PDF or DOCX file."})
+                continue
+
+            filepath = os.path.join(upload_folder, f"batch_{batch_id}_{index}_{filename}")
+            try:
+                save_stream(stream, filepath, max_document_size)
+            except DocumentTooLarge as e:
+                _remove_quietly(filepath)
+                yield record_line(index, {"file_name": filename, "status": "error", "error": str(e)})
+                continue
+
+            pending[pool.submit(analyze_batch_item, filepath, filename)] = (index, filename, filepath)
+            if len(pending) >= BATCH_WINDOW:
+                yield from drain(FIRST_COMPLETED)
+
+        while pending:
+            yield from drain(FIRST_COMPLETED)
+    finally:
+        # Client disconnected mid-stream - Bache hue jobs cancel karke files hata dete hain
+        for future, (_, _, filepath) in pending.items():
+            future.cancel()
+            _remove_quietly(filepath)
@@ -0,0 +1,305 @@
+import os
+import csv
+import glob
+import json
+import signal
+import hashlib
+import logging
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.pipeline import analyze_file, ExtractionError, DocumentRejected
+from utils.process_pool import ANALYSIS_POOL_START_METHOD
+from utils.metrics import registry
+from utils.score_distribution import score_distribution
+from utils.fleet_stats import fleet_stats
+
+logger = logging.getLogger(__name__)
+
+BULK_EXTENSIONS = ('pdf', 'docx')
+CSV_FIELDS = ("file", "status", "error", "reason", "score", "skill_count", "skills", "sections_found",
+              "text_length", "processing_time")
+# Rewrite the checkpoint once its lines outnumber live entries by this factor (and there are enough to bother)
+CHECKPOINT_COMPACT_RATIO = 2
+CHECKPOINT_COMPACT_MIN_LINES = 1000
+
+
+def is_document(path):
+    return '.' in path and path.rsplit('.', 1)[1].lower() in BULK_EXTENSIONS and os.path.isfile(path)
+
+
+def find_documents(target):
+    """All PDF/DOCX files under a directory (recursively) or matching a glob, sorted - Directory ya glob se documents dhoondte hain."""
+    if os.path.isdir(target):
+        paths = (os.path.join(root, name) for root, _, names in os.walk(target) for name in names)
+    else:
+        paths = glob.iglob(target, recursive=True)
+    # Hidden files are editor temp files and partial copies, never resumes
+    return sorted(os.path.abspath(p) for p in paths if is_document(p) and not os.path.basename(p).startswith('.'))
+
+
+def content_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(path, with_hash=False):
+    """Size and mtime of a file, plus its SHA-256 when asked; None if it vanished."""
+    try:
+        st = os.stat(path)
+        result = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if with_hash:
+            result["sha256"] = content_sha256(path)
+        return result
+    except OSError:
+        return None
+
+
+def prefetch(path):
+    """Ask the kernel to start reading a file now, so the pool process finds it in the page cache."""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+class Checkpoint:
+    """
+    Append-only JSONL record of processed files, keyed by path - Processed files ka checkpoint.
+
+    Each line holds a path, the fingerprint it had when its result was written and the result's
+    status; the last line for a path wins. A run that is interrupted and restarted skips every
+    file that was analyzed successfully and whose size and mtime still match, so files that
+    failed (a timeout, a dead pool process) are tried again. The file is compacted once stale
+    lines pile up.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        lines = 0
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # A line cut short by a crash
+                    path = entry.pop("path")
+                    if entry.get("removed"):
+                        self.entries.pop(path, None)
+                    else:
+                        self.entries[path] = entry
+                    lines += 1
+        self._lines = lines
+        self._file = None
+        self._maybe_compact()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _maybe_compact(self):
+        if self._lines <= max(CHECKPOINT_COMPACT_RATIO * len(self.entries), CHECKPOINT_COMPACT_MIN_LINES):
+            return
+        if self._file is not None:
+            self._file.close()
+        temp = self.path + '.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            for path, entry in self.entries.items():
+                f.write(json.dumps({"path": path, **entry}) + "\n")
+        os.replace(temp, self.path)
+        self._lines = len(self.entries)
+        if self._file is not None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _append(self, line):
+        self._file.write(json.dumps(line) + "\n")
+        self._file.flush()
+        self._lines += 1
+        self._maybe_compact()
+
+    def get(self, path):
+        return self.entries.get(path)
+
+    def is_current(self, path, current):
+        """Whether `path` was processed with this size and mtime."""
+        entry = self.entries.get(path)
+        return (entry is not None and current is not None
+                and entry["size"] == current["size"] and entry["mtime_ns"] == current["mtime_ns"])
+
+    def is_done(self, path, current):
+        """Whether `path` was analyzed successfully with this size and mtime."""
+        return self.is_current(path, current) and self.entries[path]["status"] == "success"
+
+    def record(self, path, stamp, status):
+        entry = {**stamp, "status": status}
+        self.entries[path] = entry
+        self._append({"path": path, **entry})
+
+    def forget(self, path):
+        """Drop a deleted file, so a long-running watch doesn't keep entries for files long gone."""
+        if self.entries.pop(path, None) is not None:
+            self._append({"path": path, "removed": True})
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlSink:
+    """Appends one JSON line per analyzed file, full /analyze body included."""
+
+    def __init__(self, path):
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class CsvSink:
+    """Appends one flat CSV row per analyzed file (CSV_FIELDS); the header is written once per file."""
+
+    def __init__(self, path):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        if new:
+            self._writer.writeheader()
+
+    def write(self, record):
+        row = {key: record.get(key) for key in ("file", "status", "error", "reason")}
+        result = record.get("result")
+        if result:
+            skills = [skill for skill_list in result["skills"].values() for skill in skill_list]
+            metadata = result.get("analysis_metadata", {})
+            row.update({
+                "score": result["score"],
+                "skill_count": len(skills),
+                "skills": "; ".join(skills),
+                "sections_found": "; ".join(name for name, found in result["sections_found"].items() if found),
+                "text_length": metadata.get("text_length"),
+                "processing_time": metadata.get("processing_time"),
+            })
+        self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def open_sink(path, output_format=None):
+    """A JSONL or CSV sink, picked from output_format or else the file extension."""
+    output_format = output_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    return CsvSink(path) if output_format == 'csv' else JsonlSink(path)
+
+
+def analyze_path(path):
+    """Analyze one file inside a pool process and return its output record."""
+    try:
+        return {"file": path, "status": "success", "result": analyze_file(path, os.path.basename(path), datetime.now())}
+    except DocumentRejected as e:
+        return {"file": path, "status": "error", "error": str(e), "reason": e.reason}
+    except ExtractionError as e:
+        return {"file": path, "status": "error", "error": str(e)}
+    except Exception as e:
+        logger.error(f"Error analyzing {path}: {e}")
+        return {"file": path, "status": "error", "error": "An unexpected error occurred during analysis."}
+
+
+def _ignore_interrupts():
+    # Ctrl-C is for the CLI, which then stops the pool itself; otherwise in-flight documents die as errors
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def make_pool(workers):
+    """A process pool for bulk runs, forked from this (already imported) process like the analysis pool."""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(ANALYSIS_POOL_START_METHOD),
+                               initializer=_ignore_interrupts)
+
+
+def flush_statistics():
+    """Write this process's pending metrics, score sketches and fleet counters before the CLI exits."""
+    registry.maybe_flush(force=True)
+    if score_distribution is not None:
+        score_distribution.flush(force=True)
+    if fleet_stats is not None:
+        fleet_stats.flush(force=True)
+
+
+def process(items, workers, sink, checkpoint, window, on_result=None):
+    """
+    Analyze (path, fingerprint) items on a process pool, at most `window` in flight - Window ke saath pool par analyze karte hain.
+
+    Each file is prefetched as it is queued, so its disk read overlaps the analyses ahead of it.
+    A result is written to the sink before its checkpoint entry, so an interrupted run may
+    repeat the files that were in flight but never loses one. A None item means the source has
+    nothing new yet: finished results are written out without waiting for the window to fill.
+    If a pool process dies, its documents are recorded as errors and the pool is replaced.
+
+    Returns:
+        dict: Counts of results by status
+    """
+    pool = make_pool(workers)
+    pending = {}
+    counts = {"success": 0, "error": 0}
+
+    def drain(timeout=None):
+        done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            path, stamp = pending.pop(future)
+            try:
+                record = future.result()
+            except Exception as e:
+                # The pool process died (e.g. killed by the OOM killer) - Pool process crash ho gaya
+                logger.error(f"Bulk worker failed on {path}: {e}")
+                record = {"file": path, "status": "error", "error": "An unexpected error occurred during analysis."}
+            sink.write(record)
+            checkpoint.record(path, stamp, record["status"])
+            counts[record["status"]] += 1
+            if on_result is not None:
+                on_result(record, counts)
+
+    def submit(path):
+        nonlocal pool
+        try:
+            return pool.submit(analyze_path, path)
+        except BrokenProcessPool:
+            logger.error("Bulk pool broke; starting a new one")
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = make_pool(workers)
+            return pool.submit(analyze_path, path)
+
+    try:
+        for item in items:
+            if item is None:
+                if pending:
+                    drain(timeout=0)
+                continue
+            path, stamp = item
+            if any(path == queued for queued, _ in pending.values()):
+                continue  # Already queued; its stale stamp gets it analyzed again on the next scan
+            prefetch(path)
+            pending[submit(path)] = (path, stamp)
+            if len(pending) >= window:
+                drain()
+        while pending:
+            drain()
+    finally:
+        for future in pending:
+            future.cancel()
+        # Pool processes flush their own statistics on the way out; this process's go last
+        pool.shutdown(wait=True, cancel_futures=True)
+        flush_statistics()
+    return counts
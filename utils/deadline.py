@@ -0,0 +1,89 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Deadline configuration - Analysis deadline ki configuration
+# Well inside gunicorn's 120 s timeout, so a slow document still gets a response instead of a killed worker
+ANALYSIS_DEADLINE_SECONDS = float(os.environ.get('ANALYSIS_DEADLINE_SECONDS', '60'))
+EXTRACT_MAX_PAGES = int(os.environ.get('EXTRACT_MAX_PAGES', '50'))
+EXTRACT_MAX_CHARACTERS = int(os.environ.get('EXTRACT_MAX_CHARACTERS', '200000'))
+# Extraction is only cut for time once this much text exists, so a late start still yields a usable result
+EXTRACT_MIN_CHARACTERS = 2000
+
+# Share of the overall deadline each stage may use, in pipeline order. Budgets are cumulative:
+# a stage may also spend whatever the stages before it left unused.
+STAGE_SHARES = (
+    ("extract", 0.55),
+    ("classify_skills", 0.25),
+    ("extract_sections", 0.02),
+    ("score", 0.08),
+    ("feedback", 0.10),
+)
+
+_current_deadline = ContextVar('current_deadline', default=None)
+
+
+class Deadline:
+    """
+    Time budget for one analysis, split into cumulative per-stage budgets.
+
+    Stages check it at safe points and cut optional work short instead of running into the
+    gunicorn timeout; everything they skip is listed in `skipped` and ends up in the response's
+    `degraded` marker.
+    """
+
+    def __init__(self, seconds, max_pages=EXTRACT_MAX_PAGES, max_characters=EXTRACT_MAX_CHARACTERS,
+                 stage_shares=STAGE_SHARES):
+        self.seconds = seconds
+        self.max_pages = max_pages
+        self.max_characters = max_characters
+        self.started = time.monotonic()
+        self.expires_at = self.started + seconds
+        self.skipped = []
+        self._stage_ends = {}
+        share = 0.0
+        for name, fraction in stage_shares:
+            share += fraction
+            self._stage_ends[name] = self.started + seconds * min(share, 1.0)
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def stage_remaining(self, stage):
+        """Seconds left in the given stage's budget."""
+        ends_at = min(self._stage_ends.get(stage, self.expires_at), self.expires_at)
+        return max(0.0, ends_at - time.monotonic())
+
+    def expired(self, stage=None):
+        """Whether the whole deadline, or the given stage's budget, has run out."""
+        ends_at = self._stage_ends.get(stage, self.expires_at)
+        return time.monotonic() >= min(ends_at, self.expires_at)
+
+    def skip(self, what):
+        """Record a piece of work that was left out to stay on time."""
+        if what not in self.skipped:
+            self.skipped.append(what)
+
+    @property
+    def degraded(self):
+        return bool(self.skipped)
+
+    def marker(self):
+        """The `degraded` part of a response."""
+        return {"skipped": list(self.skipped), "deadline_seconds": round(self.seconds, 3)}
+
+
+def current_deadline():
+    """The Deadline of the analysis running in this context, or None when there is none."""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline):
+    """Make `deadline` the current deadline for the duration of the block."""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
@@ -0,0 +1,104 @@
+import os
+import re
+import hashlib
+import logging
+
+from utils import lazy_imports
+
+logger = logging.getLogger(__name__)
+
+# numpy is imported by the first signature, not when the pipeline is imported
+np = lazy_imports.lazy_module('numpy')
+
+# Deduplication configuration - Near-duplicate detection ki configuration
+DEDUP_ENABLED = os.environ.get('DEDUP_ENABLED', 'true').lower() == 'true'
+# Estimated Jaccard similarity of word shingles at which a resume counts as a near-duplicate
+DEDUP_THRESHOLD = float(os.environ.get('DEDUP_THRESHOLD', '0.9'))
+DEDUP_MAX_CANDIDATES = 200
+SHINGLE_WORDS = 5
+MINHASH_PERMUTATIONS = 128
+# 16 bands of 8 rows: documents at 0.9 similarity share a bucket with probability ~0.999,
+# documents at 0.5 with probability ~0.06
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def _hash_functions():
+    """The (multipliers, offsets) of the MinHash permutations, drawn on first use."""
+    # Fixed seed: signatures are stored, so every process must use the same hash functions
+    rng = np.random.RandomState(20240917)
+    multipliers = rng.randint(0, 2 ** 64, MINHASH_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+    offsets = rng.randint(0, 2 ** 64, MINHASH_PERMUTATIONS, dtype=np.uint64)
+    return multipliers, offsets
+
+
+lazy_imports.register('minhash_functions', _hash_functions)
+
+
+def shingle_hashes(text):
+    """Stable 64-bit hashes of the normalized text's overlapping SHINGLE_WORDS-word shingles."""
+    words = _WORD.findall(text.lower())
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    count = max(1, len(words) - SHINGLE_WORDS + 1)
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(count)}
+    digest = b"".join(hashlib.blake2b(s.encode(), digest_size=8).digest() for s in shingles)
+    return np.frombuffer(digest, dtype=np.uint64)
+
+
+def minhash(text):
+    """
+    MinHash signature of a resume's text - Text ka MinHash signature banate hain.
+
+    Each of the MINHASH_PERMUTATIONS hash functions is multiply-shift hashing of the shingle
+    hashes (odd multiplier, wrapping uint64 arithmetic, top 32 bits), computed for all
+    shingles and permutations in one vectorized step.
+
+    Returns:
+        numpy.ndarray: uint32 signature, or None for text without words
+    """
+    hashes = shingle_hashes(text)
+    if not len(hashes):
+        return None
+    multipliers, offsets = lazy_imports.get('minhash_functions')
+    # Blocks of shingles keep the (shingles x permutations) matrix small for very long documents
+    signature = np.full(MINHASH_PERMUTATIONS, np.iinfo(np.uint32).max, dtype=np.uint32)
+    for start in range(0, len(hashes), 4096):
+        block = hashes[start:start + 4096, None] * multipliers + offsets
+        np.minimum(signature, (block >> np.uint64(32)).astype(np.uint32).min(axis=0), out=signature)
+    return signature
+
+
+def band_keys(signature):
+    """One LSH bucket key per band; the band number is hashed in, so keys of different bands never collide."""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()
+        digest = hashlib.blake2b(bytes([band]) + rows, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))  # SQLite integers are signed
+    return keys
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two signatures' shingle sets."""
+    return float(np.count_nonzero(signature == other)) / MINHASH_PERMUTATIONS
+
+
+def find_near_duplicate(store, signature, threshold=DEDUP_THRESHOLD):
+    """
+    The stored analysis most similar to `signature`, if it reaches `threshold`.
+
+    Only analyses sharing at least one LSH bucket are compared, so a lookup reads a few index
+    entries instead of every stored signature.
+
+    Returns:
+        dict: {"id", "content_hash", "file_name", "similarity"} or None
+    """
+    best = None
+    for candidate in store.lsh_candidates(band_keys(signature), DEDUP_MAX_CANDIDATES):
+        score = similarity(signature, np.frombuffer(candidate.pop("signature"), dtype=np.uint32))
+        if score >= threshold and (best is None or score > best["similarity"]):
+            best = {**candidate, "similarity": round(score, 4)}
+    return best
@@ -0,0 +1,256 @@
+import os
+import signal
+import logging
+import threading
+import multiprocessing
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; the pool is disabled there anyway
+    resource = None
+
+from utils.preflight import extract_routed, PreflightRejected
+from utils.deadline import Deadline, deadline_scope, current_deadline
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Extractor pool configuration - Sandboxed extractor processes ki configuration
+EXTRACTOR_POOL_ENABLED = os.environ.get('EXTRACTOR_POOL_ENABLED', str(hasattr(os, 'fork'))).lower() == 'true'
+EXTRACTOR_POOL_SIZE = int(os.environ.get('EXTRACTOR_POOL_SIZE', '2'))
+EXTRACTOR_TIMEOUT_SECONDS = float(os.environ.get('EXTRACTOR_TIMEOUT_SECONDS', '45'))
+EXTRACTOR_MEMORY_MB = int(os.environ.get('EXTRACTOR_MEMORY_MB', '1024'))  # Growth allowed beyond the forked image
+EXTRACTOR_MAX_JOBS = int(os.environ.get('EXTRACTOR_MAX_JOBS', '200'))
+
+# Signals whose gunicorn handlers must not run in an extractor
+_RESET_SIGNALS = ('SIGTERM', 'SIGHUP', 'SIGQUIT', 'SIGUSR1', 'SIGUSR2', 'SIGWINCH', 'SIGCHLD', 'SIGTTIN', 'SIGTTOU')
+
+
+class ExtractorFailed(Exception):
+    """Raised when an extractor process timed out, ran out of memory or crashed on a document."""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _apply_limits():
+    """Cap the extractor's address space at its forked size plus EXTRACTOR_MEMORY_MB, and disable core dumps."""
+    if resource is None:
+        return
+    with open('/proc/self/statm') as f:
+        current = int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    limit = current + EXTRACTOR_MEMORY_MB * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+
+def _extractor_main(conn):
+    """Loop of one extractor process: receive a job, extract, send the outcome back."""
+    for name in _RESET_SIGNALS:
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), signal.SIG_DFL)
+    # Ctrl-C in a dev server is for the parent, which then stops the extractors itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        _apply_limits()
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not apply extractor limits: {e}")
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break  # The owning worker is gone
+        if job is None:
+            break
+        filepath, file_extension, limits = job
+        try:
+            stats = {}
+            # The caller's remaining extraction budget and limits, if it runs under a deadline
+            deadline = Deadline(*limits, stage_shares=(("extract", 1.0),)) if limits else None
+            with deadline_scope(deadline):
+                text = extract_routed(filepath, file_extension, stats)
+            conn.send(("ok", text, stats, deadline.skipped if deadline else []))
+        except PreflightRejected as e:
+            conn.send(("rejected", e.reason, stats, None))
+        except MemoryError:
+            conn.send(("memory", None, None, None))
+            break  # The heap may be fragmented or half-freed; let the pool start a fresh process
+        except Exception as e:
+            conn.send(("error", repr(e), None, None))
+    conn.close()
+    os._exit(0)
+
+
+class _Extractor:
+    """One sandboxed extractor process and the parent's end of its pipe."""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        # Daemonic, so a multiprocessing parent (an analysis pool process) terminates it on exit instead of joining it
+        self.process = context.Process(target=_extractor_main, args=(child_conn,), name='resume-extractor', daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def run(self, job, timeout):
+        """Send one job and wait for its outcome; kills the process on timeout or crash."""
+        self.jobs += 1
+        try:
+            self.conn.send(job)
+            if not self.conn.poll(timeout):
+                self.kill()
+                raise ExtractorFailed("timeout", f"Extraction took longer than {timeout:.0f}s")
+            return self.conn.recv()
+        except (EOFError, OSError, BrokenPipeError):
+            self.kill()
+            raise ExtractorFailed("crash", f"Extractor process died (exit code {self.process.exitcode})")
+
+    def stop(self):
+        """Ask the process to exit after its current job (used for recycling)."""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class ExtractorPool:
+    """
+    Long-lived extractor processes forked from the (already warm) owning process.
+
+    PyMuPDF and python-docx run there instead of in the web or analysis worker, under a hard
+    per-job timeout and an address-space rlimit. A process that times out, exceeds its memory
+    or crashes is killed and replaced, and every process is recycled after EXTRACTOR_MAX_JOBS
+    jobs, so a bad upload costs one extractor restart instead of the worker. Processes are
+    started on demand up to EXTRACTOR_POOL_SIZE and shared by all threads of the owner.
+    """
+
+    def __init__(self, size=EXTRACTOR_POOL_SIZE, timeout=EXTRACTOR_TIMEOUT_SECONDS, max_jobs=EXTRACTOR_MAX_JOBS):
+        self.size = size
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        self._reset()
+
+    def _reset(self):
+        # Extractors inherited through fork belong to the parent; this process starts with none
+        self._pid = os.getpid()
+        self._context = multiprocessing.get_context('fork') if hasattr(os, 'fork') else None
+        self._cond = threading.Condition()
+        self._idle = []
+        self._started = 0
+
+    def _acquire(self):
+        with self._cond:
+            while not self._idle and self._started >= self.size:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._started += 1
+        try:
+            return _Extractor(self._context)
+        except Exception:
+            with self._cond:
+                self._started -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, extractor, reason=None):
+        """Return an extractor to the idle list, or replace it when it failed or is due for recycling."""
+        if reason is None and extractor.jobs >= self.max_jobs:
+            reason = "recycle"
+            extractor.stop()
+        if reason is not None:
+            registry.inc("resume_extractor_restarts_total", {"reason": reason})
+            try:
+                extractor = _Extractor(self._context)
+            except Exception as e:
+                logger.error(f"Could not start a replacement extractor: {e}")
+                extractor = None
+        with self._cond:
+            if extractor is None:
+                self._started -= 1
+            else:
+                self._idle.append(extractor)
+            self._cond.notify()
+
+    def start(self):
+        """Start every extractor up front so the first uploads don't pay for the forks."""
+        if self._pid != os.getpid():
+            self._reset()
+        extractors = [self._acquire() for _ in range(self.size - self._started)]
+        for extractor in extractors:
+            self._release(extractor)
+
+    def extract(self, filepath, file_extension, stats=None):
+        """
+        Preflight a document and extract its text in an extractor process.
+
+        The current analysis deadline's extraction budget and limits are applied there, and
+        anything it skipped is recorded on the deadline here.
+
+        Raises:
+            PreflightRejected: If preflight found the document cannot yield any text
+            ExtractorFailed: If the extractor timed out, ran out of memory or crashed
+        """
+        if self._pid != os.getpid():
+            self._reset()
+        deadline = current_deadline()
+        limits = None
+        if deadline is not None:
+            limits = (deadline.stage_remaining("extract"), deadline.max_pages, deadline.max_characters)
+
+        extractor = self._acquire()
+        try:
+            status, text, child_stats, skipped = extractor.run((filepath, file_extension, limits), self.timeout)
+        except ExtractorFailed as e:
+            logger.error(f"Extractor failed on {os.path.basename(filepath)} ({e.reason}): {e}")
+            self._release(extractor, e.reason)
+            raise
+        except BaseException:
+            extractor.kill()
+            self._release(extractor, "crash")
+            raise
+        if status == "memory":
+            extractor.kill()  # Already exiting; don't hand it out again
+            self._release(extractor, "memory")
+        else:
+            self._release(extractor)
+
+        if status == "memory":
+            raise ExtractorFailed("memory", f"Extraction exceeded the {EXTRACTOR_MEMORY_MB} MB memory limit")
+        if status == "error":
+            raise ExtractorFailed("error", text)
+        # Copied before a rejection too: the preflight report is what gets the rejection counted
+        if stats is not None and child_stats:
+            stats.update(child_stats)
+        if status == "rejected":
+            raise PreflightRejected(text, child_stats.get("preflight"))
+        if deadline is not None:
+            for what in skipped:
+                deadline.skip(what)
+        return text
+
+    def shutdown(self):
+        """Stop every idle extractor owned by this process."""
+        if self._pid != os.getpid():
+            self._reset()
+            return
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._started -= len(idle)
+        for extractor in idle:
+            extractor.stop()
+
+
+extractor_pool = ExtractorPool()
+os.register_at_fork(after_in_child=extractor_pool._reset)
@@ -1,6 +1,8 @@
 import re
 from typing import Dict, List, Tuple
 
+from utils.deadline import current_deadline
+
 # Enhanced mapping dictionary for feedback messages - Enhanced feedback messages ke liye mapping dictionary
 SECTION_FEEDBACK_MESSAGES = {
     "experience": "Experience: This is the most critical section. Detail your work history with quantifiable achievements and impact metrics.",
@@ -252,8 +254,11 @@ def generate_enhanced_feedback(sections: Dict[str, bool], score_data: Dict[str,
             if section in SECTION_FEEDBACK_MESSAGES:
                 feedback.append(f"  ⚠️ {SECTION_FEEDBACK_MESSAGES[section]}")
     
-    # Content quality analysis - Content quality analysis
-    if text:
+    # Content quality analysis - Content quality analysis (optional detail, dropped when the deadline has run out)
+    deadline = current_deadline()
+    if text and deadline is not None and deadline.expired("feedback"):
+        deadline.skip("feedback_content_analysis")
+    elif text:
         content_analysis = analyze_content_quality(text)
         feedback.append("\n📝 **Content Quality Analysis:**")
         
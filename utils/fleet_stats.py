@@ -0,0 +1,170 @@
+import os
+import time
+import logging
+import threading
+
+from utils.sqlite_util import get_connection
+from utils.scoring import get_grade
+from utils.flusher import PeriodicFlush
+
+logger = logging.getLogger(__name__)
+
+# Fleet statistics configuration - Fleet statistics ki configuration
+FLEET_STATS_ENABLED = os.environ.get('FLEET_STATS_ENABLED', 'true').lower() == 'true'
+FLEET_STATS_PATH = os.environ.get('FLEET_STATS_PATH', os.path.join('var', 'fleet_stats.sqlite3'))
+FLEET_STATS_FLUSH_SECONDS = float(os.environ.get('FLEET_STATS_FLUSH_SECONDS', '1.0'))
+SCORE_BIN_WIDTH = 10
+GRADES = ("A+", "A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D")
+
+# One row per counter, so the table's size depends on the taxonomy and bins, never on how many analyses ran
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fleet_counters (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+"""
+
+
+def _score_bin(score):
+    low = min(int(score // SCORE_BIN_WIDTH) * SCORE_BIN_WIDTH, 100 - SCORE_BIN_WIDTH)
+    return f"{low}-{low + SCORE_BIN_WIDTH}"
+
+
+def _rate(part, whole):
+    return round(part / whole, 4) if whole else 0.0
+
+
+class FleetStats:
+    """
+    Aggregate statistics over every analysis on the host - Saare analyses ke aggregate stats.
+
+    Each analysis adds a handful of increments (skills, score and grade bins, sections, pages,
+    characters, extraction routes and methods) to this process's pending deltas, O(1) per
+    analysis. The deltas are added to shared counters in a SQLite database (WAL) at most once
+    per FLEET_STATS_FLUSH_SECONDS, in one transaction, so every gunicorn worker and pool
+    process feeds the same totals. /stats reads those counters; nothing scans past analyses.
+    Deltas still pending when a process goes idle or exits are added by a background timer.
+    """
+
+    def __init__(self, path=FLEET_STATS_PATH):
+        self.path = path
+        self._flusher = PeriodicFlush(lambda: self.flush(force=True), FLEET_STATS_FLUSH_SECONDS, 'fleet-stats-flush')
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._deltas = {}
+        self._last_flush = time.monotonic()
+
+    def _add(self, kind, key, amount=1):
+        self._deltas[(kind, key)] = self._deltas.get((kind, key), 0) + amount
+
+    def record(self, status, response_data=None, stats=None):
+        """
+        Count one analysis outcome; a successful one also adds its skills, score, sections and sizes.
+
+        Args:
+            status: Outcome as counted by resume_analyses_total (success, duplicate, rejected, ...)
+            response_data: The /analyze body, for successful analyses
+            stats: Extraction stats (preflight report, pages, methods) from extract_text
+        """
+        stats = stats or {}
+        with self._lock:
+            self._add("outcome", status)
+            report = stats.get("preflight")
+            if report:
+                self._add("route", report["route"])
+            if status == "success" and response_data is not None:
+                self._add("documents", "analyzed")
+                for category, skills in response_data["skills"].items():
+                    for skill in skills:
+                        self._add("skill", f"{category}\t{skill.lower()}")
+                score = response_data["score"]
+                self._add("score_bin", _score_bin(score))
+                self._add("grade", get_grade(score))
+                self._add("total", "score", score)
+                for section, found in response_data["sections_found"].items():
+                    self._add("section", section, 1 if found else 0)
+                self._add("total", "characters", response_data["analysis_metadata"]["text_length"])
+                if stats.get("pages") is not None:
+                    self._add("total", "pages", stats["pages"])
+                    self._add("documents", "paged")
+                for method, pages in stats.get("methods", {}).items():
+                    self._add("extraction_pages", method, pages)
+        self._flusher.start()
+        self.flush()
+
+    def flush(self, force=False):
+        """Add this process's pending deltas to the shared counters, at most once per FLEET_STATS_FLUSH_SECONDS."""
+        now = time.monotonic()
+        with self._lock:
+            if not self._deltas or (not force and now - self._last_flush < FLEET_STATS_FLUSH_SECONDS):
+                return
+            deltas, self._deltas = self._deltas, {}
+            self._last_flush = now
+        conn = get_connection(self.path, _SCHEMA)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("""INSERT INTO fleet_counters (kind, key, value) VALUES (?, ?, ?)
+                                ON CONFLICT(kind, key) DO UPDATE SET value = value + excluded.value""",
+                             [(kind, key, value) for (kind, key), value in deltas.items()])
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.error(f"Could not write fleet statistics: {e}")
+            # Keep the increments for the next flush rather than losing them
+            with self._lock:
+                for (kind, key), value in deltas.items():
+                    self._add(kind, key, value)
+
+    def summary(self):
+        """Rates, averages and histograms from the shared counters."""
+        self.flush(force=True)
+        counters = {}
+        for kind, key, value in get_connection(self.path, _SCHEMA).execute(
+                "SELECT kind, key, value FROM fleet_counters"):
+            counters.setdefault(kind, {})[key] = value
+
+        analyzed = int(counters.get("documents", {}).get("analyzed", 0))
+        totals = counters.get("total", {})
+        skills = {}
+        for key, count in sorted(counters.get("skill", {}).items(), key=lambda item: -item[1]):
+            category, skill = key.split("\t", 1)
+            skills.setdefault(category, {})[skill] = {"count": int(count), "rate": _rate(count, analyzed)}
+        score_bins = counters.get("score_bin", {})
+        routes = counters.get("route", {})
+        pages_by_method = {method: int(pages) for method, pages in counters.get("extraction_pages", {}).items()}
+        extracted_pages = sum(pages_by_method.values())
+        paged = counters.get("documents", {}).get("paged", 0)
+
+        return {
+            "analyses": {outcome: int(count) for outcome, count in counters.get("outcome", {}).items()},
+            "analyzed_documents": analyzed,
+            "skills": skills,
+            "score": {
+                "average": round(totals.get("score", 0) / analyzed, 2) if analyzed else None,
+                "histogram": {bin_: int(score_bins.get(bin_, 0))
+                              for bin_ in (_score_bin(low) for low in range(0, 100, SCORE_BIN_WIDTH))},
+            },
+            "grades": {grade: int(counters.get("grade", {}).get(grade, 0)) for grade in GRADES},
+            "sections": {section: _rate(count, analyzed) for section, count in counters.get("section", {}).items()},
+            "averages": {
+                "pages": round(totals.get("pages", 0) / paged, 2) if paged else None,
+                "characters": round(totals.get("characters", 0) / analyzed) if analyzed else None,
+            },
+            "extraction": {
+                "routes": {route: int(count) for route, count in routes.items()},
+                "fallback_route_rate": _rate(routes.get("fallback", 0), routes.get("text", 0) + routes.get("fallback", 0)),
+                "pages_by_method": pages_by_method,
+                "fallback_page_rate": _rate(extracted_pages - pages_by_method.get("text", 0), extracted_pages),
+            },
+        }
+
+
+fleet_stats = FleetStats() if FLEET_STATS_ENABLED else None
+if fleet_stats is not None:
+    # Pending deltas belong to the parent, which flushes them itself
+    os.register_at_fork(after_in_child=fleet_stats._reset)
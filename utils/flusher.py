@@ -0,0 +1,69 @@
+import os
+import time
+import atexit
+import logging
+import threading
+import multiprocessing
+import multiprocessing.util
+
+logger = logging.getLogger(__name__)
+
+_start_lock = threading.Lock()
+
+
+def process_alive(pid):
+    """Whether a pid still runs, so its per-process state file may be folded away once it does not."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class PeriodicFlush:
+    """
+    Flushes a per-process buffer on a daemon timer and once more at exit - Background flusher.
+
+    The metrics registry, score sketches and fleet counters write themselves out from their own
+    hot path at most once per interval, so without this the last updates before a process goes
+    quiet would sit in memory until the next analysis, or be lost when the process exits.
+    start() is called from that hot path and is only a pid check once the thread runs; a forked
+    child (gunicorn worker, pool process) starts its own thread on first use. The final flush
+    runs from atexit, or in multiprocessing pool processes, which leave through os._exit and
+    skip atexit, from a multiprocessing finalizer.
+    """
+
+    def __init__(self, flush, interval, name):
+        self._flush = flush
+        self.interval = interval
+        self.name = name
+        self._pid = None
+        atexit.register(self._final_flush)
+
+    def start(self):
+        if self._pid == os.getpid():
+            return
+        with _start_lock:
+            # First use in this process, or a forked child whose timer thread did not survive
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name=self.name, daemon=True).start()
+            if multiprocessing.parent_process() is not None:
+                multiprocessing.util.Finalize(None, self._final_flush, exitpriority=10)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self._flush()
+            except Exception as e:
+                logger.error(f"Periodic {self.name} flush failed: {e}")
+
+    def _final_flush(self):
+        try:
+            self._flush()
+        except Exception as e:
+            logger.error(f"Final {self.name} flush failed: {e}")
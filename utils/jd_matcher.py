@@ -0,0 +1,197 @@
+import os
+import re
+import json
+import math
+import logging
+import threading
+from array import array
+
+from utils import lazy_imports
+from utils.skill_classifier import classify_skills_enhanced
+from utils.analysis_store import analysis_store
+
+logger = logging.getLogger(__name__)
+
+np = lazy_imports.lazy_module('numpy')  # Loaded by the first match or index refresh
+
+# Matching configuration - JD matching ki configuration
+BM25_K1 = float(os.environ.get('BM25_K1', '1.2'))
+BM25_B = float(os.environ.get('BM25_B', '0.75'))
+PREFERRED_SKILL_WEIGHT = float(os.environ.get('PREFERRED_SKILL_WEIGHT', '0.5'))
+
+# A line that is (or starts) a heading switches a JD between required and preferred skills
+_PREFERRED_HEADING = re.compile(r'^\W*(preferred|nice[\s-]+to[\s-]+have|good[\s-]+to[\s-]+have|bonus|pluses|'
+                                r'desirable|desired|optional)\b', re.IGNORECASE)
+_REQUIRED_HEADING = re.compile(r'^\W*(required|requirements|must[\s-]+have|qualifications|'
+                               r'what\s+you\s+(need|bring)|responsibilities|skills)\b', re.IGNORECASE)
+
+
+def _skill_set(text):
+    if not text.strip():
+        return set()
+    found = classify_skills_enhanced(text)["skills_by_category"]
+    return {skill.lower() for skill_list in found.values() for skill in skill_list}
+
+
+def extract_jd_skills(job_description):
+    """
+    Required and preferred skills of a job description, found with the resume taxonomy matcher.
+
+    Lines after a "Preferred" / "Nice to have" / "Bonus" heading count as preferred until a
+    "Requirements" / "Must have" / "Qualifications" heading; everything else is required.
+
+    Returns:
+        dict: {"required": [...], "preferred": [...]} (a skill listed in both is required)
+    """
+    parts = {"required": [], "preferred": []}
+    current = "required"
+    for line in job_description.splitlines():
+        if _PREFERRED_HEADING.match(line):
+            current = "preferred"
+        elif _REQUIRED_HEADING.match(line):
+            current = "required"
+        parts[current].append(line)
+    required = _skill_set("\n".join(parts["required"]))
+    preferred = _skill_set("\n".join(parts["preferred"])) - required
+    return {"required": sorted(required), "preferred": sorted(preferred)}
+
+
+class _Postings:
+    """One term's postings in compact growing arrays, with NumPy copies rebuilt only after a change."""
+
+    __slots__ = ("slots", "counts", "_arrays")
+
+    def __init__(self):
+        self.slots, self.counts, self._arrays = array('q'), array('f'), None
+
+    def add(self, slot, count):
+        self.slots.append(slot)
+        self.counts.append(count)
+        self._arrays = None
+
+    def arrays(self):
+        if self._arrays is None:
+            self._arrays = (np.array(self.slots, dtype=np.int64), np.array(self.counts, dtype=np.float32))
+        return self._arrays
+
+
+class JobMatcher:
+    """
+    BM25 ranking of stored resumes against a job description - JD ke against resumes rank karte hain.
+
+    Terms are taxonomy skills and term frequencies come from the store's per-analysis skill
+    counts, kept in an inverted index (skill -> slots and counts) next to per-slot document
+    lengths. A query adds each JD skill's BM25 contribution to a score vector in one vectorized
+    step per skill, then takes the top-k with argpartition, so cost grows with the postings of
+    the JD's skills rather than with a Python loop over resumes. A re-analyzed resume gets a
+    fresh slot and its old one is masked out.
+    """
+
+    def __init__(self, store, k1=BM25_K1, b=BM25_B):
+        self.store = store
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._cursor = (0.0, 0)
+        self._postings = {}
+        self._slot_of = {}
+        self._ids = array('q')
+        self._lengths = array('f')
+        self._live = array('b')
+        self._live_count = 0
+        self._total_length = 0.0
+        self._arrays = None
+
+    def refresh(self):
+        """Apply the analyses stored since the last refresh; returns how many were applied."""
+        applied = 0
+        with self._lock:
+            for analysis_id, created_at, counts_json in self.store.iter_changes(
+                    self._cursor, columns="id, created_at, skill_counts"):
+                counts = json.loads(counts_json)
+                previous = self._slot_of.get(analysis_id)
+                if previous is not None:
+                    self._live[previous] = 0
+                    self._live_count -= 1
+                    self._total_length -= self._lengths[previous]
+                slot = self._slot_of[analysis_id] = len(self._ids)
+                self._ids.append(analysis_id)
+                length = float(sum(counts.values()))
+                self._lengths.append(length)
+                self._live.append(1)
+                self._live_count += 1
+                self._total_length += length
+                for skill, count in counts.items():
+                    postings = self._postings.get(skill)
+                    if postings is None:
+                        postings = self._postings[skill] = _Postings()
+                    postings.add(slot, count)
+                self._cursor = (created_at, analysis_id)
+                applied += 1
+            if applied:
+                self._arrays = None
+        return applied
+
+    def _doc_arrays(self):
+        if self._arrays is None:
+            self._arrays = (np.array(self._ids, dtype=np.int64), np.array(self._lengths, dtype=np.float32),
+                            np.array(self._live, dtype=bool))
+        return self._arrays
+
+    def match(self, job_description, limit=20, require_all=False):
+        """
+        Rank stored resumes against a job description.
+
+        Required skills weigh 1, preferred skills PREFERRED_SKILL_WEIGHT.
+
+        Args:
+            job_description: JD text
+            limit: Number of resumes to return
+            require_all: Only rank resumes that list every required skill
+
+        Returns:
+            dict: "skills" (required/preferred found in the JD), "candidates" (resumes with any
+            JD skill) and "results" as [{"id", "match_score"}], best first
+        """
+        skills = extract_jd_skills(job_description)
+        terms = [(skill, 1.0, True) for skill in skills["required"]]
+        terms += [(skill, PREFERRED_SKILL_WEIGHT, False) for skill in skills["preferred"]]
+        self.refresh()
+        with self._lock:
+            ids, lengths, live = self._doc_arrays()
+            if not terms or not self._live_count:
+                return {"skills": skills, "candidates": 0, "results": []}
+            average_length = max(self._total_length / self._live_count, 1e-9)
+            scores = np.zeros(len(ids), dtype=np.float32)
+            required_hits = np.zeros(len(ids), dtype=np.int16) if require_all else None
+            for skill, weight, required in terms:
+                postings = self._postings.get(skill)
+                if postings is None:
+                    continue
+                slots, counts = postings.arrays()
+                document_frequency = int(live[slots].sum())
+                idf = math.log(1 + (self._live_count - document_frequency + 0.5) / (document_frequency + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * lengths[slots] / average_length)
+                # Each slot appears once per term, so fancy-index += is safe
+                scores[slots] += weight * idf * counts * (self.k1 + 1) / (counts + norm)
+                if required_hits is not None and required:
+                    required_hits[slots] += 1
+            eligible = live & (scores > 0)
+            if required_hits is not None:
+                eligible &= required_hits == len(skills["required"])
+            candidates = np.flatnonzero(eligible)
+            candidate_scores = scores[candidates]
+
+        if len(candidates) > limit:
+            top = np.argpartition(-candidate_scores, limit - 1)[:limit]
+            candidates, candidate_scores = candidates[top], candidate_scores[top]
+        order = np.argsort(-candidate_scores, kind='stable')
+        return {
+            "skills": skills,
+            "candidates": int(eligible.sum()),
+            "results": [{"id": int(ids[candidates[i]]), "match_score": round(float(candidate_scores[i]), 4)}
+                        for i in order],
+        }
+
+
+job_matcher = JobMatcher(analysis_store) if analysis_store is not None else None
@@ -0,0 +1,74 @@
+import time
+import logging
+import importlib
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Heavy dependency name -> zero-argument loader - Bhari dependencies ke loaders
+_loaders = {}
+_loaded = {}
+_lock = threading.RLock()
+
+
+def register(name, loader):
+    """Register a loader that builds `name` on first use (an import, a model load, ...)."""
+    _loaders[name] = loader
+
+
+def register_module(name, module_path=None):
+    """Register a plain module import under `name`."""
+    register(name, lambda: importlib.import_module(module_path or name))
+
+
+def get(name):
+    """Return the loaded dependency, running its loader once per process on first use."""
+    try:
+        return _loaded[name]
+    except KeyError:
+        pass
+    with _lock:
+        if name not in _loaded:
+            start = time.perf_counter()
+            _loaded[name] = _loaders[name]()
+            logger.debug("Lazily loaded %s in %.3fs", name, time.perf_counter() - start)
+        return _loaded[name]
+
+
+def is_loaded(name):
+    return name in _loaded
+
+
+def preload(*names):
+    """
+    Load registered dependencies now (all of them by default).
+
+    gunicorn's master calls this before forking so every worker, including ones respawned
+    after max_requests, inherits the modules and models instead of loading them again.
+    """
+    for name in names or list(_loaders):
+        try:
+            get(name)
+        except Exception as e:
+            logger.error(f"Could not preload {name}: {e}")
+
+
+class LazyModule:
+    """Stand-in for a module that imports it on first attribute access: fitz = lazy_module('fitz')."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attribute):
+        return getattr(get(self._name), attribute)
+
+    def __repr__(self):
+        state = "loaded" if is_loaded(self._name) else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name, module_path=None):
+    """Register a module import (if not already registered) and return a lazy stand-in for it."""
+    if name not in _loaders:
+        register_module(name, module_path)
+    return LazyModule(name)
@@ -0,0 +1,93 @@
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fields of /proc/<pid>/smaps_rollup we report, all in kB
+_SMAPS_FIELDS = {
+    "Rss": "rss_kb",
+    "Pss": "pss_kb",
+    "Shared_Clean": "shared_clean_kb",
+    "Shared_Dirty": "shared_dirty_kb",
+    "Private_Clean": "private_clean_kb",
+    "Private_Dirty": "private_dirty_kb",
+}
+
+
+def process_memory(pid):
+    """
+    Read RSS, PSS and USS for one process from /proc (Linux only).
+
+    USS (unique set size) is the memory that would be freed if the process exited; PSS splits
+    shared pages evenly between the processes mapping them.
+
+    Returns:
+        dict or None: Memory figures in kB, or None when /proc is unavailable
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    memory = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].rstrip(':') in _SMAPS_FIELDS:
+            memory[_SMAPS_FIELDS[parts[0].rstrip(':')]] = int(parts[1])
+    memory["uss_kb"] = memory.get("private_clean_kb", 0) + memory.get("private_dirty_kb", 0)
+    return memory
+
+
+def _parent_pid(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # The command name may contain spaces; fields after the closing paren are fixed
+            return int(f.read().rsplit(')', 1)[1].split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _is_gunicorn(pid):
+    try:
+        with open(f"/proc/{pid}/cmdline", 'rb') as f:
+            return b'gunicorn' in f.read()
+    except OSError:
+        return False
+
+
+def worker_memory_report():
+    """
+    Memory of the gunicorn master and every worker it has forked, or of this process alone.
+
+    Returns:
+        dict: Per-process figures plus totals, so shared vs. unique memory can be compared
+    """
+    master = os.getppid()
+    if _is_gunicorn(master):
+        pids = [master] + sorted(
+            int(entry) for entry in os.listdir('/proc')
+            if entry.isdigit() and _parent_pid(int(entry)) == master
+        )
+    else:
+        master = None
+        pids = [os.getpid()]
+
+    processes = []
+    for pid in pids:
+        memory = process_memory(pid)
+        if memory is None:
+            continue
+        memory["pid"] = pid
+        memory["role"] = "master" if pid == master else "worker"
+        memory["current"] = pid == os.getpid()
+        processes.append(memory)
+
+    return {
+        "processes": processes,
+        "totals": {
+            "rss_kb": sum(p.get("rss_kb", 0) for p in processes),
+            "pss_kb": sum(p.get("pss_kb", 0) for p in processes),
+            "uss_kb": sum(p["uss_kb"] for p in processes),
+        }
+    }
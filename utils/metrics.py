@@ -0,0 +1,251 @@
+import os
+import json
+import time
+import uuid
+import glob
+import fcntl
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from utils.profiling import active_trace
+from utils.flusher import PeriodicFlush, process_alive
+
+logger = logging.getLogger(__name__)
+
+# Metrics configuration - Metrics ki configuration
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join('var', 'metrics'))
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '1.0'))
+
+# Histogram bucket upper bounds per metric; values above the last bound land in +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+PAGE_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+CHARACTER_BUCKETS = (500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000)
+
+HISTOGRAM_BUCKETS = {
+    "resume_stage_duration_seconds": LATENCY_BUCKETS,
+    "resume_analysis_duration_seconds": LATENCY_BUCKETS,
+    "resume_document_pages": PAGE_BUCKETS,
+    "resume_document_characters": CHARACTER_BUCKETS,
+}
+
+HELP = {
+    "resume_stage_duration_seconds": "Time spent in each analysis stage.",
+    "resume_analysis_duration_seconds": "End-to-end analysis time per document.",
+    "resume_document_pages": "Pages per analyzed PDF.",
+    "resume_document_characters": "Extracted characters per analyzed document.",
+    "resume_stage_errors_total": "Exceptions raised inside each analysis stage.",
+    "resume_analyses_total": "Analyses by outcome.",
+    "resume_cache_lookups_total": "Analysis cache lookups by result.",
+    "resume_extractor_restarts_total": "Extractor processes replaced, by reason (timeout, memory, crash, recycle).",
+    "resume_degraded_total": "Work skipped to meet the analysis deadline, by what was skipped.",
+    "resume_preflight_total": "Preflight routes (text, fallback, reject) and rejection reasons.",
+}
+
+
+class MetricsRegistry:
+    """
+    Per-process counters and histograms, periodically written to a per-process JSON file.
+
+    Every gunicorn worker and pool process owns one file in METRICS_DIR; render_prometheus()
+    sums them, so /metrics reports the whole host no matter which worker serves it. Files of
+    exited processes are folded into base.json, so recycled workers and pool processes don't
+    grow the directory. A background timer writes whatever is still unflushed when a process
+    goes idle or exits.
+    """
+
+    def __init__(self, directory=METRICS_DIR):
+        self.directory = directory
+        self._flusher = PeriodicFlush(lambda: self.maybe_flush(force=True), METRICS_FLUSH_INTERVAL, 'metrics-flush')
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self._dirty = False
+        self._last_flush = 0.0
+        # pid alone could be reused by a later worker and overwrite this one's totals
+        self._file = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+
+    def inc(self, name, labels=None, amount=1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+            self._dirty = True
+
+    def observe(self, name, value, labels=None):
+        key = (name, _label_key(labels))
+        buckets = HISTOGRAM_BUCKETS[name]
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                # One count per bucket plus +Inf, then the running sum
+                histogram = self.histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            histogram[bisect_left(buckets, value)] += 1
+            histogram[-1] += value
+            self._dirty = True
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "counters": [[name, labels, value] for (name, labels), value in self.counters.items()],
+                "histograms": [[name, labels, list(values)] for (name, labels), values in self.histograms.items()],
+            }
+
+    def maybe_flush(self, force=False):
+        """Write this process's snapshot to disk, at most once per METRICS_FLUSH_INTERVAL."""
+        self._flusher.start()
+        now = time.monotonic()
+        if not self._dirty or (not force and now - self._last_flush < METRICS_FLUSH_INTERVAL):
+            return
+        self._last_flush = now
+        # The timer thread and a request may flush at once; the later snapshot must land last
+        with self._flush_lock:
+            with self._lock:
+                self._dirty = False
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                temp_file = f"{self._file}.tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump(self.snapshot(), f)
+                os.replace(temp_file, self._file)
+            except OSError as e:
+                logger.error(f"Could not write metrics snapshot: {e}")
+
+    def collect(self):
+        """
+        Merge the snapshots of every process on the host into one set of totals. Files of
+        processes that are gone are folded into base.json and removed on the way, under a lock
+        so no reader counts one twice.
+        """
+        self.maybe_flush(force=True)
+        counters, histograms = {}, {}
+        if not os.path.isdir(self.directory):
+            return counters, histograms
+        base_path = os.path.join(self.directory, 'base.json')
+        with open(os.path.join(self.directory, 'lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            base = _load_snapshot(base_path)
+            base_counters, base_histograms = _merge_snapshot({}, {}, base)
+            folded = []
+            for path in glob.glob(os.path.join(self.directory, '*-*.json')):
+                snapshot = _load_snapshot(path)
+                if snapshot is None:
+                    continue
+                if path != self._file and not process_alive(snapshot.get("pid", 0)):
+                    _merge_snapshot(base_counters, base_histograms, snapshot)
+                    folded.append(path)
+                else:
+                    _merge_snapshot(counters, histograms, snapshot)
+            if folded:
+                temp_file = base_path + '.tmp'
+                with open(temp_file, 'w') as f:
+                    json.dump(_to_snapshot(base_counters, base_histograms), f)
+                os.replace(temp_file, base_path)
+                for path in folded:
+                    os.remove(path)
+        _merge_snapshot(counters, histograms, _to_snapshot(base_counters, base_histograms))
+        return counters, histograms
+
+    def clear_directory(self):
+        """Drop snapshots and base.json left by a previous server run (called once at gunicorn start)."""
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _load_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge_snapshot(counters, histograms, snapshot):
+    """Add one snapshot's counters and histograms to running totals keyed like the registry."""
+    for name, labels, value in (snapshot or {}).get("counters", []):
+        key = (name, tuple(map(tuple, labels)))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, values in (snapshot or {}).get("histograms", []):
+        key = (name, tuple(map(tuple, labels)))
+        merged = histograms.get(key)
+        histograms[key] = list(values) if merged is None else [a + b for a, b in zip(merged, values)]
+    return counters, histograms
+
+
+def _to_snapshot(counters, histograms):
+    return {
+        "counters": [[name, labels, value] for (name, labels), value in counters.items()],
+        "histograms": [[name, labels, values] for (name, labels), values in histograms.items()],
+    }
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+def render_prometheus():
+    """Render the merged metrics in the Prometheus text exposition format."""
+    counters, histograms = registry.collect()
+    lines = []
+
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# HELP {name} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} counter")
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for name in sorted({name for name, _ in histograms}):
+        buckets = HISTOGRAM_BUCKETS.get(name)
+        if buckets is None:
+            continue
+        lines.append(f"# HELP {name} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} histogram")
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ["+Inf"], values[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', bound))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {values[-1]}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+# A forked child must start from zero, or the parent's counts would be reported twice
+os.register_at_fork(after_in_child=registry._reset)
+
+
+@contextmanager
+def stage(name):
+    """Time one analysis stage and count its errors - Har stage ka time aur errors record karte hain."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        registry.inc("resume_stage_errors_total", {"stage": name})
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe("resume_stage_duration_seconds", elapsed, {"stage": name})
+        trace = active_trace()
+        if trace is not None:
+            trace.add_stage(name, elapsed)
@@ -0,0 +1,261 @@
+import os
+import time
+import logging
+from datetime import datetime
+
+from utils.skill_classifier import classify_skills_enhanced, attach_skill_recommendations
+from utils.scoring import score_resume, WEIGHTS
+from utils.feedback import generate_enhanced_feedback
+from utils.section_extractor import extract_sections
+from utils.process_pool import get_pool, ANALYSIS_OFFLOAD
+from utils.metrics import registry, stage
+from utils.logging_setup import SAMPLED
+from utils.profiling import active_trace, request_trace, profiling_active
+from utils.slow_capture import is_slow, capture
+from utils.sampler import sampled
+from utils.deadline import Deadline, deadline_scope, ANALYSIS_DEADLINE_SECONDS
+from utils.extractor_pool import extractor_pool, ExtractorFailed, EXTRACTOR_POOL_ENABLED
+from utils.preflight import extract_routed, PreflightRejected
+from utils.analysis_cache import file_content_hash
+from utils.analysis_store import analysis_store
+from utils.dedup import minhash, band_keys, find_near_duplicate, DEDUP_ENABLED
+from utils.score_distribution import score_distribution, attach_percentiles
+from utils.fleet_stats import fleet_stats
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionError(Exception):
+    """Raised when no text could be extracted from an uploaded document."""
+
+
+class DocumentRejected(ExtractionError):
+    """Raised when preflight rejects a document before extraction; `reason` says why."""
+
+    def __init__(self, message, reason):
+        super().__init__(message)
+        self.reason = reason
+
+    def __reduce__(self):
+        # Crosses the analysis pool boundary, which pickles exceptions by their args alone
+        return type(self), (str(self), self.reason)
+
+
+def _extract_document(filepath, file_extension, stats):
+    """Preflight and run the parser in a sandboxed extractor process when the pool is enabled, else in this process."""
+    try:
+        # Under the profiler extraction stays here, or cProfile and tracemalloc would miss it
+        if EXTRACTOR_POOL_ENABLED and not profiling_active():
+            return extractor_pool.extract(filepath, file_extension, stats)
+        return extract_routed(filepath, file_extension, stats)
+    except ExtractorFailed as e:
+        raise ExtractionError(f"The document could not be processed safely ({e.reason}). "
+                              "It might be malformed or too complex.") from e
+    except PreflightRejected as e:
+        raise DocumentRejected(str(e), e.reason) from e
+    finally:
+        report = stats.get("preflight") if stats is not None else None
+        if report:
+            labels = {"route": report["route"]}
+            if "reason" in report:
+                labels["reason"] = report["reason"]
+            registry.inc("resume_preflight_total", labels)
+            registry.observe("resume_stage_duration_seconds", report["seconds"], {"stage": "preflight"})
+            trace = active_trace()
+            if trace is not None:
+                trace.add_stage("preflight", report["seconds"])
+
+
+def extract_text(filepath, file_extension, stats=None):
+    """
+    Extract text from a saved upload based on its extension - Extension ke hisab se text extract karte hain.
+
+    Every document is preflighted first (see utils.preflight). For PDFs an optional stats dict
+    receives the preflight report, the page count and the extraction methods used.
+
+    Raises:
+        DocumentRejected: If preflight found the document cannot yield any text
+        ExtractionError: If the extractor process timed out, ran out of memory or crashed
+    """
+    if file_extension == 'pdf':
+        logger.debug("Extracting text from PDF...")
+        with stage('extract_pdf'):
+            text = _extract_document(filepath, file_extension, stats)
+        if stats and "pages" in stats:
+            registry.observe("resume_document_pages", stats["pages"])
+        trace = active_trace()
+        if trace is not None and stats is not None:
+            trace.extraction = stats
+        return text
+    if file_extension in ['docx', 'doc']:
+        logger.debug("Extracting text from DOCX/DOC...")
+        with stage('extract_docx'):
+            return _extract_document(filepath, file_extension, stats)
+    return None
+
+
+def analyze_text(text):
+    """
+    Run every analysis stage on already extracted resume text.
+
+    Returns:
+        dict: The skills, score (with its breakdown), feedback and sections parts of the /analyze response.
+    """
+    # Classify skills with enhanced analysis - Enhanced analysis ke saath skills classify karte hain
+    with stage('classify_skills'):
+        skills_data = classify_skills_enhanced(text)
+    skills = skills_data["skills_by_category"]
+    skill_count = skills_data["statistics"]["total_skills"]
+    avg_confidence = skills_data["statistics"]["average_confidence"]
+    logger.debug("Enhanced skills classified: %d skills found (avg confidence: %s)", skill_count, avg_confidence, extra=SAMPLED)
+
+    # Extract sections - Sections extract karte hain
+    with stage('extract_sections'):
+        sections = extract_sections(text)
+    logger.debug("Sections found: %s", sections, extra=SAMPLED)
+
+    # Calculate enhanced score with detailed analysis - Enhanced score detailed analysis ke saath calculate karte hain
+    with stage('score'):
+        score_data = score_resume(sections, WEIGHTS, text)
+    score = score_data["overall_score"]
+    logger.debug("Enhanced score calculated: %s (Grade: %s)", score, score_data['grade'], extra=SAMPLED)
+
+    # Generate enhanced feedback - Enhanced feedback generate karte hain
+    with stage('feedback'):
+        feedback = generate_enhanced_feedback(sections, score_data, text)
+    logger.debug("Enhanced feedback generated: %d items", len(feedback), extra=SAMPLED)
+
+    return {
+        "skills": skills,
+        "score": score,
+        "score_breakdown": score_data["breakdown"],
+        "feedback": feedback,
+        "skill_recommendations": skills_data["recommendations"],
+        "sections_found": sections,
+    }
+
+
+def analyze_file(filepath, filename, start_time=None, deadline_seconds=None, store=True):
+    """
+    Extract and analyze a saved upload, returning the full /analyze response body.
+
+    The analysis runs under a deadline counted from start_time. Stages cut optional work short
+    when their budget runs out, and the response then carries a `degraded` marker listing it.
+
+    Args:
+        filepath: Path of the saved upload on disk
+        filename: Original (secured) file name, used for the extension and metadata
+        start_time: When the request started; defaults to now
+        deadline_seconds: Overall deadline; defaults to ANALYSIS_DEADLINE_SECONDS
+        store: Whether to count the analysis in the store, score distribution and fleet stats (when enabled)
+
+    With the store and deduplication enabled, a document whose text is a near-duplicate of a
+    stored analysis (see utils.dedup) is not analyzed again: the stored result is returned with
+    a `duplicate_of` marker and the upload is recorded against it.
+
+    Raises:
+        DocumentRejected: If preflight rejects the document
+        ExtractionError: If the document yields no text
+    """
+    start_time = start_time or datetime.now()
+    started = time.perf_counter()
+    file_extension = filename.rsplit('.', 1)[1].lower()
+    # Time already spent uploading or queueing for the pool counts against the deadline
+    waited = (datetime.now() - start_time).total_seconds()
+    if deadline_seconds is None:
+        deadline_seconds = ANALYSIS_DEADLINE_SECONDS
+    deadline = Deadline(max(0.0, deadline_seconds - waited))
+
+    status = "error"
+    text = None
+    signature = duplicate = None
+    with sampled(), request_trace() as trace, deadline_scope(deadline):
+        try:
+            stats = {}
+            try:
+                text = extract_text(filepath, file_extension, stats)
+            except DocumentRejected:
+                status = "rejected"
+                raise
+            if not text:
+                status = "no_text"
+                raise ExtractionError("Could not extract text from the file. It might be corrupted, password-protected, or contain only images.")
+
+            registry.observe("resume_document_characters", len(text))
+            response_data = None
+            if store and analysis_store is not None and DEDUP_ENABLED:
+                with stage('dedup'):
+                    signature = minhash(text)
+                    duplicate = find_near_duplicate(analysis_store, signature) if signature is not None else None
+                    if duplicate is not None:
+                        response_data = analysis_store.get(duplicate["id"])
+            if response_data is not None:
+                # The stored recommendations are as old as the stored analysis
+                attach_skill_recommendations(response_data)
+                response_data["duplicate_of"] = {key: duplicate[key] for key in ("id", "file_name", "similarity")}
+                status = "duplicate"
+            else:
+                duplicate = None
+                response_data = analyze_text(text)
+                status = "success"
+        finally:
+            elapsed = time.perf_counter() - started
+            registry.inc("resume_analyses_total", {"status": status})
+            if status == "success":
+                registry.observe("resume_analysis_duration_seconds", elapsed)
+            for skipped in deadline.skipped:
+                registry.inc("resume_degraded_total", {"skipped": skipped})
+            # Successes are counted below, once their metadata is complete
+            if store and fleet_stats is not None and status != "success":
+                fleet_stats.record(status, stats=stats)
+            if is_slow(elapsed):
+                capture(filepath, filename, elapsed, trace, status, len(text) if text else None)
+            registry.maybe_flush()
+
+    # One summary line per analysis; the per-stage detail is DEBUG and sampled
+    logger.info("Analyzed %s: %d characters, score %s in %.3fs", filename, len(text),
+                response_data["score"], elapsed,
+                extra={"file_name": filename, "characters": len(text), "score": response_data["score"],
+                       "duration": round(elapsed, 4)})
+
+    if deadline.degraded:
+        logger.warning("Analysis of %s degraded to meet its %.1fs deadline: skipped %s",
+                       filename, deadline.seconds, ", ".join(deadline.skipped))
+        response_data["degraded"] = deadline.marker()
+
+    response_data["analysis_metadata"] = {
+        "file_name": filename,
+        "file_size": os.path.getsize(filepath),
+        "text_length": len(text),
+        "processing_time": (datetime.now() - start_time).total_seconds(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+    # Degraded analyses are partial, so like the cache the store keeps only complete ones
+    if store and fleet_stats is not None and status == "success":
+        fleet_stats.record(status, response_data, stats)
+    if store and score_distribution is not None and status == "success" and not deadline.degraded:
+        score_distribution.record(response_data)
+    attach_percentiles(response_data)
+    if store and analysis_store is not None and not deadline.degraded:
+        with stage('store'):
+            content_hash = file_content_hash(filepath)
+            if duplicate is None:
+                analysis_store.add(content_hash, filename, response_data, text, stats.get("pages"),
+                                   signature.tobytes() if signature is not None else None,
+                                   band_keys(signature) if signature is not None else ())
+            elif duplicate["content_hash"] != content_hash:
+                analysis_store.add_duplicate(content_hash, duplicate["id"], filename, duplicate["similarity"])
+    return response_data
+
+
+def run_analysis(filepath, filename, start_time=None, deadline_seconds=None):
+    """
+    Analyze a saved upload in this process, or on the warm analysis pool when offloading is on.
+
+    Only the file path goes to the pool and only the response dict comes back; the pool process
+    extracts the text itself, so the document text is never pickled or copied between processes.
+    """
+    if ANALYSIS_OFFLOAD:
+        return get_pool().submit(analyze_file, filepath, filename, start_time, deadline_seconds).result()
+    return analyze_file(filepath, filename, start_time, deadline_seconds)
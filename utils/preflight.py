@@ -0,0 +1,163 @@
+import os
+import time
+import zipfile
+import logging
+
+from parser.resume_parser import fitz, extract_text_from_pdf, extract_text_from_docx
+from utils.deadline import EXTRACT_MAX_PAGES
+
+logger = logging.getLogger(__name__)
+
+# Preflight configuration - Preflight checks ki configuration
+PREFLIGHT_SAMPLE_PAGES = int(os.environ.get('PREFLIGHT_SAMPLE_PAGES', '2'))
+# A sampled page with fewer characters than this doesn't count as having a text layer
+PREFLIGHT_MIN_PAGE_CHARACTERS = int(os.environ.get('PREFLIGHT_MIN_PAGE_CHARACTERS', '20'))
+# Text-less sampled pages covered at least this much by images are a scan: rejected without reading further pages
+PREFLIGHT_SCAN_COVERAGE = float(os.environ.get('PREFLIGHT_SCAN_COVERAGE', '0.8'))
+
+PDF_MAGIC = b'%PDF-'
+ZIP_MAGIC = b'PK\x03\x04'
+# Encrypted Office files (and legacy .doc) are OLE compound files, not zips
+OLE_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+REJECT_MESSAGES = {
+    "empty": "The file is empty.",
+    "not_pdf": "The file is not a valid PDF.",
+    "not_docx": "The file is not a valid DOCX document. Legacy .doc files must be saved as .docx first.",
+    "encrypted": "The document is password-protected. Please upload an unprotected copy.",
+    "unreadable": "The PDF could not be opened. It might be corrupted.",
+    "no_pages": "The PDF has no pages.",
+    "no_text_layer": "The PDF has no text layer (it looks like a scanned image). Please upload a text-based PDF.",
+}
+
+
+class PreflightRejected(Exception):
+    """Raised when preflight finds that a document cannot yield any text."""
+
+    def __init__(self, reason, report=None):
+        super().__init__(REJECT_MESSAGES[reason])
+        self.reason = reason
+        self.report = report or {}
+
+
+def _image_coverage(page):
+    """Fraction of the page area covered by images (overlaps counted twice, capped at 1)."""
+    area = abs(page.rect)
+    if not area:
+        return 0.0
+    covered = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+    return min(1.0, covered / area)
+
+
+def _preflight_pdf(filepath, report):
+    with open(filepath, 'rb') as f:
+        head = f.read(1024)
+    # The spec allows junk before the header, and some generators write it
+    if PDF_MAGIC not in head:
+        raise PreflightRejected("not_pdf" if head else "empty", report)
+
+    try:
+        doc = fitz.open(filepath)
+    except Exception as e:
+        logger.warning("Preflight could not open %s: %s", os.path.basename(filepath), e)
+        raise PreflightRejected("unreadable", report)
+    with doc:
+        # An encrypted PDF with an empty user password opens fine; only a real password stops extraction
+        report["encrypted"] = bool(doc.is_encrypted or doc.needs_pass)
+        if doc.needs_pass and not doc.authenticate(""):
+            raise PreflightRejected("encrypted", report)
+        report["pages"] = len(doc)
+        if not len(doc):
+            raise PreflightRejected("no_pages", report)
+
+        sample = range(min(PREFLIGHT_SAMPLE_PAGES, len(doc)))
+        characters = [len(doc[number].get_text("text").strip()) for number in sample]
+        report["sample_characters"] = sum(characters)
+
+        if all(count >= PREFLIGHT_MIN_PAGE_CHARACTERS for count in characters):
+            report["route"] = "text"
+            return report
+        if not any(characters):
+            # Scanned pages are images edge to edge; blank or cover pages aren't, so those get a look further in
+            report["image_coverage"] = round(sum(_image_coverage(doc[number]) for number in sample) / len(sample), 3)
+            if report["image_coverage"] >= PREFLIGHT_SCAN_COVERAGE:
+                raise PreflightRejected("no_text_layer", report)
+            # Only a text layer further in (within the extraction limit) can save it
+            for number in range(len(sample), min(len(doc), EXTRACT_MAX_PAGES)):
+                if doc[number].get_text("text").strip():
+                    break
+            else:
+                raise PreflightRejected("no_text_layer", report)
+        # A thin or partial text layer: let the structured methods look at every page
+        report["route"] = "fallback"
+        return report
+
+
+def _preflight_docx(filepath, report):
+    with open(filepath, 'rb') as f:
+        head = f.read(8)
+    if not head:
+        raise PreflightRejected("empty", report)
+    if head.startswith(OLE_MAGIC):
+        # Either a password-protected DOCX or a legacy binary .doc; python-docx can read neither
+        raise PreflightRejected("encrypted" if filepath.lower().endswith('.docx') else "not_docx", report)
+    if not head.startswith(ZIP_MAGIC):
+        raise PreflightRejected("not_docx", report)
+    try:
+        with zipfile.ZipFile(filepath) as archive:
+            if 'word/document.xml' not in archive.namelist():
+                raise PreflightRejected("not_docx", report)
+    except zipfile.BadZipFile:
+        raise PreflightRejected("not_docx", report)
+    report["route"] = "text"
+    return report
+
+
+def preflight(filepath, file_extension):
+    """
+    Classify a document cheaply before full extraction - Full parsing se pehle document ko jaldi classify karte hain.
+
+    Checks the magic bytes, and for PDFs the encryption, page count and a text sample from the first
+    PREFLIGHT_SAMPLE_PAGES pages. When those pages have no text at all, how much of them images
+    cover tells a scan (rejected at once) from blank leading pages (the rest are checked too).
+
+    Returns:
+        dict: The report, with "route" set to "text" (a text layer is present, plain extraction
+        is enough) or "fallback" (run the full structured extraction cascade)
+
+    Raises:
+        PreflightRejected: If the document cannot yield any text
+    """
+    started = time.perf_counter()
+    report = {"route": "reject"}
+    try:
+        if file_extension == 'pdf':
+            return _preflight_pdf(filepath, report)
+        return _preflight_docx(filepath, report)
+    except PreflightRejected as e:
+        report["reason"] = e.reason
+        raise
+    finally:
+        report["seconds"] = round(time.perf_counter() - started, 4)
+
+
+def extract_routed(filepath, file_extension, stats=None):
+    """
+    Preflight a document and extract its text along the route preflight picked.
+
+    The preflight report ends up in stats["preflight"].
+
+    Raises:
+        PreflightRejected: If the document cannot yield any text
+    """
+    if stats is None:
+        stats = {}
+    try:
+        report = preflight(filepath, file_extension)
+    except PreflightRejected as e:
+        stats["preflight"] = e.report
+        raise
+    stats["preflight"] = report
+    if file_extension == 'pdf':
+        return extract_text_from_pdf(filepath, stats, fast=report["route"] == "text")
+    return extract_text_from_docx(filepath)
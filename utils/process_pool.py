@@ -0,0 +1,59 @@
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.extractor_pool import extractor_pool, EXTRACTOR_POOL_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# Pool configuration - Process pool ki configuration
+ANALYSIS_POOL_WORKERS = int(os.environ.get('ANALYSIS_POOL_WORKERS', os.cpu_count() or 2))
+# 'fork' lets pool processes inherit the already imported pipeline instead of importing it again
+ANALYSIS_POOL_START_METHOD = os.environ.get('ANALYSIS_POOL_START_METHOD', 'fork')
+# 'hybrid' serves requests on threads and runs the CPU-heavy stages on the pool - Hybrid mode mein CPU kaam pool pe chalta hai
+SERVING_MODE = os.environ.get('SERVING_MODE', 'sync').lower()
+ANALYSIS_OFFLOAD = os.environ.get('ANALYSIS_OFFLOAD', str(SERVING_MODE == 'hybrid')).lower() == 'true'
+
+_pool = None
+_pool_pid = None
+
+
+def get_pool():
+    """Return this process's analysis pool, creating it on first use - Pool pehli baar use par banate hain."""
+    global _pool, _pool_pid
+    # A pool inherited through fork (e.g. a gunicorn worker) belongs to the parent, never reuse it
+    if _pool is None or _pool_pid != os.getpid():
+        context = multiprocessing.get_context(ANALYSIS_POOL_START_METHOD)
+        _pool = ProcessPoolExecutor(max_workers=ANALYSIS_POOL_WORKERS, mp_context=context)
+        _pool_pid = os.getpid()
+        logger.info(f"Analysis pool started with {ANALYSIS_POOL_WORKERS} workers ({ANALYSIS_POOL_START_METHOD})")
+    return _pool
+
+
+def _warm_process():
+    # Analyses run here, so this process owns the extractors they use
+    if EXTRACTOR_POOL_ENABLED:
+        extractor_pool.start()
+    # Hold the slot briefly so each warm-up job forces a separate process to start
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def start_pool():
+    """Start every pool process up front so no request pays for a fork - Saare pool processes pehle se start karte hain."""
+    pool = get_pool()
+    futures = [pool.submit(_warm_process) for _ in range(ANALYSIS_POOL_WORKERS)]
+    pids = {future.result() for future in futures}
+    logger.info(f"Analysis pool warm: {len(pids)} processes ready")
+    return pool
+
+
+def shutdown_pool(wait=True):
+    """Shut down the analysis pool if this process owns one."""
+    global _pool, _pool_pid
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown(wait=wait, cancel_futures=True)
+    _pool = None
+    _pool_pid = None
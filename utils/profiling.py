@@ -0,0 +1,117 @@
+import io
+import time
+import pstats
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Trace of the analysis running in this context, if any - Chal rahi analysis ka trace
+_active_trace = ContextVar('active_trace', default=None)
+# Whether profile_call() is running in this context - Profiler chal raha hai ya nahi
+_profiling = ContextVar('profiling', default=False)
+
+
+class RequestTrace:
+    """
+    Per-request breakdown filled in by the pipeline.
+
+    Stage timings and extraction stats are always cheap to collect; per-pattern timing is only
+    switched on for profiled requests.
+    """
+
+    def __init__(self, time_patterns=True):
+        self.time_patterns = time_patterns
+        self.stages = {}
+        self.patterns = {}
+        self.extraction = {}
+
+    def add_stage(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_pattern(self, pattern, seconds):
+        total, calls = self.patterns.get(pattern, (0.0, 0))
+        self.patterns[pattern] = (total + seconds, calls + 1)
+
+
+def active_trace():
+    """The RequestTrace of the analysis running in this context, or None outside the pipeline."""
+    return _active_trace.get()
+
+
+def profiling_active():
+    """Whether this context runs under profile_call(), so work must stay in this process to be profiled."""
+    return _profiling.get()
+
+
+@contextmanager
+def request_trace():
+    """Yield the active trace, or a stage-only trace for the duration of the block if none is active."""
+    trace = _active_trace.get()
+    if trace is not None:
+        yield trace
+        return
+    trace = RequestTrace(time_patterns=False)
+    token = _active_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _active_trace.reset(token)
+
+
+def _top_functions(profiler, limit):
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{filename}:{line}({function})",
+            "calls": ncalls,
+            "own_seconds": round(tottime, 6),
+            "cumulative_seconds": round(cumtime, 6),
+        })
+    rows.sort(key=lambda row: row["cumulative_seconds"], reverse=True)
+    return rows[:limit]
+
+
+def profile_call(func, *args, limit=25, **kwargs):
+    """
+    Run func under cProfile and tracemalloc and return (result, report).
+
+    The report lists time per pipeline stage, the slowest functions, time per skill-classifier
+    regex pattern, which PDF extraction methods fired, and peak traced allocation. It is meant
+    for a single opted-in request: both profilers slow the call down considerably.
+    """
+    trace = RequestTrace()
+    token = _active_trace.set(trace)
+    profiling_token = _profiling.set(True)
+    profiler = cProfile.Profile()
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            profiler.disable()
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        if not already_tracing:
+            tracemalloc.stop()
+        _active_trace.reset(token)
+        _profiling.reset(profiling_token)
+
+    patterns = sorted(trace.patterns.items(), key=lambda item: item[1][0], reverse=True)
+    report = {
+        "total_seconds": round(elapsed, 6),
+        "stages": {name: round(seconds, 6) for name, seconds in trace.stages.items()},
+        "functions": _top_functions(profiler, limit),
+        "patterns": [{"pattern": pattern, "seconds": round(seconds, 6), "calls": calls}
+                     for pattern, (seconds, calls) in patterns[:limit]],
+        "extraction": trace.extraction,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+    return result, report
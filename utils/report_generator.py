@@ -1,51 +1,60 @@
-from fpdf import FPDF
 from datetime import datetime
 
+from utils import lazy_imports
+
 def sanitize_text(text):
     """Encode text to latin-1, replacing unsupported characters."""
     return text.encode('latin-1', 'replace').decode('latin-1')
 
-class PDF(FPDF):
-    def header(self):
-        self.set_text_color(255, 255, 255)
-        self.set_font('Arial', 'B', 15)
-        self.cell(0, 10, 'Smart Resume Analyzer Report', 0, 1, 'C')
-        self.ln(5)
-
-    def footer(self):
-        self.set_y(-15)
-        self.set_text_color(200, 200, 200)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
-
-    def chapter_title(self, title):
-        self.set_text_color(0, 0, 0) # Black text for readability on light gray background
-        self.set_font('Arial', 'B', 12)
-        self.set_fill_color(230, 230, 230)
-        self.cell(0, 6, title, 0, 1, 'L', 1)
-        self.ln(4)
-
-    def chapter_body(self, body):
-        self.set_font('Arial', '', 10)        
-        self.set_text_color(255, 255, 255)
-        self.multi_cell(0, 5, sanitize_text(body))
-        self.ln()
-
-    def feedback_item(self, item_text, item_type):
-        # Set color based on feedback type
-        if item_type == 'Strength':
-            self.set_text_color(34, 139, 34) # ForestGreen
-        elif item_type == 'Suggestion':
-            self.set_text_color(255, 165, 0) # Orange
-        elif item_type == 'Critical':
-            self.set_text_color(220, 20, 60) # Crimson
-        else:
-            self.set_text_color(255, 255, 255) # Default to white
-
-        self.set_font('Arial', 'B', 10)
-        self.multi_cell(0, 5, sanitize_text(f"- {item_text.replace('**', '')}"))
-        self.set_text_color(255, 255, 255) # Reset color to white
-        self.ln(2)
+def _build_pdf_class():
+    """Define the report's FPDF subclass; fpdf is only imported when the first report is generated."""
+    from fpdf import FPDF
+
+    class PDF(FPDF):
+        def header(self):
+            self.set_text_color(255, 255, 255)
+            self.set_font('Arial', 'B', 15)
+            self.cell(0, 10, 'Smart Resume Analyzer Report', 0, 1, 'C')
+            self.ln(5)
+
+        def footer(self):
+            self.set_y(-15)
+            self.set_text_color(200, 200, 200)
+            self.set_font('Arial', 'I', 8)
+            self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+
+        def chapter_title(self, title):
+            self.set_text_color(0, 0, 0) # Black text for readability on light gray background
+            self.set_font('Arial', 'B', 12)
+            self.set_fill_color(230, 230, 230)
+            self.cell(0, 6, title, 0, 1, 'L', 1)
+            self.ln(4)
+
+        def chapter_body(self, body):
+            self.set_font('Arial', '', 10)        
+            self.set_text_color(255, 255, 255)
+            self.multi_cell(0, 5, sanitize_text(body))
+            self.ln()
+
+        def feedback_item(self, item_text, item_type):
+            # Set color based on feedback type
+            if item_type == 'Strength':
+                self.set_text_color(34, 139, 34) # ForestGreen
+            elif item_type == 'Suggestion':
+                self.set_text_color(255, 165, 0) # Orange
+            elif item_type == 'Critical':
+                self.set_text_color(220, 20, 60) # Crimson
+            else:
+                self.set_text_color(255, 255, 255) # Default to white
+
+            self.set_font('Arial', 'B', 10)
+            self.multi_cell(0, 5, sanitize_text(f"- {item_text.replace('**', '')}"))
+            self.set_text_color(255, 255, 255) # Reset color to white
+            self.ln(2)
+
+    return PDF
+
+lazy_imports.register('report_pdf', _build_pdf_class)
 
 def get_feedback_type(item_text):
     if any(keyword in item_text for keyword in ['Excellent', 'strong', 'Strength', 'Good']):
@@ -58,7 +67,7 @@ def get_feedback_type(item_text):
 
 def generate_pdf_report(data):
     """Generates a PDF report from the analysis data."""
-    pdf = PDF()
+    pdf = lazy_imports.get('report_pdf')()
     pdf.add_page()
     pdf.set_fill_color(17, 24, 39) # Corresponds to --bg-dark: #111827
     pdf.rect(0, 0, 210, 297, 'F') # Draw a full-page background rectangle
@@ -69,6 +78,17 @@ def generate_pdf_report(data):
     pdf.cell(0, 10, sanitize_text(f"Analysis for: {data['analysis_metadata']['file_name']}"), 0, 1, 'L')
     pdf.set_font('Arial', '', 12)
     pdf.cell(0, 10, f"Overall Score: {data['score']:.0f}/100", 0, 1, 'L')
+    percentiles = data.get('percentiles')
+    if percentiles and percentiles.get('overall_score') is not None:
+        pdf.cell(0, 8, f"Percentile: scored higher than {percentiles['overall_score']:.0f}% of "
+                       f"{percentiles['population']} analyzed resumes", 0, 1, 'L')
+    if data.get('score_breakdown'):
+        pdf.set_font('Arial', '', 10)
+        for name, value in data['score_breakdown'].items():
+            label = name.replace('_score', '').title()
+            rank = (percentiles or {}).get(name)
+            suffix = f" (percentile {rank:.0f})" if rank is not None else ""
+            pdf.cell(0, 6, f"{label}: {value:.0f}{suffix}", 0, 1, 'L')
     pdf.ln(5)
 
     # --- Feedback Section ---
@@ -118,4 +138,5 @@ def generate_pdf_report(data):
     )
     pdf.chapter_body(meta_text)
 
-    return pdf.output(dest='S').encode('latin-1')
\ No newline at end of file
+    # fpdf2 returns the document as a bytearray; dest='S' strings were the PyFPDF 1.x API
+    return bytes(pdf.output())
\ No newline at end of file
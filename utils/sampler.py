@@ -0,0 +1,155 @@
+import os
+import sys
+import glob
+import time
+import uuid
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Sampler configuration - Sampling profiler ki configuration
+SAMPLER_ENABLED = os.environ.get('SAMPLER_ENABLED', 'true').lower() == 'true'
+SAMPLER_INTERVAL = float(os.environ.get('SAMPLER_INTERVAL', '0.02'))  # Seconds between samples (50 Hz)
+SAMPLER_FLUSH_INTERVAL = float(os.environ.get('SAMPLER_FLUSH_INTERVAL', '10'))
+SAMPLER_MAX_STACKS = int(os.environ.get('SAMPLER_MAX_STACKS', '20000'))
+SAMPLER_DIR = os.environ.get('SAMPLER_DIR', os.path.join('var', 'profiles'))
+
+_TRUNCATED = "[other stacks]"
+_start_lock = threading.Lock()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get('__name__', '?')
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StackSampler:
+    """
+    Statistical profiler that periodically records the stacks of threads running an analysis.
+
+    A daemon thread wakes every SAMPLER_INTERVAL seconds, and only if some thread is inside
+    track() does it walk those threads' frames; idle workers cost one wake-up per interval.
+    Samples are kept as collapsed stacks ("a;b;c count"), the input format of flamegraph.pl
+    and speedscope, and written to a per-process file in SAMPLER_DIR by the sampler thread.
+    """
+
+    def __init__(self, directory=SAMPLER_DIR, interval=SAMPLER_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._pid = None
+
+    def _start(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._tracked = {}
+        self.stacks = Counter()
+        self._dirty = False
+        self._file = os.path.join(self.directory, f"{self._pid}-{uuid.uuid4().hex[:8]}.folded")
+        thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        thread.start()
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            time.sleep(self.interval)
+            if self._tracked:
+                self.sample()
+            if self._dirty and time.monotonic() - last_flush >= SAMPLER_FLUSH_INTERVAL:
+                self.flush()
+                last_flush = time.monotonic()
+
+    def sample(self):
+        """Record one stack per tracked thread."""
+        frames = sys._current_frames()
+        with self._lock:
+            thread_ids = list(self._tracked)
+        for thread_id in thread_ids:
+            frame = frames.get(thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if not labels:
+                continue
+            stack = ";".join(reversed(labels))
+            with self._lock:
+                if stack not in self.stacks and len(self.stacks) >= SAMPLER_MAX_STACKS:
+                    stack = _TRUNCATED
+                self.stacks[stack] += 1
+                self._dirty = True
+
+    @contextmanager
+    def track(self):
+        """Mark the calling thread as running an analysis so it gets sampled."""
+        if self._pid != os.getpid():
+            with _start_lock:
+                # First use in this process, or a forked child whose sampler thread did not survive
+                if self._pid != os.getpid():
+                    self._start()
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._tracked[thread_id] = self._tracked.get(thread_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self._tracked[thread_id] <= 1:
+                    del self._tracked[thread_id]
+                else:
+                    self._tracked[thread_id] -= 1
+
+    def flush(self):
+        """Write this process's collapsed stacks to its file in SAMPLER_DIR."""
+        with self._lock:
+            self._dirty = False
+            stacks = list(self.stacks.items())
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_file = f"{self._file}.tmp"
+            with open(temp_file, 'w') as f:
+                for stack, count in stacks:
+                    f.write(f"{stack} {count}\n")
+            os.replace(temp_file, self._file)
+        except OSError as e:
+            logger.error(f"Could not write profiler samples: {e}")
+
+    def collapsed_stacks(self):
+        """Merge every process's samples into one collapsed-stack dump, heaviest stacks first."""
+        if self._pid == os.getpid():
+            self.flush()
+        merged = Counter()
+        for path in glob.glob(os.path.join(self.directory, '*.folded')):
+            try:
+                with open(path) as f:
+                    for line in f:
+                        stack, _, count = line.rstrip('\n').rpartition(' ')
+                        if stack and count.isdigit():
+                            merged[stack] += int(count)
+            except OSError:
+                continue
+        return "".join(f"{stack} {count}\n" for stack, count in merged.most_common())
+
+    def clear_directory(self):
+        """Drop samples left by a previous server run (called once at gunicorn start)."""
+        for path in glob.glob(os.path.join(self.directory, '*.folded')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+sampler = StackSampler()
+
+
+@contextmanager
+def sampled():
+    """Sample the enclosed analysis when the always-on profiler is enabled."""
+    if not SAMPLER_ENABLED:
+        yield
+        return
+    with sampler.track():
+        yield
@@ -0,0 +1,260 @@
+import os
+import json
+import math
+import time
+import glob
+import uuid
+import fcntl
+import random
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+
+from utils.flusher import PeriodicFlush, process_alive
+
+logger = logging.getLogger(__name__)
+
+# Score distribution configuration - Score distribution ki configuration
+SCORE_SKETCH_ENABLED = os.environ.get('SCORE_SKETCH_ENABLED', 'true').lower() == 'true'
+SCORE_SKETCH_DIR = os.environ.get('SCORE_SKETCH_DIR', os.path.join('var', 'score_sketches'))
+SCORE_SKETCH_K = int(os.environ.get('SCORE_SKETCH_K', '200'))
+# How stale the merged view of every process's sketch may get, and how often this process writes its own
+SCORE_SKETCH_REFRESH_SECONDS = float(os.environ.get('SCORE_SKETCH_REFRESH_SECONDS', '5'))
+SCORE_SKETCH_FLUSH_SECONDS = float(os.environ.get('SCORE_SKETCH_FLUSH_SECONDS', '1'))
+# Percentiles of a tiny population say nothing, so they are left out below this
+SCORE_PERCENTILE_MIN_POPULATION = int(os.environ.get('SCORE_PERCENTILE_MIN_POPULATION', '50'))
+
+COMPONENTS = ("overall_score", "section_score", "structure_score", "content_score", "impact_score")
+
+
+class KLLSketch:
+    """
+    Mergeable streaming quantile sketch (KLL) - Streaming quantile sketch.
+
+    Level h holds items that each stand for 2**h observations. A full level is sorted and every
+    other item (from a random offset) is promoted, so n observations fit in O(k log(n/k))
+    items with rank error around 1/k. Two sketches merge by concatenating levels and compacting.
+    """
+
+    def __init__(self, k=SCORE_SKETCH_K, levels=None, count=0):
+        self.k = k
+        self.levels = levels or [[]]
+        self.count = count
+        self._random = random.Random()
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items = sorted(self.levels[level])
+                # An odd item out stays behind, so weights still add up
+                keep = [items.pop()] if len(items) % 2 else []
+                self.levels[level + 1].extend(items[self._random.randint(0, 1)::2])
+                self.levels[level] = keep
+            level += 1
+
+    def add(self, value):
+        self.levels[0].append(float(value))
+        self.count += 1
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compact()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self._compact()
+
+    def cdf(self):
+        """Sorted values and their cumulative weights, for rank lookups."""
+        weighted = sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+        values, cumulative, total = [], [], 0
+        for value, weight in weighted:
+            total += weight
+            values.append(value)
+            cumulative.append(total)
+        return values, cumulative
+
+    def to_dict(self):
+        return {"k": self.k, "count": self.count, "levels": self.levels}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["k"], [list(items) for items in data["levels"]], data["count"])
+
+
+def percentile_rank(values, cumulative, value):
+    """Percent of the population below `value`, counting ties as half below, from KLLSketch.cdf()."""
+    if not cumulative:
+        return None
+    below_end, tie_end = bisect_left(values, value), bisect_right(values, value)
+    below = cumulative[below_end - 1] if below_end else 0
+    through = cumulative[tie_end - 1] if tie_end else 0
+    return round(100.0 * (below + (through - below) / 2) / cumulative[-1], 1)
+
+
+class ScoreDistribution:
+    """
+    Population of overall and component scores, as one KLL sketch per score - Score population ka sketch.
+
+    Each process adds its own analyses to its own sketches and writes them to a per-process
+    file in SCORE_SKETCH_DIR, like the metrics registry. Readers merge every file at most once
+    per SCORE_SKETCH_REFRESH_SECONDS, so a percentile lookup is a binary search over a few
+    hundred items, whatever the population. Files of exited processes are folded into
+    base.json, so the population survives restarts without the file count growing. Sketches
+    still unwritten when a process goes idle or exits are written by a background timer.
+    """
+
+    def __init__(self, directory=SCORE_SKETCH_DIR):
+        self.directory = directory
+        self._flusher = PeriodicFlush(lambda: self.flush(force=True), SCORE_SKETCH_FLUSH_SECONDS, 'score-sketch-flush')
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._sketches = {name: KLLSketch() for name in COMPONENTS}
+        self._dirty = False
+        self._last_flush = 0.0
+        self._merged = None
+        self._merged_at = -math.inf
+        self._file = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+
+    def record(self, response_data):
+        """Add one complete analysis's scores."""
+        scores = {"overall_score": response_data["score"], **response_data.get("score_breakdown", {})}
+        with self._lock:
+            for name, sketch in self._sketches.items():
+                if name in scores:
+                    sketch.add(scores[name])
+            self._dirty = True
+        self._flusher.start()
+        self.flush()
+
+    def flush(self, force=False):
+        """Write this process's sketches to disk, at most once per SCORE_SKETCH_FLUSH_SECONDS."""
+        now = time.monotonic()
+        if not self._dirty or (not force and now - self._last_flush < SCORE_SKETCH_FLUSH_SECONDS):
+            return
+        self._last_flush = now
+        # The timer thread and a request may flush at once; the later snapshot must land last
+        with self._flush_lock:
+            with self._lock:
+                snapshot = {"pid": os.getpid(), "sketches": {name: s.to_dict() for name, s in self._sketches.items()}}
+                self._dirty = False
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                temp_file = f"{self._file}.tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump(snapshot, f)
+                os.replace(temp_file, self._file)
+            except OSError as e:
+                logger.error(f"Could not write score sketch: {e}")
+
+    def _collect(self):
+        """
+        Merge every process's sketches. Files of processes that are gone are folded into
+        base.json and removed on the way, under a lock so no reader counts one twice.
+        """
+        merged = {name: KLLSketch() for name in COMPONENTS}
+        if not os.path.isdir(self.directory):
+            return merged
+        base_path = os.path.join(self.directory, 'base.json')
+        with open(os.path.join(self.directory, 'lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            base = _load_sketches(base_path)
+            folded = []
+            for path in glob.glob(os.path.join(self.directory, '*-*.json')):
+                try:
+                    with open(path) as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                exited = path != self._file and not process_alive(snapshot.get("pid", 0))
+                for name, data in snapshot["sketches"].items():
+                    target = base.setdefault(name, KLLSketch()) if exited else merged.get(name)
+                    if target is not None:
+                        target.merge(KLLSketch.from_dict(data))
+                if exited:
+                    folded.append(path)
+            for name, sketch in base.items():
+                if name in merged:
+                    merged[name].merge(sketch)
+            if folded:
+                temp_file = base_path + '.tmp'
+                with open(temp_file, 'w') as f:
+                    json.dump({"sketches": {name: s.to_dict() for name, s in base.items()}}, f)
+                os.replace(temp_file, base_path)
+                for path in folded:
+                    os.remove(path)
+        return merged
+
+    def _merged_view(self):
+        now = time.monotonic()
+        if self._merged is not None and now - self._merged_at < SCORE_SKETCH_REFRESH_SECONDS:
+            return self._merged
+        self.flush(force=True)
+        try:
+            merged = self._collect()
+        except OSError as e:
+            logger.error(f"Could not read score sketches: {e}")
+            merged = {name: KLLSketch() for name in COMPONENTS}
+        self._merged = {name: (sketch.count, *sketch.cdf()) for name, sketch in merged.items()}
+        self._merged_at = now
+        return self._merged
+
+    def percentiles(self, response_data):
+        """
+        Percentile rank of an analysis's overall and component scores in the analyzed population.
+
+        Returns:
+            dict: {"population": N, "overall_score": pct, "section_score": pct, ...}, or None while
+            the population is smaller than SCORE_PERCENTILE_MIN_POPULATION
+        """
+        merged = self._merged_view()  # this process's own file was just flushed
+        population = merged["overall_score"][0]
+        if population < SCORE_PERCENTILE_MIN_POPULATION:
+            return None
+        scores = {"overall_score": response_data["score"], **response_data.get("score_breakdown", {})}
+        result = {"population": population}
+        for name in COMPONENTS:
+            if name in scores:
+                count, values, cumulative = merged[name]
+                if count:
+                    result[name] = percentile_rank(values, cumulative, scores[name])
+        return result
+
+
+def attach_percentiles(response_data):
+    """Set (or drop a stale) `percentiles` entry on an /analyze response body."""
+    if score_distribution is None:
+        return response_data
+    ranks = score_distribution.percentiles(response_data)
+    if ranks is None:
+        response_data.pop("percentiles", None)
+    else:
+        response_data["percentiles"] = ranks
+    return response_data
+
+
+def _load_sketches(path):
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {name: KLLSketch.from_dict(data) for name, data in snapshot.get("sketches", {}).items()}
+
+
+score_distribution = ScoreDistribution() if SCORE_SKETCH_ENABLED else None
+if score_distribution is not None:
+    # A forked child must start from empty sketches, or the parent's scores would be counted twice
+    os.register_at_fork(after_in_child=score_distribution._reset)
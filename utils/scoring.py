@@ -1,6 +1,9 @@
 import re
 from typing import Dict, List, Tuple
 
+# Bump whenever scoring or feedback logic changes so cached analyses are invalidated
+SCORING_VERSION = "2.0"
+
 def calculate_content_score(text: str) -> float:
     """
     Calculate content quality score based on resume content analysis.
@@ -0,0 +1,268 @@
+import os
+import re
+import json
+import math
+import zlib
+import fcntl
+import logging
+import threading
+from collections import Counter
+
+from utils import lazy_imports
+from utils.analysis_store import analysis_store
+
+logger = logging.getLogger(__name__)
+
+np = lazy_imports.lazy_module('numpy')
+
+# Similar-candidates configuration - Similar candidates index ki configuration
+SIMILAR_INDEX_PATH = os.environ.get('SIMILAR_INDEX_PATH', os.path.join('var', 'similar_index'))
+SIMILAR_DIMENSIONS = int(os.environ.get('SIMILAR_DIMENSIONS', '1024'))
+SIMILAR_BLOCK_ROWS = int(os.environ.get('SIMILAR_BLOCK_ROWS', '65536'))
+# Coarse clustering pre-filter for very large pools: 0 disables it
+SIMILAR_CLUSTERS = int(os.environ.get('SIMILAR_CLUSTERS', '0'))
+SIMILAR_PROBES = int(os.environ.get('SIMILAR_PROBES', '8'))
+SIMILAR_CLUSTER_SAMPLE = 20000
+SIMILAR_CLUSTER_ITERATIONS = 10
+
+# Each feature group is normalized on its own, then weighted, so long resumes' text can't drown out skills
+FEATURE_WEIGHTS = {"skill": 0.55, "section": 0.15, "text": 0.3}
+_WORD = re.compile(r'[a-z][a-z0-9+#]+')
+_CHANGE_COLUMNS = ("id, created_at, skills, sections, "
+                   "(SELECT text FROM analysis_documents d WHERE d.id = analyses.id)")
+
+
+def _hashed(tokens, dimensions):
+    """Signed feature hashing of token counts (sublinear tf) into a unit vector, or None without tokens."""
+    if not tokens:
+        return None
+    indexes, values = [], []
+    for token, count in Counter(tokens).items():
+        h = zlib.crc32(token.encode())
+        indexes.append(h % dimensions)
+        values.append((1.0 + math.log(count)) * (1.0 if h & 0x80000000 else -1.0))
+    vector = np.bincount(indexes, weights=values, minlength=dimensions).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+def feature_vector(skills, sections, text, dimensions=SIMILAR_DIMENSIONS):
+    """
+    Fixed-width hashed feature vector of one analysis - Resume ka hashed feature vector.
+
+    Skill IDs, found-section flags and the text's word unigrams and bigrams are hashed into
+    one float32 vector of unit length, so cosine similarity is a dot product.
+    """
+    words = _WORD.findall(text.lower())
+    groups = {
+        "skill": ["skill:" + skill.lower() for skill_list in skills.values() for skill in skill_list],
+        "section": ["section:" + name for name, found in sections.items() if found],
+        "text": words + [f"{a} {b}" for a, b in zip(words, words[1:])],
+    }
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for name, tokens in groups.items():
+        part = _hashed(tokens, dimensions)
+        if part is not None:
+            vector += FEATURE_WEIGHTS[name] * part
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _top(similarities, rows, limit, best):
+    """Merge one block's best `limit` (similarity, row) pairs into `best`."""
+    if len(rows) > limit:
+        keep = np.argpartition(-similarities, limit - 1)[:limit]
+        similarities, rows = similarities[keep], rows[keep]
+    best.extend(zip(similarities.tolist(), rows.tolist()))
+    best.sort(key=lambda pair: -pair[0])
+    del best[limit:]
+
+
+class SimilarityIndex:
+    """
+    k-NN over hashed feature vectors of stored analyses - "Find similar candidates" ka index.
+
+    Vectors live in an append-only float32 file under SIMILAR_INDEX_PATH, memory-mapped by
+    every process, with a parallel file of analysis ids. Whichever process refreshes first
+    appends the analyses stored since the last refresh (under a file lock); the others just
+    map the longer file. Queries compute cosine similarity block by block (SIMILAR_BLOCK_ROWS
+    rows at a time), so memory stays bounded however large the pool grows. With
+    SIMILAR_CLUSTERS set, rows are also assigned to spherical k-means centroids once the pool
+    is large enough, and a query only scans the SIMILAR_PROBES clusters nearest to it.
+    """
+
+    def __init__(self, store, path=SIMILAR_INDEX_PATH, dimensions=SIMILAR_DIMENSIONS, clusters=SIMILAR_CLUSTERS):
+        self.store = store
+        self.path = path
+        self.dimensions = dimensions
+        self.clusters = clusters
+        self._lock = threading.Lock()
+        self._count = 0
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._live = np.zeros(0, dtype=bool)
+        self._row_of = {}
+        self._vectors = None
+        self._assignments = None
+        self._centroids = None
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _read_state(self):
+        try:
+            with open(self._file('state.json')) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if state.get("dimensions") == self.dimensions else None
+
+    def _reset(self):
+        """Start the files over (first use, or a different SIMILAR_DIMENSIONS)."""
+        for name in ('vectors.f32', 'ids.i64', 'clusters.i32', 'centroids.npy'):
+            if os.path.exists(self._file(name)):
+                os.remove(self._file(name))
+        state = {"dimensions": self.dimensions, "cursor": [0.0, 0]}
+        self._write_state(state)
+        return state
+
+    def _write_state(self, state):
+        temp = self._file('state.json.tmp')
+        with open(temp, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp, self._file('state.json'))
+
+    def _append_changes(self):
+        """Append vectors for the analyses stored since the shared cursor; returns how many."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._file('lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            state = self._read_state() or self._reset()
+            rows = os.path.getsize(self._file('ids.i64')) // 8 if os.path.exists(self._file('ids.i64')) else 0
+            centroids = np.load(self._file('centroids.npy')) if os.path.exists(self._file('centroids.npy')) else None
+            # Rows a crashed writer left without an id are dropped
+            for name, width in (('vectors.f32', 4 * self.dimensions), ('clusters.i32', 4)):
+                if os.path.exists(self._file(name)) and os.path.getsize(self._file(name)) > rows * width:
+                    os.truncate(self._file(name), rows * width)
+
+            appended = 0
+            batch_ids, batch_vectors = [], []
+            for analysis_id, created_at, skills, sections, text in self.store.iter_changes(
+                    tuple(state["cursor"]), columns=_CHANGE_COLUMNS):
+                batch_ids.append(analysis_id)
+                batch_vectors.append(feature_vector(json.loads(skills), json.loads(sections), text or "", self.dimensions))
+                state["cursor"] = [created_at, analysis_id]
+                if len(batch_ids) == 4096:
+                    self._write_rows(batch_ids, batch_vectors, centroids, state)
+                    appended += len(batch_ids)
+                    batch_ids, batch_vectors = [], []
+            if batch_ids:
+                self._write_rows(batch_ids, batch_vectors, centroids, state)
+                appended += len(batch_ids)
+
+            if self.clusters and centroids is None and rows + appended >= max(SIMILAR_CLUSTER_SAMPLE, 40 * self.clusters):
+                self._train_clusters(rows + appended)
+        return appended
+
+    def _write_rows(self, ids, vectors, centroids, state):
+        # Vectors (and cluster assignments) first: readers size the matrix by the ids file
+        matrix = np.vstack(vectors).astype(np.float32)
+        with open(self._file('vectors.f32'), 'ab') as f:
+            matrix.tofile(f)
+        if centroids is not None:
+            with open(self._file('clusters.i32'), 'ab') as f:
+                np.argmax(matrix @ centroids.T, axis=1).astype(np.int32).tofile(f)
+        with open(self._file('ids.i64'), 'ab') as f:
+            np.array(ids, dtype=np.int64).tofile(f)
+        self._write_state(state)
+
+    def _train_clusters(self, rows):
+        """Spherical k-means on a sample of the rows, then assign every row to its nearest centroid."""
+        vectors = np.memmap(self._file('vectors.f32'), dtype=np.float32, mode='r', shape=(rows, self.dimensions))
+        rng = np.random.default_rng(0)
+        sample = np.asarray(vectors[np.sort(rng.choice(rows, min(rows, SIMILAR_CLUSTER_SAMPLE), replace=False))])
+        centroids = sample[rng.choice(len(sample), self.clusters, replace=False)]
+        for _ in range(SIMILAR_CLUSTER_ITERATIONS):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(self.clusters):
+                members = sample[nearest == cluster]
+                if len(members):
+                    center = members.sum(axis=0)
+                    centroids[cluster] = center / (np.linalg.norm(center) or 1.0)
+        with open(self._file('clusters.i32'), 'wb') as f:
+            for start in range(0, rows, SIMILAR_BLOCK_ROWS):
+                np.argmax(vectors[start:start + SIMILAR_BLOCK_ROWS] @ centroids.T, axis=1).astype(np.int32).tofile(f)
+        np.save(self._file('centroids.npy'), centroids)
+        logger.info("Similarity index clustered %d rows into %d clusters", rows, self.clusters)
+
+    def refresh(self):
+        """Index newly stored analyses and map any rows other processes appended; returns the new row count."""
+        with self._lock:
+            self._append_changes()
+            count = os.path.getsize(self._file('ids.i64')) // 8 if os.path.exists(self._file('ids.i64')) else 0
+            if count < self._count:
+                # The files were started over
+                self._count, self._ids, self._live, self._row_of = 0, self._ids[:0], self._live[:0], {}
+            if count != self._count:
+                new_ids = np.fromfile(self._file('ids.i64'), dtype=np.int64, count=count - self._count,
+                                      offset=self._count * 8)
+                self._ids = np.concatenate([self._ids, new_ids])
+                self._live = np.concatenate([self._live, np.ones(len(new_ids), dtype=bool)])
+                for row, analysis_id in enumerate(new_ids.tolist(), start=self._count):
+                    previous = self._row_of.get(analysis_id)
+                    if previous is not None:
+                        self._live[previous] = False  # Re-analyzed: the newer row wins
+                    self._row_of[analysis_id] = row
+                self._count = count
+                self._vectors = np.memmap(self._file('vectors.f32'), dtype=np.float32, mode='r',
+                                          shape=(count, self.dimensions)) if count else None
+            if self.clusters and os.path.exists(self._file('centroids.npy')) and self._count:
+                if self._centroids is None:
+                    self._centroids = np.load(self._file('centroids.npy'))
+                if self._assignments is None or len(self._assignments) != self._count:
+                    self._assignments = np.memmap(self._file('clusters.i32'), dtype=np.int32, mode='r',
+                                                  shape=(self._count,))
+            return self._count
+
+    def similar(self, analysis_id, limit=10):
+        """
+        The stored analyses most similar to one analysis, by cosine similarity.
+
+        Returns:
+            dict: "scanned" rows and "results" as [{"id", "similarity"}], most similar first;
+            None if the analysis is not indexed
+        """
+        self.refresh()
+        with self._lock:
+            row = self._row_of.get(analysis_id)
+            if row is None:
+                return None
+            query = np.array(self._vectors[row])
+            live = self._live.copy()
+            live[row] = False
+            best, scanned = [], 0
+            if self._centroids is not None:
+                probes = np.argsort(-(self._centroids @ query))[:SIMILAR_PROBES]
+                for start in range(0, self._count, SIMILAR_BLOCK_ROWS):
+                    block = np.flatnonzero(np.isin(self._assignments[start:start + SIMILAR_BLOCK_ROWS], probes)) + start
+                    block = block[live[block]]
+                    if len(block):
+                        _top(self._vectors[block] @ query, block, limit, best)
+                        scanned += len(block)
+            else:
+                for start in range(0, self._count, SIMILAR_BLOCK_ROWS):
+                    stop = min(start + SIMILAR_BLOCK_ROWS, self._count)
+                    # Contiguous slices read straight from the mapping; dead rows are dropped afterwards
+                    similarities = self._vectors[start:stop] @ query
+                    rows = np.flatnonzero(live[start:stop])
+                    if len(rows):
+                        _top(similarities[rows], rows + start, limit, best)
+                        scanned += len(rows)
+            ids = self._ids
+        return {"scanned": scanned,
+                "results": [{"id": int(ids[r]), "similarity": round(float(s), 4)} for s, r in best]}
+
+    def __len__(self):
+        return int(self._live.sum())
+
+
+similarity_index = SimilarityIndex(analysis_store) if analysis_store is not None else None
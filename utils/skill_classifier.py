@@ -1,9 +1,13 @@
 import json
 import re
 import os
-from typing import Dict, List, Tuple, Any
+import time
+from typing import Dict, List, Tuple, Any, Optional
 from collections import defaultdict
 
+from utils.profiling import active_trace
+from utils.deadline import current_deadline
+
 # --- Load skills.json --- skills.json ko load karte hain
 # Construct an absolute path to skills.json, assuming it's in the project root.
 _CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -136,6 +140,17 @@ def analyze_skill_context(text: str, skill: str, position: int) -> float:
     
     return confidence
 
+# Confidence given to a match whose context was not analyzed because the deadline ran out;
+# it is the Method 1 acceptance threshold, so unscored matches are kept - Deadline ke baad ka default
+UNSCORED_CONFIDENCE = 0.6
+
+def _match_confidence(text, skill, position, deadline):
+    """Context confidence for one match, or UNSCORED_CONFIDENCE once the classify budget is spent."""
+    if deadline is not None and deadline.expired("classify_skills"):
+        deadline.skip("skill_context_confidence")
+        return UNSCORED_CONFIDENCE
+    return analyze_skill_context(text, skill, position)
+
 def classify_skills_enhanced(text: str, skill_dict: Dict[str, List[str]] = None) -> Dict[str, Any]:
     """
     Enhanced skill classification with context analysis and confidence scoring.
@@ -155,25 +170,34 @@ def classify_skills_enhanced(text: str, skill_dict: Dict[str, List[str]] = None)
     found_skills = {category: [] for category in skill_dict}
     skill_confidence = {}
     skill_contexts = {}
+    # Only profiled requests attribute time to each regex pattern
+    trace = active_trace()
+    if trace is not None and not trace.time_patterns:
+        trace = None
+    deadline = current_deadline()
     
     # Method 1: Direct skill matching with context analysis - Context analysis ke saath direct skill matching
     for category, skills in skill_dict.items():
         for skill in skills:
+            started = time.perf_counter() if trace else 0.0
             skill_pattern = r'\b' + re.escape(skill.lower()) + r'\b'
             matches = re.finditer(skill_pattern, text_lower)
             
             for match in matches:
-                confidence = analyze_skill_context(text, skill, match.start())
+                confidence = _match_confidence(text, skill, match.start(), deadline)
                 
                 if confidence >= 0.6:  # Only include skills with decent confidence - Sirf decent confidence wale skills include karte hain
                     if skill not in found_skills[category]:
                         found_skills[category].append(skill)
                         skill_confidence[skill] = confidence
                         skill_contexts[skill] = text[max(0, match.start()-50):min(len(text), match.end()+50)]
+            if trace:
+                trace.add_pattern(skill_pattern, time.perf_counter() - started)
     
     # Method 2: Pattern-based detection with enhanced patterns - Enhanced patterns ke saath pattern-based detection
     for category, patterns in ENHANCED_SKILL_PATTERNS.items():
         for pattern in patterns:
+            started = time.perf_counter() if trace else 0.0
             matches = re.finditer(pattern, text_lower, re.IGNORECASE)
             
             for match in matches:
@@ -184,19 +208,22 @@ def classify_skills_enhanced(text: str, skill_dict: Dict[str, List[str]] = None)
                 
                 matched_text = matched_text.strip()
                 if matched_text and len(matched_text) > 2:
-                    confidence = analyze_skill_context(text, matched_text, match.start())
+                    confidence = _match_confidence(text, matched_text, match.start(), deadline)
                     
                     if confidence >= 0.5 and matched_text not in found_skills[category]:
                         found_skills[category].append(matched_text)
                         skill_confidence[matched_text] = confidence
                         skill_contexts[matched_text] = text[max(0, match.start()-50):min(len(text), match.end()+50)]
+            if trace:
+                trace.add_pattern(pattern, time.perf_counter() - started)
     
     # Calculate skill statistics - Skill statistics calculate karte hain
     total_skills = sum(len(skills) for skills in found_skills.values())
     avg_confidence = sum(skill_confidence.values()) / len(skill_confidence) if skill_confidence else 0
     
     # Identify skill gaps and recommendations - Skill gaps aur recommendations identify karte hain
-    skill_gaps = identify_skill_gaps(found_skills, skill_dict)
+    related = related_skills(found_skills)
+    skill_gaps = identify_skill_gaps(found_skills, skill_dict, related)
     
     return {
         "skills_by_category": found_skills,
@@ -211,33 +238,68 @@ def classify_skills_enhanced(text: str, skill_dict: Dict[str, List[str]] = None)
             "low_confidence_skills": sum(1 for conf in skill_confidence.values() if conf < 0.6)
         },
         "skill_gaps": skill_gaps,
-        "recommendations": generate_skill_recommendations(found_skills, skill_gaps)
+        "recommendations": generate_skill_recommendations(found_skills, skill_gaps, related)
     }
 
-def identify_skill_gaps(found_skills: Dict[str, List[str]], skill_dict: Dict[str, List[str]]) -> Dict[str, List[str]]:
+def related_skills(found_skills: Dict[str, List[str]]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Skills that analyzed resumes with these skills usually also list, from the co-occurrence model.
+    Co-occurrence model se related skills nikalte hain.
+    
+    Returns:
+        List from SkillCooccurrence.related(), or None when the model is off or has too little data
+    """
+    # Imported here: the model follows the analysis store, whose cache version is built from this module
+    from utils.skill_cooccurrence import skill_cooccurrence
+    if skill_cooccurrence is None:
+        return None
+    return skill_cooccurrence.related(skill for skills in found_skills.values() for skill in skills)
+
+def identify_skill_gaps(found_skills: Dict[str, List[str]], skill_dict: Dict[str, List[str]],
+                        related: Optional[List[Dict[str, Any]]] = None) -> Dict[str, List[str]]:
     """
     Identify missing skills that could strengthen the resume.
     Resume ko strengthen karne wale missing skills identify karte hain.
     
+    Args:
+        related: related_skills() output; missing skills that often go with the found ones come first
+    
     Returns:
         Dict of missing skills by category
     """
     skill_gaps = {}
+    relevance = {entry["skill"]: entry["score"] for entry in related or []}
     
     for category, skills in skill_dict.items():
         found_in_category = found_skills.get(category, [])
         missing_skills = [skill for skill in skills if skill not in found_in_category]
+        if relevance:
+            # Stable sort: skills the model knows nothing about keep dictionary order
+            missing_skills.sort(key=lambda skill: -relevance.get(skill.lower(), 0.0))
         
         if missing_skills:
             skill_gaps[category] = missing_skills[:5]  # Top 5 missing skills - Top 5 missing skills
     
     return skill_gaps
 
-def generate_skill_recommendations(found_skills: Dict[str, List[str]], skill_gaps: Dict[str, List[str]]) -> List[str]:
+# Suggested until the co-occurrence model has seen enough resumes
+FALLBACK_HIGH_VALUE_SKILLS = {
+    "Programming Languages": ["python", "javascript", "java"],
+    "Cloud & DevOps": ["aws", "docker", "git"],
+    "Data Science & ML": ["python", "pandas", "scikit-learn"],
+    "Web & Frontend": ["html", "css", "javascript"]
+}
+RELATED_RECOMMENDATIONS = 3
+
+def generate_skill_recommendations(found_skills: Dict[str, List[str]], skill_gaps: Dict[str, List[str]],
+                                   related: Optional[List[Dict[str, Any]]] = None) -> List[str]:
     """
     Generate recommendations for skill improvement.
     Skill improvement ke liye recommendations generate karte hain.
     
+    Args:
+        related: related_skills() output; without it FALLBACK_HIGH_VALUE_SKILLS is suggested
+    
     Returns:
         List of skill improvement recommendations
     """
@@ -252,15 +314,19 @@ def generate_skill_recommendations(found_skills: Dict[str, List[str]], skill_gap
     if weak_categories:
         recommendations.append(f"Consider adding more skills in: {', '.join(weak_categories)}")
     
-    # Suggest missing high-value skills - Missing high-value skills suggest karte hain
-    high_value_skills = {
-        "Programming Languages": ["python", "javascript", "java"],
-        "Cloud & DevOps": ["aws", "docker", "git"],
-        "Data Science & ML": ["python", "pandas", "scikit-learn"],
-        "Web & Frontend": ["html", "css", "javascript"]
-    }
+    # Suggest skills that usually go with the found ones - Saath mein aane wale skills suggest karte hain
+    if related:
+        for entry in related[:RELATED_RECOMMENDATIONS]:
+            because = entry['because']
+            recommendation = (f"Consider adding {entry['skill']}: {entry['rate']:.0%} of analyzed resumes "
+                              f"that list {because[0]} also list it")
+            if len(because) > 1:
+                recommendation += f", and it often goes with {because[1]}"
+            recommendations.append(recommendation)
+        return recommendations
     
-    for category, valuable_skills in high_value_skills.items():
+    # Not enough analyzed resumes yet: suggest fixed high-value skills - Fixed high-value skills suggest karte hain
+    for category, valuable_skills in FALLBACK_HIGH_VALUE_SKILLS.items():
         found_in_category = found_skills.get(category, [])
         missing_valuable = [skill for skill in valuable_skills if skill not in found_in_category]
         
@@ -269,6 +335,23 @@ def generate_skill_recommendations(found_skills: Dict[str, List[str]], skill_gap
     
     return recommendations
 
+def recommend_skills(found_skills: Dict[str, List[str]]) -> List[str]:
+    """
+    Skill recommendations for already classified skills, from the current co-occurrence model.
+    Current model se recommendations banate hain.
+    
+    The model keeps learning from new analyses, so cached and stored responses get theirs from here
+    instead of keeping the list computed when they were analyzed.
+    """
+    related = related_skills(found_skills)
+    skill_gaps = identify_skill_gaps(found_skills, default_skill_dict, related)
+    return generate_skill_recommendations(found_skills, skill_gaps, related)
+
+def attach_skill_recommendations(response_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace the `skill_recommendations` of an /analyze response body with current ones."""
+    response_data["skill_recommendations"] = recommend_skills(response_data["skills"])
+    return response_data
+
 def classify_skills(text, skill_dict=default_skill_dict):
     """
     Legacy function for backward compatibility - Backward compatibility ke liye legacy function.
@@ -0,0 +1,133 @@
+import os
+import json
+import math
+import time
+import logging
+import threading
+
+from utils.analysis_store import analysis_store
+
+logger = logging.getLogger(__name__)
+
+# Co-occurrence configuration - Skill co-occurrence model ki configuration
+COOCCURRENCE_TOP_N = int(os.environ.get('COOCCURRENCE_TOP_N', '20'))
+# Analyzed resumes needed before recommendations come from the model instead of the fallback list
+COOCCURRENCE_MIN_DOCUMENTS = int(os.environ.get('COOCCURRENCE_MIN_DOCUMENTS', '100'))
+# Resumes that must list a skill (and a pair) before it is used as evidence
+COOCCURRENCE_MIN_SUPPORT = int(os.environ.get('COOCCURRENCE_MIN_SUPPORT', '20'))
+COOCCURRENCE_MIN_PAIR = 3
+# How stale the model may get: lookups read newly stored analyses at most this often
+COOCCURRENCE_REFRESH_SECONDS = float(os.environ.get('COOCCURRENCE_REFRESH_SECONDS', '5'))
+
+
+class SkillCooccurrence:
+    """
+    Which skills appear together on analyzed resumes - Skills ka co-occurrence model.
+
+    Keeps sparse skill x skill counts (a dict of neighbours per skill) and per-skill resume
+    counts, updated incrementally from the analysis store like the other indexes: a
+    re-analyzed resume's old skills are subtracted before its new ones are added. Each skill
+    also has a top-N list of the skills most often listed with it, ranked by P(other | skill);
+    a list is rebuilt only after its counts changed, so a lookup costs O(skills x N) no matter
+    how many resumes were counted. Lookups catch up with the store at most once per
+    COOCCURRENCE_REFRESH_SECONDS, and the store is read without holding the model's lock.
+    """
+
+    def __init__(self, store, top_n=COOCCURRENCE_TOP_N):
+        self.store = store
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshed_at = -math.inf
+        self._cursor = (0.0, 0)
+        self._documents = 0
+        self._frequency = {}
+        self._pairs = {}
+        self._skills_of = {}
+        self._top = {}
+        self._stale = set()
+
+    def _count(self, skills, sign):
+        for skill in skills:
+            self._frequency[skill] = self._frequency.get(skill, 0) + sign
+            neighbours = self._pairs.setdefault(skill, {})
+            for other in skills:
+                if other != skill:
+                    neighbours[other] = neighbours.get(other, 0) + sign
+            self._stale.add(skill)
+
+    def refresh(self):
+        """Apply the analyses stored since the last refresh; returns how many were applied."""
+        with self._refresh_lock:
+            # Read and parse first, so lookups keep using the current counts while SQLite is queried
+            changes = [(analysis_id, created_at,
+                        frozenset(skill.lower() for skill_list in json.loads(skills_json).values()
+                                  for skill in skill_list))
+                       for analysis_id, created_at, skills_json in self.store.iter_changes(
+                           self._cursor, columns="id, created_at, skills")]
+            with self._lock:
+                for analysis_id, created_at, skills in changes:
+                    previous = self._skills_of.get(analysis_id)
+                    if previous is not None:
+                        self._count(previous, -1)
+                        self._documents -= 1
+                    self._count(skills, 1)
+                    self._documents += 1
+                    self._skills_of[analysis_id] = skills
+                    self._cursor = (created_at, analysis_id)
+            self._refreshed_at = time.monotonic()
+        return len(changes)
+
+    def _top_list(self, skill):
+        """[(P(other | skill), other)] for the top_n most frequent companions, rebuilt only when stale."""
+        if skill in self._stale or skill not in self._top:
+            frequency = self._frequency.get(skill, 0)
+            companions = [(count / frequency, other) for other, count in self._pairs.get(skill, {}).items()
+                          if count >= COOCCURRENCE_MIN_PAIR] if frequency else []
+            companions.sort(key=lambda pair: (-pair[0], pair[1]))
+            self._top[skill] = companions[:self.top_n]
+            self._stale.discard(skill)
+        return self._top[skill]
+
+    def related(self, skills, limit=None):
+        """
+        Skills that resumes listing `skills` usually also list - Saath mein aane wale skills.
+
+        Each candidate scores the mean of P(candidate | skill) over the given skills with
+        enough support, read from their top-N lists.
+
+        Returns:
+            list: [{"skill", "score", "because", "rate"}] best first, where "because" are the
+            given skills that point to it most strongly and "rate" is the highest
+            P(candidate | skill); None while fewer than COOCCURRENCE_MIN_DOCUMENTS resumes are counted
+        """
+        if time.monotonic() - self._refreshed_at >= COOCCURRENCE_REFRESH_SECONDS:
+            self.refresh()
+        skills = {skill.lower() for skill in skills}
+        with self._lock:
+            if self._documents < COOCCURRENCE_MIN_DOCUMENTS:
+                return None
+            evidence = [skill for skill in sorted(skills) if self._frequency.get(skill, 0) >= COOCCURRENCE_MIN_SUPPORT]
+            totals, support = {}, {}
+            for skill in evidence:
+                for rate, other in self._top_list(skill):
+                    if other in skills:
+                        continue
+                    totals[other] = totals.get(other, 0.0) + rate
+                    support.setdefault(other, []).append((rate, skill))
+        ranked = sorted(totals, key=lambda other: (-totals[other], other))
+        if limit is not None:
+            ranked = ranked[:limit]
+        results = []
+        for other in ranked:
+            strongest = sorted(support[other], key=lambda pair: (-pair[0], pair[1]))
+            results.append({"skill": other, "score": round(totals[other] / len(evidence), 4),
+                            "because": [skill for _, skill in strongest[:2]], "rate": round(strongest[0][0], 4)})
+        return results
+
+    @property
+    def documents(self):
+        return self._documents
+
+
+skill_cooccurrence = SkillCooccurrence(analysis_store) if analysis_store is not None else None
@@ -0,0 +1,202 @@
+import re
+import json
+import logging
+import threading
+
+from utils import lazy_imports
+from utils.analysis_store import analysis_store
+
+logger = logging.getLogger(__name__)
+
+np = lazy_imports.lazy_module('numpy')
+
+_TOKEN = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+_OPERATORS = {"AND", "OR", "NOT"}
+
+
+class InvalidSkillQuery(ValueError):
+    """Raised for a malformed boolean skill query."""
+
+
+def parse_skill_query(query):
+    """
+    Parse "aws AND docker AND NOT (php OR perl)" into a nested tuple tree.
+
+    Operators are upper-case AND/OR/NOT with the usual precedence (NOT > AND > OR). Consecutive
+    other words form one skill ("machine learning"); "quoted" skills work too.
+
+    Returns:
+        tuple: ("skill", name) | ("not", node) | ("and", left, right) | ("or", left, right)
+    """
+    tokens = _TOKEN.findall(query or "")
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def take_or_none():
+        return take() if peek() is not None else None
+
+    def parse_or():
+        node = parse_and()
+        while peek() == "OR":
+            take()
+            node = ("or", node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() == "AND":
+            take()
+            node = ("and", node, parse_not())
+        return node
+
+    def parse_not():
+        if peek() == "NOT":
+            take()
+            return ("not", parse_not())
+        if peek() == "(":
+            take()
+            node = parse_or()
+            if take_or_none() != ")":
+                raise InvalidSkillQuery("Missing closing parenthesis")
+            return node
+        words = []
+        while peek() is not None and peek() not in _OPERATORS and peek() not in ("(", ")"):
+            words.append(take().strip('"'))
+        if not words:
+            raise InvalidSkillQuery(f"Expected a skill at position {position + 1}")
+        return ("skill", " ".join(words).lower())
+
+    if not tokens:
+        raise InvalidSkillQuery("Empty skill query")
+    tree = parse_or()
+    if peek() is not None:
+        raise InvalidSkillQuery(f"Unexpected {peek()!r}")
+    return tree
+
+
+class SkillBitmapIndex:
+    """
+    Per-skill bitsets over stored analyses, for boolean skill queries - Skills ka bitmap index.
+
+    Every analysis gets a slot; each skill keeps a NumPy-packed bitset (uint64 words) with one
+    bit per slot, and scores sit in a parallel float32 array. "aws AND docker AND NOT php" is a
+    handful of vectorized AND/OR/NOT operations over those words, and top-N by score is an
+    argpartition over the matching slots only. The index follows the analysis store: each query
+    first applies the rows added or re-analyzed since the last one.
+    """
+
+    def __init__(self, store, capacity=1024):
+        self.store = store
+        self._lock = threading.Lock()
+        self._cursor = (0.0, 0)
+        self._slots = {}
+        self._size = 0
+        self._words = max(1, capacity // 64)
+        self._ids = np.zeros(self._words * 64, dtype=np.int64)
+        self._scores = np.zeros(self._words * 64, dtype=np.float32)
+        self._bits = {}
+
+    def _grow(self):
+        words = self._words * 2
+        self._ids = np.resize(self._ids, words * 64)
+        self._scores = np.resize(self._scores, words * 64)
+        for skill, bits in self._bits.items():
+            grown = np.zeros(words, dtype=np.uint64)
+            grown[:self._words] = bits
+            self._bits[skill] = grown
+        self._words = words
+
+    def _set(self, analysis_id, score, skills):
+        slot = self._slots.get(analysis_id)
+        if slot is None:
+            if self._size == self._words * 64:
+                self._grow()
+            slot = self._slots[analysis_id] = self._size
+            self._size += 1
+            self._ids[slot] = analysis_id
+        else:
+            # Re-analyzed: clear the slot's old skills first
+            word_mask = ~np.uint64(1 << (slot & 63))
+            for bits in self._bits.values():
+                bits[slot >> 6] &= word_mask
+        self._scores[slot] = score
+        bit = np.uint64(1 << (slot & 63))
+        for skill in skills:
+            bits = self._bits.get(skill)
+            if bits is None:
+                bits = self._bits[skill] = np.zeros(self._words, dtype=np.uint64)
+            bits[slot >> 6] |= bit
+
+    def refresh(self):
+        """Apply the analyses stored since the last refresh; returns how many were applied."""
+        applied = 0
+        with self._lock:
+            for analysis_id, created_at, score, skills_json in self.store.iter_changes(self._cursor):
+                skills = {skill.lower() for skill_list in json.loads(skills_json).values() for skill in skill_list}
+                self._set(analysis_id, score, skills)
+                self._cursor = (created_at, analysis_id)
+                applied += 1
+        if applied:
+            logger.debug("Skill index applied %d analyses (%d total)", applied, self._size)
+        return applied
+
+    def _all(self):
+        """Bitset of every occupied slot."""
+        bits = np.zeros(self._words, dtype=np.uint64)
+        full, rest = divmod(self._size, 64)
+        bits[:full] = np.uint64(0xFFFFFFFFFFFFFFFF)
+        if rest:
+            bits[full] = np.uint64((1 << rest) - 1)
+        return bits
+
+    def _evaluate(self, node):
+        kind = node[0]
+        if kind == "skill":
+            bits = self._bits.get(node[1])
+            return bits.copy() if bits is not None else np.zeros(self._words, dtype=np.uint64)
+        if kind == "not":
+            return self._all() & ~self._evaluate(node[1])
+        left, right = self._evaluate(node[1]), self._evaluate(node[2])
+        return (left & right) if kind == "and" else (left | right)
+
+    def query(self, query, limit=50, min_score=None):
+        """
+        Analyses matching a boolean skill query, best score first.
+
+        Returns:
+            dict: "total" matches and "results" as [{"id", "score"}] (at most `limit`)
+
+        Raises:
+            InvalidSkillQuery: If the query cannot be parsed
+        """
+        tree = parse_skill_query(query)
+        self.refresh()
+        with self._lock:
+            bits = self._evaluate(tree)
+            # Little-endian words viewed as bytes keep slot order with bitorder='little'
+            slots = np.flatnonzero(np.unpackbits(bits.view(np.uint8), bitorder='little')[:self._size])
+            scores = self._scores[slots]
+            if min_score is not None:
+                keep = scores >= min_score
+                slots, scores = slots[keep], scores[keep]
+            ids = self._ids[slots]
+        total = len(slots)
+        if total > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            ids, scores = ids[top], scores[top]
+        order = np.lexsort((-ids, -scores))
+        return {"total": total,
+                "results": [{"id": int(ids[i]), "score": round(float(scores[i]), 2)} for i in order]}
+
+    def __len__(self):
+        return self._size
+
+
+skill_index = SkillBitmapIndex(analysis_store) if analysis_store is not None else None
@@ -0,0 +1,133 @@
+import os
+import json
+import fcntl
+import shutil
+import logging
+from datetime import datetime
+
+from utils.analysis_cache import file_content_hash
+
+logger = logging.getLogger(__name__)
+
+# Slow-request capture configuration - Slow requests capture karne ki configuration
+SLOW_CAPTURE_ENABLED = os.environ.get('SLOW_CAPTURE_ENABLED', 'true').lower() == 'true'
+SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', '5000'))
+SLOW_CAPTURE_DIR = os.environ.get('SLOW_CAPTURE_DIR', os.path.join('var', 'slow_requests'))
+# Keeping the uploads themselves is opt-in: they contain personal data
+SLOW_CAPTURE_KEEP_FILES = os.environ.get('SLOW_CAPTURE_KEEP_FILES', 'false').lower() == 'true'
+SLOW_CAPTURE_MAX_FILES = int(os.environ.get('SLOW_CAPTURE_MAX_FILES', '100'))
+SLOW_CAPTURE_MAX_MB = int(os.environ.get('SLOW_CAPTURE_MAX_MB', '200'))
+
+CAPTURE_LOG = os.path.join(SLOW_CAPTURE_DIR, 'captures.jsonl')
+CAPTURE_LOCK = os.path.join(SLOW_CAPTURE_DIR, 'captures.lock')
+QUARANTINE_DIR = os.path.join(SLOW_CAPTURE_DIR, 'quarantine')
+
+
+def is_slow(elapsed_seconds):
+    """Whether an analysis took long enough to be captured."""
+    return SLOW_CAPTURE_ENABLED and elapsed_seconds * 1000 >= SLOW_REQUEST_THRESHOLD_MS
+
+
+def _enforce_quarantine_limits():
+    """Delete the oldest quarantined files until both the count and size limits hold."""
+    entries = []
+    for name in os.listdir(QUARANTINE_DIR):
+        path = os.path.join(QUARANTINE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    entries.sort()
+
+    total = sum(size for _, size, _ in entries)
+    max_bytes = SLOW_CAPTURE_MAX_MB * 1024 * 1024
+    while entries and (len(entries) > SLOW_CAPTURE_MAX_FILES or total > max_bytes):
+        _, size, path = entries.pop(0)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+def _append_capture(record):
+    """
+    Append one record to captures.jsonl, then drop its oldest lines until both the count and
+    size limits hold. Writers take a file lock, so a trim never loses another worker's line.
+    """
+    os.makedirs(SLOW_CAPTURE_DIR, exist_ok=True)
+    with open(CAPTURE_LOCK, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        with open(CAPTURE_LOG, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+        with open(CAPTURE_LOG) as f:
+            lines = f.readlines()
+        total = sum(len(line) for line in lines)
+        max_bytes = SLOW_CAPTURE_MAX_MB * 1024 * 1024
+        if len(lines) <= SLOW_CAPTURE_MAX_FILES and total <= max_bytes:
+            return
+        start = 0
+        while start < len(lines) - 1 and (len(lines) - start > SLOW_CAPTURE_MAX_FILES or total > max_bytes):
+            total -= len(lines[start])
+            start += 1
+        temp_file = CAPTURE_LOG + '.tmp'
+        with open(temp_file, 'w') as f:
+            f.writelines(lines[start:])
+        os.replace(temp_file, CAPTURE_LOG)
+
+
+def quarantine(filepath, digest, file_extension):
+    """Copy an upload into the bounded quarantine directory, named by content hash."""
+    os.makedirs(QUARANTINE_DIR, exist_ok=True)
+    target = os.path.join(QUARANTINE_DIR, f"{digest}.{file_extension}")
+    if not os.path.exists(target):
+        shutil.copyfile(filepath, target)
+        _enforce_quarantine_limits()
+    return target if os.path.exists(target) else None
+
+
+def capture(filepath, filename, elapsed_seconds, trace, status, characters=None):
+    """
+    Append one slow analysis to captures.jsonl (and optionally quarantine the upload).
+
+    Like the quarantine, the log keeps only the newest SLOW_CAPTURE_MAX_FILES records
+    within SLOW_CAPTURE_MAX_MB.
+
+    Args:
+        filepath: Saved upload that was analyzed
+        filename: Original file name
+        elapsed_seconds: End-to-end analysis time
+        trace: RequestTrace holding per-stage timings and PDF extraction stats
+        status: "success", "no_text" or "error"
+        characters: Extracted text length, if extraction got that far
+    """
+    try:
+        digest = file_content_hash(filepath)
+        file_extension = filename.rsplit('.', 1)[1].lower()
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "file_name": filename,
+            "content_hash": digest,
+            "file_extension": file_extension,
+            "file_size": os.path.getsize(filepath),
+            "status": status,
+            "elapsed_seconds": round(elapsed_seconds, 4),
+            "stages": {name: round(seconds, 4) for name, seconds in trace.stages.items()},
+            "pages": trace.extraction.get("pages"),
+            "extraction_methods": trace.extraction.get("methods"),
+            "characters": characters,
+            "quarantined_file": quarantine(filepath, digest, file_extension) if SLOW_CAPTURE_KEEP_FILES else None,
+        }
+        _append_capture(record)
+        logger.warning("Slow analysis captured: %s took %.2fs (hash %s)", filename, elapsed_seconds, digest[:12])
+    except Exception as e:
+        logger.error(f"Could not capture slow request: {e}")
+
+
+def load_captures(path=CAPTURE_LOG):
+    """Read every captured slow analysis, oldest first."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,34 @@
+import os
+import sqlite3
+import threading
+
+_local = threading.local()
+
+
+def get_connection(path, schema=None):
+    """
+    Return a WAL-mode SQLite connection for this process and thread, opening it on first use.
+
+    Connections are never shared across fork or threads, so gunicorn workers, pool processes
+    and gthread threads each get their own handle on the same database file.
+
+    Args:
+        path: Database file path; parent directories are created as needed
+        schema: Optional SQL script run once when the connection is opened
+    """
+    key = (os.getpid(), path)
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(key)
+    if conn is None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if schema:
+            conn.executescript(schema)
+        connections[key] = conn
+    return conn
@@ -0,0 +1,69 @@
+import os
+import gc
+import time
+import logging
+
+from parser.resume_parser import extract_basic_info, extract_text_from_pdf, extract_text_from_docx
+from utils import lazy_imports
+from utils.pipeline import analyze_file
+from utils.extractor_pool import extractor_pool
+from utils.skill_index import skill_index
+from utils.jd_matcher import job_matcher
+from utils.similar_index import similarity_index
+from utils.skill_cooccurrence import skill_cooccurrence
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_RESUME = os.path.join(_PROJECT_ROOT, 'sample_resume.pdf')
+
+
+def warm_up(sample_path=SAMPLE_RESUME, freeze=True):
+    """
+    Run a sample resume through every stage so lazily built state exists before gunicorn forks.
+
+    The lazily imported dependencies (PyMuPDF, python-docx, spaCy and its model, fpdf) are loaded,
+    and compiled regexes, the skill taxonomy and the spaCy vocab/string store end up in the master's
+    heap. gc.freeze() then moves every surviving object into the permanent generation, so collections
+    in the workers never touch (and copy-on-write duplicate) those inherited pages.
+
+    Args:
+        sample_path: Document to analyze; defaults to the bundled sample_resume.pdf
+        freeze: Whether to collect and freeze the heap afterwards
+    """
+    start = time.perf_counter()
+    lazy_imports.preload()
+    if os.path.exists(sample_path):
+        filename = os.path.basename(sample_path)
+        try:
+            analyze_file(sample_path, filename, store=False)
+            # Extraction normally runs in extractor processes forked from the workers; warm PyMuPDF here
+            # too so they inherit it. /analyze never runs NER, but other entry points do; build the spaCy
+            # vocab now as well
+            if filename.lower().endswith('.pdf'):
+                text = extract_text_from_pdf(sample_path)
+            else:
+                text = extract_text_from_docx(sample_path)
+            if text:
+                extract_basic_info(text)
+        except Exception as e:
+            logger.error(f"Warm-up analysis failed: {e}")
+    else:
+        logger.warning(f"Warm-up sample not found: {sample_path}")
+
+    # Indexes over the analysis store are built once here and shared copy-on-write; workers only catch up
+    for index in (skill_index, job_matcher, similarity_index, skill_cooccurrence):
+        if index is not None:
+            try:
+                index.refresh()
+            except Exception as e:
+                logger.error(f"Could not build {type(index).__name__}: {e}")
+
+    # Workers start their own extractors; the master must not keep any
+    extractor_pool.shutdown()
+
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    logger.info(f"Warm-up finished in {time.perf_counter() - start:.2f}s "
+                f"({gc.get_freeze_count()} objects frozen)")
@@ -0,0 +1,268 @@
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+
+from utils.bulk import find_documents, fingerprint, content_sha256, is_document
+
+logger = logging.getLogger(__name__)
+
+# Watch configuration - Folder watch ki configuration
+WATCH_POLL_INTERVAL = float(os.environ.get('WATCH_POLL_INTERVAL', '2'))
+# Full rescan even with inotify, to catch events lost to a queue overflow or a network filesystem
+WATCH_RESCAN_SECONDS = float(os.environ.get('WATCH_RESCAN_SECONDS', '3600'))
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+def _visible(path):
+    return not os.path.basename(path).startswith('.')
+
+
+class InotifyWatcher:
+    """
+    Folder watcher on Linux inotify, called through ctypes - inotify se folder watch karte hain.
+
+    Files are reported once they are closed after writing or moved in, so half-copied files are
+    never picked up. Subdirectories are watched as they appear; files already inside a new one
+    come without a close event, so they are reported as found and left to settle.
+
+    Raises:
+        OSError: From the constructor, when inotify is not available
+    """
+
+    def __init__(self, root):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError(errno.ENOSYS, "libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._libc.inotify_init1.argtypes = [ctypes.c_int]
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        self.root = root
+        self._dirs = {}
+        self._add_tree(root)
+
+    def _add_tree(self, directory):
+        """Watch a directory and everything below it; returns the documents already inside."""
+        found = []
+        for current, subdirs, names in os.walk(directory):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(current), WATCH_MASK)
+            if wd < 0:
+                code = ctypes.get_errno()
+                # ENOSPC: fs.inotify.max_user_watches is exhausted; the periodic rescan still covers it
+                logger.warning(f"Cannot watch {current}: {os.strerror(code)}")
+                continue
+            self._dirs[wd] = current
+            found.extend(os.path.join(current, name) for name in names)
+        return found
+
+    def poll(self, timeout):
+        """
+        Wait up to `timeout` seconds for events.
+
+        Returns:
+            tuple: (changed paths, found paths that may still be written, removed paths, rescan needed)
+        """
+        changed, found, removed, rescan = set(), set(), set(), False
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return changed, found, removed, rescan
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    rescan = True
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self._dirs[wd]
+                    continue
+                path = os.path.join(directory, os.fsdecode(name)) if name else directory
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # Files can land before the new watch exists
+                        found.update(self._add_tree(path))
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        rescan = True
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    changed.add(path)
+                    removed.discard(path)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    removed.add(path)
+                    changed.discard(path)
+                    found.discard(path)
+        return changed, found, removed, rescan
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """
+    Folder watcher that compares size and mtime snapshots every WATCH_POLL_INTERVAL seconds.
+
+    A file is reported once its size and mtime held still for one interval, so files that are
+    still being copied are left alone until the copy is done.
+    """
+
+    def __init__(self, root, interval=WATCH_POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self._next = 0.0
+        self._previous = {}
+        self._reported = {}
+
+    def _snapshot(self):
+        snapshot = {}
+        for path in find_documents(self.root):
+            stamp = fingerprint(path)
+            if stamp is not None:
+                snapshot[path] = (stamp["size"], stamp["mtime_ns"])
+        return snapshot
+
+    def poll(self, timeout):
+        changed, removed = set(), set()
+        wait = self._next - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return changed, set(), removed, False
+        time.sleep(max(0.0, wait))
+        self._next = time.monotonic() + self.interval
+
+        current = self._snapshot()
+        for path, stamp in current.items():
+            if stamp == self._previous.get(path) and self._reported.get(path) != stamp:
+                changed.add(path)
+                self._reported[path] = stamp
+        for path in set(self._reported) - set(current):
+            removed.add(path)
+            del self._reported[path]
+        self._previous = current
+        return changed, set(), removed, False
+
+    def close(self):
+        pass
+
+
+def make_watcher(root, force_polling=False):
+    """inotify where it works, else polling."""
+    if not force_polling:
+        try:
+            return InotifyWatcher(root)
+        except OSError as e:
+            logger.warning(f"inotify unavailable ({e}); falling back to polling every {WATCH_POLL_INTERVAL}s")
+    return PollingWatcher(root)
+
+
+def needs_analysis(path, checkpoint):
+    """
+    The fingerprint to analyze `path` with, or None when it is unchanged.
+
+    Size and mtime are compared first; only when they differ is the file hashed, and a file
+    whose content is the same as last time (touched, copied over itself) is re-stamped in the
+    checkpoint instead of parsed again. Files whose last analysis failed are always tried again.
+    """
+    if not is_document(path) or not _visible(path):
+        return None
+    stamp = fingerprint(path)
+    if stamp is None or checkpoint.is_done(path, stamp):
+        return None
+    try:
+        stamp["sha256"] = content_sha256(path)
+    except OSError:
+        return None
+    previous = checkpoint.get(path)
+    if previous is not None and previous["status"] == "success" and previous.get("sha256") == stamp["sha256"]:
+        checkpoint.record(path, stamp, "success")
+        return None
+    return stamp
+
+
+def _settled(settling, now, interval=WATCH_POLL_INTERVAL):
+    """Pop and return the settling paths whose size and mtime held still for `interval` seconds."""
+    ready = []
+    for path, (stamp, seen_at) in list(settling.items()):
+        if now - seen_at < interval:
+            continue
+        current = fingerprint(path)
+        if current is None:
+            del settling[path]
+        elif current == stamp:
+            del settling[path]
+            ready.append(path)
+        else:
+            settling[path] = (current, now)  # Still being written: wait another interval
+    return ready
+
+
+def watch_items(root, watcher, checkpoint, stop, rescan_seconds=WATCH_RESCAN_SECONDS, tick=1.0):
+    """
+    Yield (path, fingerprint) for every new or changed document under `root` until `stop` is set.
+
+    Starts with a full scan, so files that arrived while nothing was watching are picked up.
+    Files found by a scan rather than reported closed by the watcher may still be being copied:
+    like the polling watcher, they are analyzed only once their size and mtime held still for
+    WATCH_POLL_INTERVAL, unless a close event for them arrives first.
+    Yields None whenever a `tick` passes quietly, letting the consumer write out finished results.
+    """
+    next_rescan = 0.0
+    settling = {}
+    while not stop.is_set():
+        changed, found, removed, rescan = watcher.poll(0 if next_rescan == 0.0 else tick)
+        if rescan or time.monotonic() >= next_rescan:
+            found.update(find_documents(root))
+            # Entries for files that disappeared while nobody looked
+            removed.update(path for path in list(checkpoint.entries)
+                           if path.startswith(root + os.sep) and not os.path.exists(path))
+            next_rescan = time.monotonic() + rescan_seconds
+        for path in removed:
+            checkpoint.forget(path)
+            settling.pop(path, None)
+        for path in changed:
+            settling.pop(path, None)
+        now = time.monotonic()
+        for path in found - changed:
+            if path in settling or not is_document(path) or not _visible(path):
+                continue
+            stamp = fingerprint(path)
+            if stamp is not None and not checkpoint.is_done(path, stamp):
+                settling[path] = (stamp, now)
+        changed.update(_settled(settling, now))
+        for path in sorted(changed):
+            stamp = needs_analysis(path, checkpoint)
+            if stamp is not None:
+                yield path, stamp
+        yield None